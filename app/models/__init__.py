@@ -3,11 +3,13 @@ from .repository import Repository
 from .repository_image import RepositoryImage
 from .ai_summary import AISummary
 from .repository_statistic import RepositoryStatistic
+from .crawl_job import CrawlJob
 
 __all__ = [
     "WeeklyReport",
     "Repository",
     "RepositoryImage",
     "AISummary",
-    "RepositoryStatistic"
+    "RepositoryStatistic",
+    "CrawlJob"
 ]
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON
+from datetime import datetime
+from database import Base
+
+class CrawlJob(Base):
+    __tablename__ = "crawl_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(String(20), nullable=False, default="queued", index=True)  # queued, running, completed, failed
+    current_step = Column(String(100), default="")
+    message = Column(Text, default="")
+    total = Column(Integer, default=0)
+    completed = Column(Integer, default=0)
+    params = Column(JSON, default={})
+    timings = Column(JSON, default={})  # 各阶段耗时（秒）
+    error = Column(Text)
+    run_id = Column(String(64))  # 爬虫运行ID，可用于 --resume
+    weekly_report_id = Column(Integer)
+    created_at = Column(DateTime, default=datetime.now)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    
+    __table_args__ = (
+        {'extend_existing': True},
+    )
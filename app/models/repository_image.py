@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, JSON
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
@@ -12,10 +12,14 @@ class RepositoryImage(Base):
     filepath = Column(String(255), nullable=False)
     size = Column(Integer)
     content_type = Column(String(50))
+    width = Column(Integer)  # 从图片头部读取的像素尺寸，SVG等无法确定时为空
+    height = Column(Integer)
     downloaded_at = Column(DateTime, default=datetime.now)
     original_url = Column(String(255))
     absolute_url = Column(String(255))
     is_representative = Column(Integer, default=0)
+    sha256 = Column(String(64), index=True)  # 内容寻址存储中的blob，为空表示旧的按目录存储的图片
+    variants = Column(JSON)  # 预生成的缩略图和WebP/AVIF变体列表
     
     # 关系
     repository = relationship("Repository", back_populates="images")
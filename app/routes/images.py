@@ -0,0 +1,84 @@
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse
+from pathlib import Path
+from typing import Dict, Optional
+import re
+
+from app.services.image_variants import FORMATS, VARIANT_WIDTHS, variant_path
+
+router = APIRouter()
+
+IMAGES_DIR = Path(__file__).resolve().parents[2] / "images"
+BLOB_DIR = IMAGES_DIR / "blobs"
+VARIANTS_DIR = IMAGES_DIR / "variants"
+
+SHA256_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+# blob按内容命名，内容不会变化，可以永久缓存
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# 图片来自第三方README，直接在本站打开时（例如带脚本的SVG）禁止执行脚本和加载任何资源
+SECURITY_HEADERS = {
+    "Content-Security-Policy": "default-src 'none'; style-src 'unsafe-inline'; sandbox",
+    "X-Content-Type-Options": "nosniff"
+}
+
+# 按优先级尝试的格式，jpeg/png为兜底格式（每张图片只会生成其中一种）
+FORMAT_PREFERENCE = ["avif", "webp", "jpeg", "png"]
+
+
+def parse_accept(accept: str) -> Dict[str, float]:
+    """解析Accept请求头，返回 媒体类型 -> q值"""
+    accepted = {}
+    for item in accept.split(","):
+        parts = [part.strip() for part in item.split(";")]
+        if not parts[0]:
+            continue
+        quality = 1.0
+        for param in parts[1:]:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        accepted[parts[0].lower()] = quality
+    return accepted
+
+
+def accepts(accepted: Dict[str, float], content_type: str) -> bool:
+    """客户端是否接受该类型；现代格式只有显式声明时才返回，避免旧浏览器收到无法解码的图片"""
+    if content_type in accepted:
+        return accepted[content_type] > 0
+    if content_type in ("image/avif", "image/webp"):
+        return False
+    return accepted.get("image/*", accepted.get("*/*", 1.0 if not accepted else 0.0)) > 0
+
+
+def find_blob(sha256: str) -> Optional[Path]:
+    """查找原图（扩展名由内容类型决定）"""
+    return next((path for path in BLOB_DIR.glob(f"{sha256}.*") if path.is_file()), None)
+
+
+@router.get("/{sha256}")
+def get_image(sha256: str, request: Request, variant: Optional[str] = None):
+    """获取图片，指定variant时按Accept返回AVIF/WebP/JPEG/PNG变体，没有变体时返回原图"""
+    sha256 = sha256.lower()
+    if not SHA256_PATTERN.match(sha256):
+        raise HTTPException(status_code=400, detail="无效的图片哈希")
+    if variant is not None and variant not in VARIANT_WIDTHS:
+        raise HTTPException(status_code=400, detail=f"无效的变体，可选：{', '.join(VARIANT_WIDTHS)}")
+
+    headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL, "Vary": "Accept", **SECURITY_HEADERS}
+
+    if variant:
+        accepted = parse_accept(request.headers.get("accept", ""))
+        for fmt in FORMAT_PREFERENCE:
+            content_type = FORMATS[fmt][1]
+            path = variant_path(VARIANTS_DIR, sha256, variant, fmt)
+            if accepts(accepted, content_type) and path.is_file():
+                return FileResponse(path, media_type=content_type, headers=headers)
+
+    blob = find_blob(sha256)
+    if blob is None:
+        raise HTTPException(status_code=404, detail="图片不存在")
+    return FileResponse(blob, headers=headers)
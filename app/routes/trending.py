@@ -86,9 +86,13 @@ def get_latest_trending(db: Session = Depends(get_db)):
                                 "filepath": img.filepath,
                                 "size": img.size,
                                 "content_type": img.content_type,
+                                "width": img.width,
+                                "height": img.height,
                                 "downloaded_at": img.downloaded_at,
                                 "original_url": img.original_url,
-                                "absolute_url": img.absolute_url
+                                "absolute_url": img.absolute_url,
+                                "sha256": img.sha256,
+                                "variants": img.variants
                             }
                             for img in repo.images
                         ],
@@ -99,9 +103,13 @@ def get_latest_trending(db: Session = Depends(get_db)):
                                 "filepath": img.filepath,
                                 "size": img.size,
                                 "content_type": img.content_type,
+                                "width": img.width,
+                                "height": img.height,
                                 "downloaded_at": img.downloaded_at,
                                 "original_url": img.original_url,
-                                "absolute_url": img.absolute_url
+                                "absolute_url": img.absolute_url,
+                                "sha256": img.sha256,
+                                "variants": img.variants
                             }
                             for img in repo.images if img.is_representative
                         ), None)
@@ -221,9 +229,13 @@ def get_report_by_id(id: int, db: Session = Depends(get_db)):
                                 "filepath": img.filepath,
                                 "size": img.size,
                                 "content_type": img.content_type,
+                                "width": img.width,
+                                "height": img.height,
                                 "downloaded_at": img.downloaded_at,
                                 "original_url": img.original_url,
-                                "absolute_url": img.absolute_url
+                                "absolute_url": img.absolute_url,
+                                "sha256": img.sha256,
+                                "variants": img.variants
                             }
                             for img in repo.images
                         ],
@@ -234,9 +246,13 @@ def get_report_by_id(id: int, db: Session = Depends(get_db)):
                                 "filepath": img.filepath,
                                 "size": img.size,
                                 "content_type": img.content_type,
+                                "width": img.width,
+                                "height": img.height,
                                 "downloaded_at": img.downloaded_at,
                                 "original_url": img.original_url,
-                                "absolute_url": img.absolute_url
+                                "absolute_url": img.absolute_url,
+                                "sha256": img.sha256,
+                                "variants": img.variants
                             }
                             for img in repo.images if img.is_representative
                         ), None)
@@ -330,9 +346,13 @@ def get_weekly_data(year: int, week: int, db: Session = Depends(get_db)):
                                 "filepath": img.filepath,
                                 "size": img.size,
                                 "content_type": img.content_type,
+                                "width": img.width,
+                                "height": img.height,
                                 "downloaded_at": img.downloaded_at,
                                 "original_url": img.original_url,
-                                "absolute_url": img.absolute_url
+                                "absolute_url": img.absolute_url,
+                                "sha256": img.sha256,
+                                "variants": img.variants
                             }
                             for img in repo.images
                         ],
@@ -343,9 +363,13 @@ def get_weekly_data(year: int, week: int, db: Session = Depends(get_db)):
                                 "filepath": img.filepath,
                                 "size": img.size,
                                 "content_type": img.content_type,
+                                "width": img.width,
+                                "height": img.height,
                                 "downloaded_at": img.downloaded_at,
                                 "original_url": img.original_url,
-                                "absolute_url": img.absolute_url
+                                "absolute_url": img.absolute_url,
+                                "sha256": img.sha256,
+                                "variants": img.variants
                             }
                             for img in repo.images if img.is_representative
                         ), None)
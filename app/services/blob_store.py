@@ -0,0 +1,220 @@
+"""
+按内容寻址的图片存储
+图片以SHA-256命名保存在同一个目录下（images/blobs/<sha256>.<ext>），相同内容只保存一份；
+索引（SQLite）记录每个blob的元数据以及 URL -> SHA-256 的映射，已知URL再次出现时直接复用，不再下载。
+RepositoryImage.sha256 以及报告JSON中的 image_info.images[].sha256 即为对blob的引用，
+gc() 删除不再被引用的blob
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+CONTENT_TYPE_EXTENSIONS = {
+    'image/png': '.png',
+    'image/jpeg': '.jpg',
+    'image/gif': '.gif',
+    'image/svg+xml': '.svg',
+    'image/webp': '.webp',
+    'image/avif': '.avif'
+}
+
+# 刚写入、尚未被报告或数据库引用的blob在宽限期内不会被回收
+DEFAULT_GC_GRACE_SECONDS = 24 * 3600
+
+
+class BlobWriter:
+    """边写入临时文件边计算SHA-256"""
+
+    def __init__(self, store: 'BlobStore'):
+        self.store = store
+        self.temp_path = store.temp_dir / f'{uuid.uuid4().hex}.part'
+        self._file = open(self.temp_path, 'wb')
+        self._hash = hashlib.sha256()
+        self.size = 0
+
+    def write(self, chunk: bytes) -> None:
+        self._file.write(chunk)
+        self._hash.update(chunk)
+        self.size += len(chunk)
+
+    def commit(self, content_type: str, url: str = None, width: int = None, height: int = None) -> Dict:
+        """写入完成，移动到以哈希命名的位置；内容已存在时丢弃临时文件"""
+        self._file.close()
+        return self.store.add_file(self.temp_path, self._hash.hexdigest(), self.size, content_type, url,
+                                   width, height)
+
+    def abort(self) -> None:
+        self._file.close()
+        if self.temp_path.exists():
+            self.temp_path.unlink()
+
+
+class BlobStore:
+    """内容寻址的blob存储及其索引（线程安全）"""
+
+    def __init__(self, root: Path, index_file: Path = None):
+        self.root = Path(root)
+        self.temp_dir = self.root / 'tmp'
+        self.temp_dir.mkdir(parents=True, exist_ok=True)
+        self.index_file = Path(index_file) if index_file else self.root / 'index.sqlite3'
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.index_file), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS blobs ('
+            ' sha256 TEXT PRIMARY KEY,'
+            ' ext TEXT NOT NULL,'
+            ' size INTEGER NOT NULL,'
+            ' content_type TEXT,'
+            ' created_at REAL NOT NULL,'
+            ' width INTEGER,'
+            ' height INTEGER)'
+        )
+        # 旧索引没有尺寸列
+        columns = {row[1] for row in self._conn.execute('PRAGMA table_info(blobs)')}
+        for column in ('width', 'height'):
+            if column not in columns:
+                self._conn.execute(f'ALTER TABLE blobs ADD COLUMN {column} INTEGER')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS urls ('
+            ' url TEXT PRIMARY KEY,'
+            ' sha256 TEXT NOT NULL,'
+            ' fetched_at REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_urls_sha256 ON urls (sha256)')
+        self._conn.commit()
+
+        self.url_hits = 0
+        self.deduplicated = 0
+        self.stored = 0
+
+    def blob_path(self, sha256: str, ext: str) -> Path:
+        return self.root / f'{sha256}{ext}'
+
+    def _info(self, sha256: str, ext: str, size: int, content_type: str,
+              width: Optional[int] = None, height: Optional[int] = None) -> Dict:
+        path = self.blob_path(sha256, ext)
+        return {
+            'filename': path.name,
+            'filepath': str(path),
+            'size': size,
+            'content_type': content_type,
+            'sha256': sha256,
+            'width': width,
+            'height': height
+        }
+
+    def lookup_url(self, url: str) -> Optional[Dict]:
+        """查找URL对应的blob，blob文件已被删除时清除映射并返回None"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT b.sha256, b.ext, b.size, b.content_type, b.width, b.height FROM urls u'
+                ' JOIN blobs b ON b.sha256 = u.sha256 WHERE u.url = ?', (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            if not self.blob_path(row[0], row[1]).exists():
+                self._conn.execute('DELETE FROM urls WHERE url = ?', (url,))
+                self._conn.execute('DELETE FROM blobs WHERE sha256 = ?', (row[0],))
+                self._conn.commit()
+                return None
+            self.url_hits += 1
+        return self._info(*row)
+
+    def open_writer(self) -> BlobWriter:
+        return BlobWriter(self)
+
+    def add_file(self, temp_path: Path, sha256: str, size: int, content_type: str, url: str = None,
+                 width: int = None, height: int = None) -> Dict:
+        """把已计算哈希的临时文件加入存储，并记录URL映射"""
+        ext = CONTENT_TYPE_EXTENSIONS.get(content_type, '.bin')
+        path = self.blob_path(sha256, ext)
+        now = time.time()
+        with self._lock:
+            if path.exists():
+                self.deduplicated += 1
+                temp_path.unlink()
+            else:
+                os.replace(temp_path, path)
+                self.stored += 1
+            self._conn.execute(
+                'INSERT OR IGNORE INTO blobs (sha256, ext, size, content_type, created_at, width, height)'
+                ' VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (sha256, ext, size, content_type, now, width, height)
+            )
+            if url:
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO urls (url, sha256, fetched_at) VALUES (?, ?, ?)', (url, sha256, now)
+                )
+            self._conn.commit()
+        return self._info(sha256, ext, size, content_type, width, height)
+
+    def gc(self, referenced: Iterable[str], grace_seconds: float = DEFAULT_GC_GRACE_SECONDS,
+           dry_run: bool = False) -> Dict:
+        """删除未被引用且超过宽限期的blob，以及残留的临时文件"""
+        referenced = set(referenced)
+        cutoff = time.time() - grace_seconds
+        removed, freed = 0, 0
+        with self._lock:
+            rows = self._conn.execute('SELECT sha256, ext, size, created_at FROM blobs').fetchall()
+            for sha256, ext, size, created_at in rows:
+                if sha256 in referenced or created_at > cutoff:
+                    continue
+                removed += 1
+                freed += size
+                if dry_run:
+                    continue
+                path = self.blob_path(sha256, ext)
+                if path.exists():
+                    path.unlink()
+                self._conn.execute('DELETE FROM urls WHERE sha256 = ?', (sha256,))
+                self._conn.execute('DELETE FROM blobs WHERE sha256 = ?', (sha256,))
+
+            # 索引中不存在的文件（例如索引被删除后残留的blob）同样按宽限期回收
+            known = {f'{sha256}{ext}' for sha256, ext, _, _ in rows}
+            for path in self.root.iterdir():
+                if not path.is_file() or path == self.index_file or path.name.startswith(self.index_file.name):
+                    continue
+                if path.name in known or path.stem in referenced or path.stat().st_mtime > cutoff:
+                    continue
+                removed += 1
+                freed += path.stat().st_size
+                if not dry_run:
+                    path.unlink()
+
+            for path in self.temp_dir.iterdir():
+                if path.stat().st_mtime <= cutoff and not dry_run:
+                    path.unlink()
+
+            if not dry_run:
+                self._conn.commit()
+        return {'removed': removed, 'freed_bytes': freed, 'referenced': len(referenced), 'dry_run': dry_run}
+
+    def list_hashes(self) -> List[str]:
+        """存储中所有blob的SHA-256"""
+        with self._lock:
+            return [row[0] for row in self._conn.execute('SELECT sha256 FROM blobs')]
+
+    def get_stats(self) -> Dict:
+        """获取存储统计"""
+        with self._lock:
+            blobs, total = self._conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs').fetchone()
+            urls = self._conn.execute('SELECT COUNT(*) FROM urls').fetchone()[0]
+        return {
+            'blobs': blobs,
+            'total_bytes': total,
+            'urls': urls,
+            'url_hits': self.url_hits,
+            'deduplicated': self.deduplicated,
+            'stored': self.stored
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,427 @@
+"""
+后台爬取任务
+更新请求只创建任务记录并立即返回任务ID，爬取和入库在后台线程中依次执行，
+任务状态、当前步骤、各阶段耗时和错误写入 crawl_jobs 表，可通过任务ID查询。
+多个Web worker进程之间：
+  进度写入共享的进度存储（data/crawl_progress.sqlite3），任何worker都能查询到最新进度；
+  用文件锁（data/crawl.lock）保证同一时间只有一个爬取任务，执行期间的更新请求合并到正在执行的任务上
+爬虫每获取完一个仓库就通过进度回调更新进度存储，/jobs/{id}/events 以Server-Sent Events推送给前端
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from app.models import CrawlJob, WeeklyReport, Repository
+from app.services.progress_store import ProgressStore
+from app.services.single_flight import SingleFlightLock
+import python_crawler
+
+# 进度的总步数：爬取占前8步，入库占最后2步
+TOTAL_STEPS = 10
+CRAWL_STEPS = 8
+
+DEFAULT_PARAMS = {"limit": 10, "since": "daily"}
+
+# 进度存储中当前（或最近一次）爬取任务的键
+PROGRESS_KEY = "crawl"
+# 没拿到锁时，等待持有者写入任务ID的最长时间（秒）
+HOLDER_WAIT_SECONDS = 5
+
+# 进度事件流检查进度存储的间隔、没有新进度时发送保活注释的间隔（秒）
+EVENT_POLL_INTERVAL = 0.2
+EVENT_KEEPALIVE_SECONDS = 15
+# 进度中保留的最近错误条数
+MAX_PROGRESS_ERRORS = 20
+
+# 爬虫进度阶段 -> 任务的当前步骤
+CRAWL_STAGE_STEPS = {
+    "search": "搜索趋势项目",
+    "enrich": "获取仓库详细信息",
+    "images": "爬取项目图片",
+    "report": "生成报告",
+    "save": "保存报告文件"
+}
+
+# 同一进程内的任务排队依次执行，不占用处理HTTP请求的线程
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="crawl-job")
+_progress_stores: Dict[str, ProgressStore] = {}
+
+
+def get_progress_store() -> ProgressStore:
+    """返回进程内共享的进度存储"""
+    path = python_crawler.DATA_DIR / "crawl_progress.sqlite3"
+    store = _progress_stores.get(str(path))
+    if store is None:
+        store = _progress_stores[str(path)] = ProgressStore(path)
+    return store
+
+
+def create_lock() -> SingleFlightLock:
+    return SingleFlightLock(python_crawler.DATA_DIR / "crawl.lock")
+
+
+def serialize_job(job: CrawlJob) -> Dict:
+    """任务记录转换为接口返回的字典"""
+    return {
+        "id": job.id,
+        "status": job.status,
+        "current_step": job.current_step,
+        "message": job.message,
+        "total": job.total,
+        "completed": job.completed,
+        "params": job.params,
+        "timings": job.timings,
+        "error": job.error,
+        "run_id": job.run_id,
+        "weekly_report_id": job.weekly_report_id,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None
+    }
+
+
+def get_job_status(db: Session, job_id: int) -> Optional[Dict]:
+    """查询任务；执行中的任务返回进度存储中的最新进度（入库期间的进度不会写入任务表）"""
+    job = db.get(CrawlJob, job_id)
+    if job is None:
+        return None
+    if job.status in ("queued", "running"):
+        live = get_progress_store().get(PROGRESS_KEY)
+        if live and live.get("id") == job.id:
+            return live
+    return serialize_job(job)
+
+
+def get_current_progress() -> Dict:
+    """当前（或最近一次）爬取任务的进度"""
+    return get_progress_store().get(PROGRESS_KEY) or {
+        "total": 0,
+        "completed": 0,
+        "current_step": "",
+        "status": "idle",
+        "message": ""
+    }
+
+
+def fail_interrupted_jobs(db: Session) -> None:
+    """持有锁时调用：仍处于排队或执行状态的任务所在的进程已经退出，标记为失败"""
+    interrupted = db.query(CrawlJob).filter(CrawlJob.status.in_(("queued", "running"))).all()
+    for job in interrupted:
+        job.status = "failed"
+        job.current_step = "爬取失败"
+        job.error = job.message = "执行任务的进程已退出，任务中断"
+        job.finished_at = datetime.now()
+    if interrupted:
+        db.commit()
+
+
+def find_running_job(db: Session, lock: SingleFlightLock) -> Optional[CrawlJob]:
+    """锁被其他请求持有时，找到正在执行的任务（持有者加锁后才写入任务ID，短暂等待）"""
+    deadline = time.monotonic() + HOLDER_WAIT_SECONDS
+    while True:
+        holder = lock.read_holder()
+        if holder and holder.get("job_id"):
+            job = db.get(CrawlJob, holder["job_id"])
+            if job is not None:
+                return job
+        job = db.query(CrawlJob).filter(CrawlJob.status.in_(("queued", "running"))) \
+            .order_by(CrawlJob.id.desc()).first()
+        if job is not None or time.monotonic() >= deadline:
+            return job
+        time.sleep(0.1)
+        db.expire_all()
+
+
+def submit_job(db: Session, params: Dict = None) -> Tuple[Optional[CrawlJob], bool]:
+    """创建爬取任务并提交到后台执行
+    
+    已有任务在执行时（无论在哪个worker进程中）不再创建新任务，返回 (正在执行的任务, False)；
+    否则返回 (新任务, True)。锁被持有但找不到对应任务时返回 (None, False)
+    """
+    lock = create_lock()
+    if not lock.try_acquire():
+        return find_running_job(db, lock), False
+    
+    try:
+        fail_interrupted_jobs(db)
+        job = CrawlJob(
+            status="queued",
+            current_step="排队中",
+            message="任务已创建，等待执行...",
+            total=TOTAL_STEPS,
+            completed=0,
+            params={**DEFAULT_PARAMS, **(params or {})},
+            timings={}
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        lock.write_holder({"job_id": job.id, "pid": os.getpid()})
+        get_progress_store().set(PROGRESS_KEY, serialize_job(job))
+        # 锁交给执行任务的线程，任务结束时释放
+        _executor.submit(run_job, job.id, lock)
+    except BaseException:
+        lock.release()
+        raise
+    return job, True
+
+
+class JobReporter:
+    """更新任务记录并写入共享的进度存储
+    
+    入库期间任务记录与报告数据不在同一个事务中提交（SQLite同时只允许一个写事务），
+    此时只更新进度存储，步骤结束时再写入任务表。
+    爬取期间的仓库进度（crawl_progress）只写入进度存储，可能在爬虫的线程中调用，不访问数据库会话
+    """
+    
+    def __init__(self, db: Session, job: CrawlJob):
+        self.db = db
+        self.job = job
+        self.store = get_progress_store()
+        self._lock = threading.Lock()
+        self._snapshot = serialize_job(job)
+        # 任务表之外的实时进度：阶段、仓库数、预计剩余时间和最近的错误
+        self._live = {"stage": None, "repos_completed": 0, "repos_total": None, "eta_seconds": None,
+                      "error_count": 0, "errors": []}
+        self._enrich_started: Optional[float] = None
+    
+    def _publish(self) -> None:
+        self.store.set(PROGRESS_KEY, {**self._snapshot, **self._live})
+    
+    def update(self, commit: bool = True, **fields) -> None:
+        for name, value in fields.items():
+            setattr(self.job, name, value)
+        if commit:
+            self.db.commit()
+        with self._lock:
+            self._snapshot = serialize_job(self.job)
+            self._live["eta_seconds"] = None
+            self._publish()
+    
+    def crawl_progress(self, stage: str, message: str, completed: int = None, total: int = None,
+                       error: str = None) -> None:
+        """爬虫的进度回调：仓库进度换算到爬取占用的前几步，按已完成仓库的平均耗时估算剩余时间"""
+        with self._lock:
+            live = self._live
+            live["stage"] = stage
+            if error is not None:
+                live["error_count"] += 1
+                live["errors"] = (live["errors"] + [message + ": " + error])[-MAX_PROGRESS_ERRORS:]
+                self._publish()
+                return
+            if total:
+                live["repos_total"] = total
+            if completed is not None:
+                if completed == 0 or self._enrich_started is None:
+                    self._enrich_started = time.perf_counter()
+                live["repos_completed"] = completed
+            done, total = live["repos_completed"], live["repos_total"]
+            if stage == "enrich" and done and total:
+                elapsed = time.perf_counter() - self._enrich_started
+                live["eta_seconds"] = round(elapsed / done * max(0, total - done), 1)
+                progress = f"{message} ({done}/{total})"
+                # 最后一步留给生成和保存报告
+                self._snapshot["completed"] = min(CRAWL_STEPS - 1, int(done * (CRAWL_STEPS - 1) / total))
+            else:
+                live["eta_seconds"] = None
+                progress = message
+            self._snapshot["current_step"] = CRAWL_STAGE_STEPS.get(stage, self._snapshot["current_step"])
+            self._snapshot["message"] = progress
+            self._publish()
+
+
+def run_job(job_id: int, lock: SingleFlightLock = None) -> None:
+    """执行爬取和入库，结果和错误记录到任务中，结束后释放单飞锁"""
+    status_db = SessionLocal()
+    db = SessionLocal()
+    try:
+        job = status_db.get(CrawlJob, job_id)
+        reporter = JobReporter(status_db, job)
+        timings = {}
+        reporter.update(status="running", started_at=datetime.now(), current_step="执行爬虫",
+                        message="正在爬取GitHub趋势数据...")
+        try:
+            started = time.perf_counter()
+            result = python_crawler.crawl(**job.params, progress=reporter.crawl_progress)
+            timings.update(result.get("timings") or {})
+            timings["crawl"] = round(time.perf_counter() - started, 3)
+            if not result["success"]:
+                raise RuntimeError(f"爬虫执行失败: {result['error']}")
+            reporter.update(run_id=result["run_id"], timings=dict(timings), completed=CRAWL_STEPS,
+                            current_step="保存数据到数据库", message="正在将数据保存到数据库...")
+            
+            started = time.perf_counter()
+            weekly_report = save_daily_report(db, result["report"], datetime.now(), reporter)
+            timings["ingest"] = round(time.perf_counter() - started, 3)
+            
+            reporter.update(status="completed", completed=TOTAL_STEPS, current_step="爬取完成",
+                            message=f"{weekly_report.week_start}的数据爬取完成！", timings=timings,
+                            weekly_report_id=weekly_report.id, finished_at=datetime.now())
+            print(f"{weekly_report.week_start}的数据爬取完成！")
+        except Exception as e:
+            db.rollback()
+            traceback.print_exc()
+            reporter.update(status="failed", current_step="爬取失败", message=str(e), error=str(e),
+                            timings=timings, finished_at=datetime.now())
+    finally:
+        db.close()
+        status_db.close()
+        if lock is not None:
+            lock.release()
+
+
+def format_event(event: str, data: Dict, event_id: str = None) -> str:
+    """Server-Sent Events格式的一条消息"""
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append("data: " + json.dumps(data, ensure_ascii=False, default=str))
+    return "\n".join(lines) + "\n\n"
+
+
+async def stream_job_events(job_id: int, is_disconnected: Callable[[], Awaitable[bool]]) -> AsyncIterator[str]:
+    """推送任务进度：进度存储有更新时推送一条progress事件，任务结束后推送最终状态并结束
+    
+    进度存储在worker进程之间共享，连接到任何一个worker都能收到正在执行的任务的进度
+    """
+    store = get_progress_store()
+    last_updated = None
+    last_sent = time.monotonic()
+    while not await is_disconnected():
+        live = await asyncio.to_thread(store.get, PROGRESS_KEY)
+        if live is None or live.get("id") != job_id:
+            # 进度存储中已经是其他任务，从任务表读取该任务的最终状态
+            db = SessionLocal()
+            try:
+                job = db.get(CrawlJob, job_id)
+                final = serialize_job(job) if job is not None else None
+            finally:
+                db.close()
+            if final is not None:
+                yield format_event("progress", final)
+            return
+        if live["updated_at"] != last_updated:
+            last_updated = live["updated_at"]
+            last_sent = time.monotonic()
+            yield format_event("progress", live, event_id=str(last_updated))
+            if live["status"] in ("completed", "failed"):
+                return
+        elif time.monotonic() - last_sent >= EVENT_KEEPALIVE_SECONDS:
+            # 注释行，防止代理因连接空闲而断开
+            last_sent = time.monotonic()
+            yield ": keepalive\n\n"
+        await asyncio.sleep(EVENT_POLL_INTERVAL)
+
+
+def save_daily_report(db: Session, report: Dict, now: datetime, reporter: Optional[JobReporter] = None) -> WeeklyReport:
+    """把爬虫返回的报告保存为当天的报告，已有当天的报告时先删除；所有更改在一个事务中提交"""
+    date_str = now.strftime("%Y-%m-%d")
+    
+    # 检查是否已有今日数据
+    existing_report = db.query(WeeklyReport).filter(
+        WeeklyReport.week_start == date_str
+    ).first()
+    
+    # 如果数据已存在，先删除现有数据
+    if existing_report:
+        print(f"{date_str}的数据已经存在，将删除后重新保存")
+        # 删除与该报告相关的所有仓库数据
+        db.query(Repository).filter(Repository.weekly_report_id == existing_report.id).delete()
+        # 删除报告本身
+        db.delete(existing_report)
+        db.flush()
+    
+    # 强制使用正确的报告标题格式，确保与爬虫生成的报告标题格式一致
+    today = now.strftime('%Y%m%d')
+    report_title = f"GitHub趋势报告{today}"
+    
+    weekly_report = WeeklyReport(
+        year=now.year,
+        week=now.isocalendar()[1],
+        report_title=report_title,
+        week_start=date_str,
+        week_end=date_str,
+        total_repositories=len(report["data"]),
+        generation_date=datetime.fromisoformat(report["generation_date"])
+    )
+    
+    # 保存周报到数据库
+    db.add(weekly_report)
+    db.flush()  # 获取主键ID
+    
+    # 保存每个仓库到数据库
+    total = len(report["data"])
+    for i, repo_data in enumerate(report["data"]):
+        if reporter is not None:
+            reporter.update(commit=False, completed=CRAWL_STEPS + int((i + 1) * (TOTAL_STEPS - CRAWL_STEPS) / total),
+                            message=f"正在保存仓库数据 ({i+1}/{total})...")
+        
+        # 解析仓库数据
+        owner_name = repo_data["owner"]["login"] if "owner" in repo_data and repo_data["owner"] else ""
+        avatar_url = repo_data["owner"]["avatar_url"] if "owner" in repo_data and repo_data["owner"] else ""
+        
+        # 检查仓库是否已存在
+        existing_repo = db.query(Repository).filter(
+            Repository.full_name == repo_data["full_name"]
+        ).first()
+        
+        if existing_repo:
+            # 如果仓库已存在，更新其信息
+            existing_repo.name = repo_data["name"]
+            existing_repo.owner = owner_name
+            existing_repo.avatar_url = avatar_url
+            existing_repo.stars = repo_data["stargazers_count"] if "stargazers_count" in repo_data else 0
+            existing_repo.forks = repo_data["forks_count"] if "forks_count" in repo_data else 0
+            existing_repo.issues = repo_data["open_issues_count"] if "open_issues_count" in repo_data else 0
+            existing_repo.watchers = repo_data["watchers_count"] if "watchers_count" in repo_data else 0
+            existing_repo.description = repo_data["description"]
+            existing_repo.html_url = repo_data["html_url"]
+            existing_repo.language = repo_data["language"]
+            existing_repo.primary_language = repo_data["primary_language"]
+            existing_repo.languages = repo_data["languages"]
+            existing_repo.tech_stack = repo_data["tech_stack"]
+            existing_repo.topics = repo_data["topics"]
+            existing_repo.created_at = datetime.fromisoformat(repo_data["created_at"].replace("Z", "")) if "created_at" in repo_data else None
+            existing_repo.updated_at = datetime.fromisoformat(repo_data["updated_at"].replace("Z", "")) if "updated_at" in repo_data else None
+            existing_repo.pushed_at = datetime.fromisoformat(repo_data["pushed_at"].replace("Z", "")) if "pushed_at" in repo_data else None
+            existing_repo.weekly_report_id = weekly_report.id
+            existing_repo.rank = i + 1
+        else:
+            # 如果仓库不存在，创建新记录
+            repository = Repository(
+                full_name=repo_data["full_name"],
+                name=repo_data["name"],
+                owner=owner_name,
+                avatar_url=avatar_url,
+                stars=repo_data["stargazers_count"] if "stargazers_count" in repo_data else 0,
+                forks=repo_data["forks_count"] if "forks_count" in repo_data else 0,
+                issues=repo_data["open_issues_count"] if "open_issues_count" in repo_data else 0,
+                watchers=repo_data["watchers_count"] if "watchers_count" in repo_data else 0,
+                description=repo_data["description"],
+                html_url=repo_data["html_url"],
+                language=repo_data["language"],
+                primary_language=repo_data["primary_language"],
+                languages=repo_data["languages"],
+                tech_stack=repo_data["tech_stack"],
+                topics=repo_data["topics"],
+                created_at=datetime.fromisoformat(repo_data["created_at"].replace("Z", "")) if "created_at" in repo_data else None,
+                updated_at=datetime.fromisoformat(repo_data["updated_at"].replace("Z", "")) if "updated_at" in repo_data else None,
+                pushed_at=datetime.fromisoformat(repo_data["pushed_at"].replace("Z", "")) if "pushed_at" in repo_data else None,
+                weekly_report_id=weekly_report.id,
+                rank=i + 1
+            )
+            db.add(repository)
+    
+    # 提交所有更改
+    db.commit()
+    return weekly_report
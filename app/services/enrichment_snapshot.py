@@ -0,0 +1,144 @@
+"""
+增量爬取的仓库信息快照
+从最近保存的报告（data/current.json以及TTL内的周报、日报和各语言报告）中读取每个仓库的语言统计、技术栈和获取时间，
+同一仓库出现在多份报告中时使用获取时间最新的一份，范围较小的一次爬取不会让之前获取的信息失效；
+搜索结果中pushed_at未变化且获取时间未超过TTL的仓库直接复用已保存的信息，不再请求详情、README和语言接口。
+复用的仓库没有README内容，爬取图片时同时复用上一次的图片信息；上一次没有爬取图片的仓库需要重新获取
+"""
+
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+# 复用时从快照中取出的字段，其余字段使用本次搜索结果中的最新值（stars、forks等）
+ENRICHED_FIELDS = ('languages', 'primary_language', 'tech_stack', 'enriched_at')
+
+
+def recent_report_files(data_dir: Path, max_age: timedelta) -> List[Path]:
+    """返回data_dir下修改时间在max_age内的报告文件（data/<年份>/*.json）以及current.json
+
+    更早的报告中的仓库获取时间必然超过TTL，无需读取
+    """
+    cutoff = time.time() - max_age.total_seconds()
+    files = []
+    for report_file in sorted(Path(data_dir).glob('[0-9]*/*.json')):
+        try:
+            if report_file.stat().st_mtime >= cutoff:
+                files.append(report_file)
+        except OSError:
+            continue
+    files.append(Path(data_dir) / 'current.json')
+    return files
+
+
+def _parse_time(value) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class EnrichmentSnapshot:
+    """上一次爬取结果中已获取完整信息的仓库（线程安全）"""
+
+    def __init__(self, repos: Dict[str, Dict], ttl: timedelta, images: bool = False):
+        self.repos = repos
+        self.ttl = ttl
+        # 本次运行爬取图片时，复用的仓库必须带有上一次爬取的图片信息
+        self.images = images
+        self._lock = threading.Lock()
+        # 每个仓库只判定并计数一次（GraphQL失败回退REST时会再次查询）
+        self._decided: Dict[str, Optional[Dict]] = {}
+
+        self.hits = 0
+        self.new = 0
+        self.pushed = 0
+        self.expired = 0
+        self.no_images = 0
+
+    @classmethod
+    def load(cls, report_files: Iterable[Path], ttl: timedelta, images: bool = False) -> 'EnrichmentSnapshot':
+        """从报告文件加载快照，同名仓库保留enriched_at最新的一份（相同时后面的文件优先）；
+        没有enriched_at的仓库不会被复用
+        """
+        repos = {}
+        for report_file in report_files:
+            report_file = Path(report_file)
+            if not report_file.exists():
+                continue
+            try:
+                with open(report_file, 'r', encoding='utf-8') as f:
+                    report = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f'读取快照 {report_file} 失败: {e}')
+                continue
+            if not isinstance(report, dict):
+                continue
+            for repo in report.get('data', []):
+                if not repo.get('full_name') or not repo.get('enriched_at'):
+                    continue
+                stored = repos.get(repo['full_name'])
+                if stored is not None:
+                    stored_at, enriched_at = _parse_time(stored['enriched_at']), _parse_time(repo['enriched_at'])
+                    if stored_at is not None and (enriched_at is None or enriched_at < stored_at):
+                        continue
+                repos[repo['full_name']] = repo
+        print(f'已加载增量快照，共 {len(repos)} 个仓库')
+        return cls(repos, ttl, images)
+
+    def lookup(self, repo: Dict) -> Optional[Dict]:
+        """返回可复用的完整信息，需要重新获取时返回None
+
+        repo为搜索结果；pushed_at变化或获取时间超过TTL时视为未命中
+        """
+        full_name = repo['full_name']
+        with self._lock:
+            if full_name not in self._decided:
+                self._decided[full_name] = self._decide(repo)
+            return self._decided[full_name]
+
+    def _decide(self, repo: Dict) -> Optional[Dict]:
+        """判定是否命中并计数（需持有锁）"""
+        stored = self.repos.get(repo['full_name'])
+        if stored is None:
+            self.new += 1
+            return None
+        if stored.get('pushed_at') != repo.get('pushed_at'):
+            self.pushed += 1
+            return None
+        enriched_at = _parse_time(stored['enriched_at'])
+        if enriched_at is None or datetime.now() - enriched_at > self.ttl:
+            self.expired += 1
+            return None
+        image_info = stored.get('image_info')
+        if self.images and (not image_info or image_info.get('image_dir') is None):
+            # 上一次没有爬取图片，需要README才能提取图片
+            self.no_images += 1
+            return None
+        self.hits += 1
+
+        reused = {
+            **repo,
+            'readme_content': '',
+            **{field: stored[field] for field in ENRICHED_FIELDS if field in stored}
+        }
+        if self.images:
+            reused['image_info'] = image_info
+        return reused
+
+    def get_stats(self) -> Dict:
+        """获取命中统计"""
+        with self._lock:
+            misses = self.new + self.pushed + self.expired + self.no_images
+            return {
+                'hits': self.hits,
+                'misses': misses,
+                'new': self.new,
+                'pushed': self.pushed,
+                'expired': self.expired,
+                'no_images': self.no_images,
+                'hit_rate': round(self.hits / (self.hits + misses), 3) if self.hits + misses else 0.0
+            }
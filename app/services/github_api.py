@@ -1,17 +1,28 @@
 import os
-import requests
 import logging
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
+from app.services.http_pool import get_shared_pool, raise_for_status
+from app.services.rate_limiter import RateLimitScheduler
+from app.services.retry import RetryPolicy
 
 # 加载环境变量
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# 进程内共享的速率限制调度器和重试策略，多次创建客户端时额度和熔断状态不会丢失
+_scheduler = RateLimitScheduler()
+_retry_policy = RetryPolicy()
+
 class GitHubAPI:
-    def __init__(self):
+    def __init__(self, pool=None, scheduler=None, retry_policy=None):
         self.base_url = "https://api.github.com"
+        # 使用共享连接池，复用TCP+TLS连接
+        self.pool = pool or get_shared_pool()
+        # 与爬虫一样，所有请求经过速率限制调度器和重试/熔断
+        self.scheduler = scheduler or _scheduler
+        self.retry_policy = retry_policy or _retry_policy
         self.token = os.getenv("GITHUB_TOKEN")
         self.headers = {
             "Accept": "application/vnd.github.v3+json",
@@ -24,8 +35,12 @@ class GitHubAPI:
     def _request(self, endpoint, params=None):
         """发送请求到GitHub API"""
         url = f"{self.base_url}{endpoint}"
-        response = requests.get(url, headers=self.headers, params=params, timeout=30)
-        response.raise_for_status()
+        resource = self.scheduler.resource_for(endpoint)
+        response = self.retry_policy.call("GET", endpoint, lambda: self.scheduler.execute(
+            resource,
+            lambda: self.pool.get(url, headers=self.headers, params=params, timeout=30)
+        ))
+        raise_for_status(response)
         return response.json()
     
     def get_trending_repos(self, since="weekly", language="", limit=10):
@@ -0,0 +1,136 @@
+"""
+GitHub GraphQL批量查询
+用一次带别名的查询获取多个仓库的元数据、语言字节数、topics和README文本，
+并把结果转换为与REST接口 /repos/{owner}/{repo} 相同的字段结构
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+TOPICS_PER_REPO = 20
+LANGUAGES_PER_REPO = 20
+
+# README候选路径（GraphQL无法像REST /readme 那样自动识别文件名）
+README_EXPRESSIONS = {
+    'readmeMd': 'HEAD:README.md',
+    'readmeLowerMd': 'HEAD:readme.md',
+    'readmeRst': 'HEAD:README.rst',
+    'readmePlain': 'HEAD:README'
+}
+
+REPO_FRAGMENT = '''
+fragment RepoFields on Repository {
+  databaseId
+  name
+  nameWithOwner
+  url
+  description
+  homepageUrl
+  createdAt
+  updatedAt
+  pushedAt
+  stargazerCount
+  forkCount
+  owner { login avatarUrl url }
+  primaryLanguage { name }
+  defaultBranchRef { name }
+  issues(states: OPEN) { totalCount }
+  pullRequests(states: OPEN) { totalCount }
+  repositoryTopics(first: %(topics)d) { nodes { topic { name } } }
+  languages(first: %(languages)d, orderBy: {field: SIZE, direction: DESC}) { edges { size node { name } } }
+%(readmes)s
+}
+''' % {
+    'topics': TOPICS_PER_REPO,
+    'languages': LANGUAGES_PER_REPO,
+    'readmes': '\n'.join(
+        f'  {alias}: object(expression: "{expression}") {{ ... on Blob {{ text }} }}'
+        for alias, expression in README_EXPRESSIONS.items()
+    )
+}
+
+
+def estimate_repo_cost() -> int:
+    """估算单个仓库在查询中需要的节点数
+
+    仓库本身1个节点，加上topics、语言两个分页连接以及README候选对象
+    """
+    return 1 + TOPICS_PER_REPO + LANGUAGES_PER_REPO + len(README_EXPRESSIONS)
+
+
+def chunk_by_cost(repos: List[Dict], max_nodes: int) -> List[List[Dict]]:
+    """按查询开销把仓库列表切分为多个批次，每批估算节点数不超过max_nodes"""
+    per_repo = estimate_repo_cost()
+    batch_size = max(1, max_nodes // per_repo)
+    return [repos[i:i + batch_size] for i in range(0, len(repos), batch_size)]
+
+
+def build_batch_query(repos: List[Dict]) -> Tuple[str, Dict]:
+    """构造带别名的批量查询，仓库名通过变量传入"""
+    variable_defs = []
+    selections = []
+    variables = {}
+    for i, repo in enumerate(repos):
+        variable_defs.append(f'$owner{i}: String!, $name{i}: String!')
+        selections.append(f'  r{i}: repository(owner: $owner{i}, name: $name{i}) {{ ...RepoFields }}')
+        variables[f'owner{i}'] = repo['owner']['login']
+        variables[f'name{i}'] = repo['name']
+
+    query = (
+        f'query({", ".join(variable_defs)}) {{\n'
+        '  rateLimit { cost remaining resetAt }\n'
+        + '\n'.join(selections)
+        + '\n}\n'
+        + REPO_FRAGMENT
+    )
+    return query, variables
+
+
+def extract_readme(node: Dict) -> Optional[str]:
+    """从候选README对象中取第一个存在的文本，全部不存在时返回None"""
+    for alias in README_EXPRESSIONS:
+        blob = node.get(alias)
+        if blob and blob.get('text') is not None:
+            return blob['text']
+    return None
+
+
+def map_repository(node: Dict) -> Tuple[Dict, Dict, Optional[str]]:
+    """把GraphQL仓库节点转换为(REST格式的仓库详情, 语言统计, README文本)"""
+    owner = node.get('owner') or {}
+    primary_language = node.get('primaryLanguage') or {}
+    default_branch = node.get('defaultBranchRef') or {}
+    open_issues = (node.get('issues') or {}).get('totalCount', 0)
+    open_pulls = (node.get('pullRequests') or {}).get('totalCount', 0)
+
+    details = {
+        'id': node.get('databaseId'),
+        'name': node.get('name'),
+        'full_name': node.get('nameWithOwner'),
+        'html_url': node.get('url'),
+        'description': node.get('description'),
+        'homepage': node.get('homepageUrl'),
+        'created_at': node.get('createdAt'),
+        'updated_at': node.get('updatedAt'),
+        'pushed_at': node.get('pushedAt'),
+        'stargazers_count': node.get('stargazerCount', 0),
+        # REST接口中watchers_count与stargazers_count相同
+        'watchers_count': node.get('stargazerCount', 0),
+        'forks_count': node.get('forkCount', 0),
+        # REST接口的open_issues_count包含打开的PR
+        'open_issues_count': open_issues + open_pulls,
+        'language': primary_language.get('name'),
+        'topics': [n['topic']['name'] for n in (node.get('repositoryTopics') or {}).get('nodes', [])],
+        'default_branch': default_branch.get('name'),
+        'owner': {
+            'login': owner.get('login'),
+            'avatar_url': owner.get('avatarUrl'),
+            'html_url': owner.get('url')
+        }
+    }
+
+    languages = {
+        edge['node']['name']: edge['size']
+        for edge in (node.get('languages') or {}).get('edges', [])
+    }
+
+    return details, languages, extract_readme(node)
@@ -0,0 +1,326 @@
+"""
+共享HTTP连接池
+为爬虫的GitHub API客户端提供长连接复用、可配置的连接池大小以及可选的HTTP/2支持，
+并统计请求数、新建连接数、连接复用次数和请求延迟分位数，便于确认握手开销是否被消除
+"""
+
+import math
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+try:
+    import httpx
+except ImportError:  # httpx为可选依赖，仅在启用HTTP/2时需要
+    httpx = None
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT = 30
+# 保留的延迟样本数上限，超过后丢弃较早的一半样本
+MAX_LATENCY_SAMPLES = 100000
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    """读取布尔型环境变量"""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """最近秩法计算分位数，sorted_values需已排序"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, math.ceil(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class PoolStats:
+    """连接池统计信息（线程安全）
+
+    计数在进程内累计，共享连接池被多次爬取使用时，用mark()记录起点，snapshot(since)只统计此后的部分
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+        self.latencies: List[float] = []
+        # 已丢弃的延迟样本数，样本的绝对序号 = 列表下标 + 该值
+        self._dropped_latencies = 0
+
+    def record_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def record_latency(self, seconds: float) -> None:
+        """记录收到响应头所用的时间"""
+        with self._lock:
+            if len(self.latencies) >= MAX_LATENCY_SAMPLES:
+                half = len(self.latencies) // 2
+                del self.latencies[:half]
+                self._dropped_latencies += half
+            self.latencies.append(seconds)
+
+    def record_connection(self) -> None:
+        with self._lock:
+            self.connections += 1
+
+    @property
+    def reused(self) -> int:
+        """复用已有连接完成的请求数"""
+        return max(0, self.requests - self.connections)
+
+    def mark(self) -> Dict:
+        """记录当前计数，作为snapshot(since)的起点"""
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'connections': self.connections,
+                'latencies': self._dropped_latencies + len(self.latencies)
+            }
+
+    def snapshot(self, since: Dict = None) -> Dict:
+        """统计信息；指定since（mark()的返回值）时只统计此后的请求"""
+        since = since or {'requests': 0, 'connections': 0, 'latencies': 0}
+        with self._lock:
+            requests_count = self.requests - since['requests']
+            connections = self.connections - since['connections']
+            latencies = sorted(self.latencies[max(0, since['latencies'] - self._dropped_latencies):])
+        return {
+            'requests': requests_count,
+            'connections': connections,
+            'reused': max(0, requests_count - connections),
+            'reuse_rate': round((requests_count - connections) / requests_count, 3) if requests_count else 0.0,
+            'latency_ms': {
+                f'p{p}': round(percentile(latencies, p) * 1000, 2) for p in (50, 95, 99)
+            }
+        }
+
+
+class CountingHTTPAdapter(HTTPAdapter):
+    """统计新建连接数的HTTPAdapter"""
+
+    def __init__(self, stats: PoolStats, **kwargs):
+        # init_poolmanager在父类构造函数中被调用，需要先设置stats
+        self.stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        stats = self.stats
+
+        class CountingHTTPConnectionPool(HTTPConnectionPool):
+            def _new_conn(self):
+                stats.record_connection()
+                return super()._new_conn()
+
+        class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+            def _new_conn(self):
+                stats.record_connection()
+                return super()._new_conn()
+
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': CountingHTTPConnectionPool,
+            'https': CountingHTTPSConnectionPool
+        }
+
+
+class HTTPSessionPool:
+    """可复用连接的HTTP会话
+
+    默认基于requests.Session + urllib3连接池；启用HTTP/2且安装了httpx[http2]时使用httpx.Client。
+    两种后端的错误均统一为requests的异常类型，调用方无需区分
+    """
+
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE, keep_alive: bool = True,
+                 http2: bool = False, timeout: int = DEFAULT_TIMEOUT):
+        self.pool_size = pool_size
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        self.stats = PoolStats()
+        self.http2 = False
+        self.client = None
+        self.session = None
+        # 扩容前的适配器和HTTP/2客户端，可能仍有请求在使用，关闭连接池时一起关闭
+        self._retired_adapters = []
+        self._retired_clients = []
+        self._resize_lock = threading.Lock()
+
+        if http2:
+            self.client = self._create_http2_client()
+            self.http2 = self.client is not None
+
+        if not self.http2:
+            self.session = requests.Session()
+            adapter = self._create_adapter()
+            self.session.mount('https://', adapter)
+            self.session.mount('http://', adapter)
+
+    def _create_adapter(self) -> 'CountingHTTPAdapter':
+        return CountingHTTPAdapter(
+            self.stats,
+            pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size,
+            pool_block=True  # 连接数达到上限时等待空闲连接，而不是新建一次性连接
+        )
+
+    def resize(self, pool_size: int) -> None:
+        """扩大连接池，其他使用者持有的连接池对象和统计信息保持不变
+
+        新请求使用新的连接池；已在旧连接池上发出的请求不受影响，旧连接池在close()时关闭
+        """
+        with self._resize_lock:
+            if pool_size <= self.pool_size:
+                return
+            self.pool_size = pool_size
+            if self.http2:
+                self._retired_clients.append(self.client)
+                self.client = self._create_http2_client()
+                return
+            self._retired_adapters.append(self.session.adapters['https://'])
+            adapter = self._create_adapter()
+            # 直接替换已有前缀的适配器，不改变字典大小，其他线程遍历适配器时不会出错
+            self.session.adapters['https://'] = adapter
+            self.session.adapters['http://'] = adapter
+
+    def _create_http2_client(self):
+        """创建HTTP/2客户端，依赖不可用时返回None"""
+        if httpx is None:
+            print('未安装httpx，HTTP/2不可用，使用HTTP/1.1连接池')
+            return None
+        try:
+            return httpx.Client(
+                http2=True,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.pool_size if self.keep_alive else 0
+                )
+            )
+        except ImportError:
+            print('未安装h2，HTTP/2不可用，使用HTTP/1.1连接池')
+            return None
+
+    def _trace(self, event_name: str, info: Dict) -> None:
+        """httpx连接事件回调，用于统计新建连接"""
+        if event_name == 'connection.connect_tcp.complete':
+            self.stats.record_connection()
+
+    def request(self, method: str, url: str, headers: Dict = None, params: Dict = None,
+                json: Dict = None, timeout: int = None, stream: bool = False):
+        """发送请求，返回requests.Response或httpx.Response"""
+        headers = dict(headers or {})
+        if not self.keep_alive:
+            headers['Connection'] = 'close'
+        timeout = timeout or self.timeout
+        self.stats.record_request()
+        started = time.perf_counter()
+
+        if not self.http2:
+            response = self.session.request(method, url, headers=headers, params=params,
+                                            json=json, timeout=timeout, stream=stream)
+            self.stats.record_latency(time.perf_counter() - started)
+            return response
+
+        try:
+            request = self.client.build_request(method, url, headers=headers, params=params, json=json,
+                                                timeout=timeout, extensions={'trace': self._trace})
+            response = self.client.send(request, stream=stream)
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e))
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(str(e))
+        self.stats.record_latency(time.perf_counter() - started)
+        return response
+
+    def get(self, url: str, headers: Dict = None, params: Dict = None, timeout: int = None,
+            stream: bool = False):
+        """发送GET请求"""
+        return self.request('GET', url, headers=headers, params=params, timeout=timeout, stream=stream)
+
+    def post(self, url: str, headers: Dict = None, json: Dict = None, timeout: int = None):
+        """发送POST请求"""
+        return self.request('POST', url, headers=headers, json=json, timeout=timeout)
+
+    def get_stats(self, since: Dict = None) -> Dict:
+        """获取连接池统计信息，since为stats.mark()的返回值时只统计此后的请求"""
+        return {
+            **self.stats.snapshot(since),
+            'pool_size': self.pool_size,
+            'keep_alive': self.keep_alive,
+            'http2': self.http2
+        }
+
+    def close(self) -> None:
+        """关闭所有连接"""
+        if self.session is not None:
+            self.session.close()
+        if self.client is not None:
+            self.client.close()
+        for adapter in self._retired_adapters:
+            adapter.close()
+        for client in self._retired_clients:
+            client.close()
+
+
+def raise_for_status(response) -> None:
+    """检查响应状态码，requests与httpx的响应均抛出requests.exceptions.HTTPError"""
+    if response.status_code >= 400:
+        reason = getattr(response, 'reason', None) or getattr(response, 'reason_phrase', '')
+        raise requests.exceptions.HTTPError(
+            f'{response.status_code} Error: {reason} for url: {response.url}',
+            response=response
+        )
+
+
+def read_capped(response, max_bytes: int, chunk_size: int = 16 * 1024) -> Tuple[bytes, bool]:
+    """流式读取响应体，最多读取max_bytes字节后关闭响应
+
+    返回 (读取到的字节, 是否被截断)；用于stream=True发送的请求，内存占用不超过max_bytes
+    """
+    body = bytearray()
+    truncated = False
+    try:
+        chunks = response.iter_bytes(chunk_size) if hasattr(response, 'iter_bytes') \
+            else response.iter_content(chunk_size)
+        for chunk in chunks:
+            body.extend(chunk[:max_bytes - len(body)])
+            if len(body) >= max_bytes:
+                truncated = True
+                break
+    finally:
+        response.close()
+    return bytes(body), truncated
+
+
+_shared_pool: Optional[HTTPSessionPool] = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_shared_pool(pool_size: int = None) -> HTTPSessionPool:
+    """获取进程内共享的连接池
+
+    首次调用时根据环境变量HTTP_POOL_SIZE、HTTP_KEEP_ALIVE、HTTP2_ENABLED创建；
+    之后如果请求的pool_size大于当前连接池，则原地扩容（其他使用者仍在使用同一个连接池）
+    """
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is not None:
+            if pool_size is not None:
+                _shared_pool.resize(pool_size)
+            return _shared_pool
+
+        size = pool_size or int(os.environ.get('HTTP_POOL_SIZE', DEFAULT_POOL_SIZE))
+        _shared_pool = HTTPSessionPool(
+            pool_size=size,
+            keep_alive=_env_flag('HTTP_KEEP_ALIVE', True),
+            http2=_env_flag('HTTP2_ENABLED', False)
+        )
+        return _shared_pool
@@ -0,0 +1,286 @@
+"""
+异步图片下载流水线
+所有图片下载共用一个aiohttp会话（连接复用），由全局信号量限制同时下载的数量，
+并按主机使用令牌桶限速（raw.githubusercontent.com、user-attachments、shields等），
+响应体边下载边写入磁盘，按魔数识别格式并读取尺寸，不是图片、像追踪像素或徽章、超过大小上限时立即中止；
+probe() 只读取头部即可得到候选图片的尺寸。
+配置了BlobStore时按内容寻址保存，已知URL直接复用，同一URL在本次运行中只下载一次
+"""
+
+import asyncio
+import os
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import aiohttp
+
+from app.services.blob_store import BlobStore
+from app.services.image_probe import FORMAT_CONTENT_TYPES, MIN_DIMENSION, ImageRejected, StreamValidator
+
+DEFAULT_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+DEFAULT_MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
+CHUNK_SIZE = 64 * 1024
+PROBE_CHUNK_SIZE = 4 * 1024
+
+# 图片的实际格式以魔数为准；raw.githubusercontent.com 会把SVG等文件作为 text/plain 或 octet-stream 返回
+ACCEPTED_CONTENT_TYPES = ('image/', 'text/plain', 'application/octet-stream', 'binary/octet-stream')
+
+# 每个主机的 (每秒请求数, 突发容量)
+HOST_RATES: Dict[str, Tuple[float, int]] = {
+    'raw.githubusercontent.com': (10.0, 10),
+    'user-attachments': (5.0, 5),
+    'img.shields.io': (2.0, 2),
+    'default': (5.0, 5)
+}
+
+
+def host_key(url: str) -> str:
+    """把图片URL归类到限速桶
+
+    github.com/user-attachments 与 *user-images.githubusercontent.com 都是README附件，共用一个桶
+    """
+    parsed = urlparse(url)
+    host = (parsed.hostname or '').lower()
+    if host == 'github.com' and parsed.path.startswith('/user-attachments/'):
+        return 'user-attachments'
+    if host.endswith('user-images.githubusercontent.com'):
+        return 'user-attachments'
+    return host
+
+
+class ImageDownloadError(Exception):
+    """图片下载失败（状态码、内容类型或大小不符合要求）"""
+
+
+class TokenBucket:
+    """异步令牌桶"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.waited = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """取一个令牌，令牌不足时等待补充"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+                self.waited += wait
+                await asyncio.sleep(wait)
+
+
+class ImagePipeline:
+    """共享会话的图片下载器，需在事件循环中以 async with 使用"""
+
+    def __init__(self, max_concurrency: int = 8, host_rates: Dict[str, Tuple[float, int]] = None,
+                 max_file_size: int = DEFAULT_MAX_FILE_SIZE, timeout: int = 30,
+                 user_agent: str = DEFAULT_USER_AGENT, store: BlobStore = None,
+                 min_dimension: int = MIN_DIMENSION):
+        self.max_concurrency = max_concurrency
+        self.host_rates = {**HOST_RATES, **(host_rates or {})}
+        self.max_file_size = max_file_size
+        self.timeout = timeout
+        self.user_agent = user_agent
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.semaphore: Optional[asyncio.Semaphore] = None
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.store = store
+        self.min_dimension = min_dimension
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        self.downloads = 0
+        self.failures = 0
+        self.bytes = 0
+        self.reused = 0
+        self.rejected = 0
+        self.probes = 0
+
+    async def __aenter__(self) -> 'ImagePipeline':
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.max_concurrency),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={'User-Agent': self.user_agent}
+        )
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.session.close()
+        self.session = None
+
+    def get_bucket(self, url: str) -> TokenBucket:
+        key = host_key(url)
+        if key not in self.buckets:
+            rate, capacity = self.host_rates.get(key, self.host_rates['default'])
+            self.buckets[key] = TokenBucket(rate, capacity)
+        return self.buckets[key]
+
+    async def probe(self, url: str) -> Dict:
+        """只读取图片头部，返回格式和尺寸（width/height），读出尺寸后立即关闭连接
+
+        已保存过的URL直接使用存储中记录的尺寸；不是图片或尺寸不合适时抛出ImageDownloadError
+        """
+        if self.store is not None:
+            cached = self.store.lookup_url(url)
+            if cached is not None and cached.get('width'):
+                fmt = next((name for name, content_type in FORMAT_CONTENT_TYPES.items()
+                            if content_type == cached['content_type']), None)
+                return {'format': fmt, 'content_type': cached['content_type'],
+                        'width': cached['width'], 'height': cached['height']}
+
+        await self.get_bucket(url).acquire()
+        async with self.semaphore:
+            self.probes += 1
+            async with self.session.get(url) as response:
+                self._check_response(response)
+                validator = StreamValidator(self.max_file_size, self.min_dimension)
+                try:
+                    async for chunk in response.content.iter_chunked(PROBE_CHUNK_SIZE):
+                        validator.feed(chunk)
+                        if validator.info is not None:
+                            break
+                    info = validator.info or validator.finish()
+                except ImageRejected as e:
+                    self.rejected += 1
+                    raise ImageDownloadError(str(e)) from e
+                finally:
+                    # 不再读取剩余的响应体，直接断开连接
+                    response.close()
+        return info
+
+    async def download(self, url: str, target_dir: Path, name_for: Callable[[str], str]) -> Dict:
+        """下载图片并流式写入 target_dir / name_for(content_type)
+
+        先写入临时文件，完整下载后再重命名，中途失败不会留下不完整的文件
+        """
+        await self.get_bucket(url).acquire()
+        async with self.semaphore:
+            try:
+                info = await self._download(url, Path(target_dir), name_for)
+            except Exception:
+                self.failures += 1
+                raise
+        self.downloads += 1
+        self.bytes += info['size']
+        return info
+
+    async def download_blob(self, url: str) -> Dict:
+        """下载图片到内容寻址存储，返回的信息中包含sha256
+
+        已知URL直接返回已保存的blob，本次运行中并发请求同一URL时只下载一次
+        """
+        cached = self.store.lookup_url(url)
+        if cached is not None:
+            self.reused += 1
+            return {**cached, 'cached': True}
+
+        if url in self._inflight:
+            self.reused += 1
+            return {**await asyncio.shield(self._inflight[url]), 'cached': True}
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[url] = future
+        try:
+            await self.get_bucket(url).acquire()
+            async with self.semaphore:
+                info = await self._download_blob(url)
+        except Exception as e:
+            self.failures += 1
+            future.set_exception(e)
+            # 没有其他等待者时避免“异常未被获取”的警告
+            future.exception()
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            del self._inflight[url]
+        self.downloads += 1
+        self.bytes += info['size']
+        future.set_result(info)
+        return {**info, 'cached': False}
+
+    async def _download_blob(self, url: str) -> Dict:
+        async with self.session.get(url) as response:
+            self._check_response(response)
+            validator = StreamValidator(self.max_file_size, self.min_dimension)
+            writer = self.store.open_writer()
+            try:
+                async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                    validator.feed(chunk)
+                    writer.write(chunk)
+                info = validator.finish()
+            except ImageRejected as e:
+                writer.abort()
+                self.rejected += 1
+                raise ImageDownloadError(str(e)) from e
+            except BaseException:
+                writer.abort()
+                raise
+        return writer.commit(info['content_type'], url, info['width'], info['height'])
+
+    def _check_response(self, response) -> None:
+        """检查状态码、内容类型和声明的大小（content-length可能缺失，实际大小在读取时校验）"""
+        if response.status >= 400:
+            raise ImageDownloadError(f'HTTP {response.status}')
+
+        content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type and not content_type.startswith(ACCEPTED_CONTENT_TYPES):
+            raise ImageDownloadError(f'无效的内容类型: {content_type}')
+        if response.content_length and response.content_length > self.max_file_size:
+            raise ImageDownloadError(f'文件过大: {response.content_length} bytes')
+
+    async def _download(self, url: str, target_dir: Path, name_for: Callable[[str], str]) -> Dict:
+        async with self.session.get(url) as response:
+            self._check_response(response)
+            validator = StreamValidator(self.max_file_size, self.min_dimension)
+
+            # 文件名取决于实际格式，先写入临时文件
+            target_dir.mkdir(parents=True, exist_ok=True)
+            temp_path = target_dir / f'.{os.getpid()}-{id(validator)}.part'
+            try:
+                with open(temp_path, 'wb') as f:
+                    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                        validator.feed(chunk)
+                        f.write(chunk)
+                info = validator.finish()
+                file_path = target_dir / name_for(info['content_type'])
+                os.replace(temp_path, file_path)
+            except ImageRejected as e:
+                self.rejected += 1
+                raise ImageDownloadError(str(e)) from e
+            finally:
+                if temp_path.exists():
+                    temp_path.unlink()
+
+        return {
+            'filename': file_path.name,
+            'filepath': str(file_path),
+            'size': validator.size,
+            'content_type': info['content_type'],
+            'width': info['width'],
+            'height': info['height']
+        }
+
+    def get_stats(self) -> Dict:
+        """获取下载统计"""
+        return {
+            'downloads': self.downloads,
+            'failures': self.failures,
+            'bytes': self.bytes,
+            'reused': self.reused,
+            'rejected': self.rejected,
+            'probes': self.probes,
+            'throttled_seconds': {key: round(bucket.waited, 2) for key, bucket in self.buckets.items()}
+        }
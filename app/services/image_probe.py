@@ -0,0 +1,216 @@
+"""
+图片头部探测
+根据前几KB的魔数识别PNG、JPEG、GIF、WebP、AVIF和SVG，并读取像素尺寸，不需要下载完整文件。
+下载时用 StreamValidator 逐块校验：不是图片、尺寸像追踪像素或徽章、累计字节数超过上限时立即中止
+"""
+
+import re
+import struct
+from typing import Dict, Optional, Tuple
+
+# 探测尺寸最多缓存的字节数（JPEG的SOF可能位于较大的EXIF段之后）
+PROBE_MAX_BYTES = 64 * 1024
+
+# 宽或高小于该值视为追踪像素或小图标
+MIN_DIMENSION = 48
+# 高度不超过该值且宽高比很大时视为徽章（shields等）
+BADGE_MAX_HEIGHT = 60
+BADGE_MIN_ASPECT = 2.5
+
+FORMAT_CONTENT_TYPES = {
+    'png': 'image/png',
+    'jpeg': 'image/jpeg',
+    'gif': 'image/gif',
+    'webp': 'image/webp',
+    'avif': 'image/avif',
+    'svg': 'image/svg+xml'
+}
+
+_SVG_TAG = re.compile(rb'<svg\b[^>]*>', re.IGNORECASE | re.DOTALL)
+_SVG_LENGTH = re.compile(rb'\s(width|height)\s*=\s*["\']\s*([0-9.]+)\s*(px)?\s*["\']', re.IGNORECASE)
+_SVG_VIEWBOX = re.compile(rb'\sviewBox\s*=\s*["\']\s*[-0-9.]+[\s,]+[-0-9.]+[\s,]+([0-9.]+)[\s,]+([0-9.]+)', re.IGNORECASE)
+
+
+class ImageRejected(Exception):
+    """内容不是图片，或按尺寸判断不适合作为项目图片"""
+
+
+def sniff_format(head: bytes) -> Optional[str]:
+    """按魔数识别图片格式，无法识别时返回None"""
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'jpeg'
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return 'gif'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    if head[4:8] == b'ftyp' and head[8:12] in (b'avif', b'avis'):
+        return 'avif'
+    text = head[:1024].lstrip(b'\xef\xbb\xbf \t\r\n').lower()
+    if text.startswith(b'<svg') or (text.startswith((b'<?xml', b'<!--', b'<!doctype svg')) and b'<svg' in head.lower()):
+        return 'svg'
+    return None
+
+
+def _jpeg_size(head: bytes) -> Optional[Tuple[int, int]]:
+    """依次跳过JPEG的段，读取SOF段中的尺寸"""
+    offset = 2
+    while offset + 4 <= len(head):
+        if head[offset] != 0xFF:
+            raise ImageRejected('JPEG段结构无效')
+        marker = head[offset + 1]
+        if marker == 0xFF:  # 填充字节
+            offset += 1
+            continue
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:  # 没有长度字段的标记
+            offset += 2
+            continue
+        length = struct.unpack('>H', head[offset + 2:offset + 4])[0]
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            if offset + 9 > len(head):
+                return None
+            height, width = struct.unpack('>HH', head[offset + 5:offset + 9])
+            return width, height
+        offset += 2 + length
+    return None
+
+
+def _webp_size(head: bytes) -> Optional[Tuple[int, int]]:
+    chunk = head[12:16]
+    if chunk == b'VP8X' and len(head) >= 30:
+        width = int.from_bytes(head[24:27], 'little') + 1
+        height = int.from_bytes(head[27:30], 'little') + 1
+        return width, height
+    if chunk == b'VP8 ' and len(head) >= 30:
+        width, height = struct.unpack('<HH', head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b'VP8L' and len(head) >= 25:
+        bits = int.from_bytes(head[21:25], 'little')
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    return None
+
+
+def _avif_size(head: bytes) -> Optional[Tuple[int, int]]:
+    """读取ispe（图像空间范围）属性"""
+    index = head.find(b'ispe')
+    if index < 0 or index + 16 > len(head):
+        return None
+    return struct.unpack('>II', head[index + 8:index + 16])
+
+
+def _svg_size(head: bytes) -> Optional[Tuple[int, int]]:
+    """从根元素的width/height属性（或viewBox）读取尺寸，百分比等相对单位无法确定尺寸"""
+    match = _SVG_TAG.search(head)
+    if match is None:
+        return None
+    tag = match.group(0)
+    lengths = {name.lower(): float(value) for name, value, _ in _SVG_LENGTH.findall(tag)}
+    if b'width' in lengths and b'height' in lengths:
+        return round(lengths[b'width']), round(lengths[b'height'])
+    viewbox = _SVG_VIEWBOX.search(tag)
+    if viewbox:
+        return round(float(viewbox.group(1))), round(float(viewbox.group(2)))
+    return None
+
+
+def read_dimensions(head: bytes, fmt: str) -> Optional[Tuple[int, int]]:
+    """读取像素尺寸，数据不足时返回None"""
+    if fmt == 'png':
+        if len(head) < 24:
+            return None
+        if head[12:16] != b'IHDR':
+            raise ImageRejected('PNG缺少IHDR')
+        return struct.unpack('>II', head[16:24])
+    if fmt == 'gif':
+        return struct.unpack('<HH', head[6:10]) if len(head) >= 10 else None
+    if fmt == 'jpeg':
+        return _jpeg_size(head)
+    if fmt == 'webp':
+        return _webp_size(head)
+    if fmt == 'avif':
+        return _avif_size(head)
+    if fmt == 'svg':
+        return _svg_size(head)
+    return None
+
+
+def probe(head: bytes) -> Optional[Dict]:
+    """识别格式并读取尺寸
+
+    返回 {'format', 'content_type', 'width', 'height'}，数据不足以判断时返回None，不是图片时抛出ImageRejected
+    """
+    if len(head) < 12:
+        return None
+    fmt = sniff_format(head)
+    if fmt is None:
+        raise ImageRejected('内容不是可识别的图片格式')
+    size = read_dimensions(head, fmt)
+    if size is None:
+        return None
+    return {'format': fmt, 'content_type': FORMAT_CONTENT_TYPES[fmt], 'width': size[0], 'height': size[1]}
+
+
+def rejection_reason(width: int, height: int, min_dimension: int = MIN_DIMENSION) -> Optional[str]:
+    """按尺寸判断是否为追踪像素或徽章，适合作为项目图片时返回None"""
+    if height <= BADGE_MAX_HEIGHT and width >= height * BADGE_MIN_ASPECT:
+        return f'疑似徽章 ({width}x{height})'
+    if width < min_dimension or height < min_dimension:
+        return f'尺寸过小 ({width}x{height})'
+    return None
+
+
+def representative_score(width: Optional[int], height: Optional[int]) -> float:
+    """按尺寸给候选的项目图片打分：面积越大越好（超过常见截图尺寸后不再加分），细长的横幅或竖条减半"""
+    if not width or not height:
+        return 0.0
+    area = min(width * height, 1280 * 800)
+    aspect = width / height
+    return area if 0.4 <= aspect <= 3.0 else area / 2
+
+
+class StreamValidator:
+    """逐块校验下载中的图片
+
+    按累计读取的字节数（而不是content-length）判断大小，缓存头部直到读出尺寸，
+    格式无法识别或尺寸不合适时抛出ImageRejected，调用方应立即中止传输
+    """
+
+    def __init__(self, max_bytes: int, min_dimension: int = MIN_DIMENSION):
+        self.max_bytes = max_bytes
+        self.min_dimension = min_dimension
+        self.size = 0
+        self.info: Optional[Dict] = None
+        self._head = bytearray()
+
+    def feed(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise ImageRejected(f'文件超过 {self.max_bytes} bytes，已中止下载')
+        if self.info is None and len(self._head) < PROBE_MAX_BYTES:
+            self._head += chunk
+            self._check(probe(bytes(self._head)))
+
+    def _check(self, info: Optional[Dict]) -> None:
+        if info is None:
+            return
+        reason = rejection_reason(info['width'], info['height'], self.min_dimension)
+        if reason:
+            raise ImageRejected(reason)
+        self.info = info
+        self._head = bytearray()
+
+    def finish(self) -> Dict:
+        """传输结束，返回识别结果；SVG等无法确定尺寸的图片width/height为None"""
+        if self.info is None:
+            head = bytes(self._head)
+            fmt = sniff_format(head)
+            if fmt is None:
+                raise ImageRejected('内容不是可识别的图片格式')
+            size = read_dimensions(head, fmt)
+            if size is not None:
+                self._check({'format': fmt, 'content_type': FORMAT_CONTENT_TYPES[fmt],
+                             'width': size[0], 'height': size[1]})
+            else:
+                self.info = {'format': fmt, 'content_type': FORMAT_CONTENT_TYPES[fmt], 'width': None, 'height': None}
+        return self.info
@@ -0,0 +1,124 @@
+"""
+图片派生版本
+下载完成后在进程池中为每张图片生成固定宽度的缩略图，以及WebP/AVIF格式的版本，
+保存为 images/variants/<sha256>-<variant>.<ext>，供图片接口按Accept协商返回。
+依赖Pillow（可选）：未安装时跳过生成，图片接口直接返回原图
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # Pillow为可选依赖
+    Image = None
+
+# 变体名称 -> 最大宽度（不放大小图）
+VARIANT_WIDTHS = {
+    'thumb': 320,
+    'card': 640,
+    'full': 1280
+}
+
+# 格式 -> (扩展名, 内容类型, 保存参数)
+FORMATS = {
+    'avif': ('.avif', 'image/avif', {'quality': 60}),
+    'webp': ('.webp', 'image/webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('.jpg', 'image/jpeg', {'quality': 85, 'optimize': True, 'progressive': True}),
+    'png': ('.png', 'image/png', {'optimize': True})
+}
+
+# 无法栅格化或需要保留动画的图片不生成变体，直接使用原图
+SKIPPED_CONTENT_TYPES = frozenset({'image/svg+xml'})
+
+
+def pillow_available() -> bool:
+    return Image is not None
+
+
+def supported_formats() -> List[str]:
+    """当前Pillow支持编码的现代格式，按优先级排列"""
+    if Image is None:
+        return []
+    return [fmt for fmt in ('avif', 'webp') if features.check(fmt)]
+
+
+def variant_path(variants_dir: Path, sha256: str, variant: str, fmt: str) -> Path:
+    return Path(variants_dir) / f'{sha256}-{variant}{FORMATS[fmt][0]}'
+
+
+def generate_variants(source: str, sha256: str, variants_dir: str, formats: List[str]) -> List[Dict]:
+    """为一张图片生成全部变体（在子进程中执行），已存在的文件不重复生成"""
+    variants = []
+    with Image.open(source) as image:
+        if getattr(image, 'is_animated', False):
+            return variants
+        image = ImageOps.exif_transpose(image)
+        has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+        # 不支持现代格式的浏览器使用的兜底格式
+        fallback = 'png' if has_alpha else 'jpeg'
+
+        for variant, max_width in VARIANT_WIDTHS.items():
+            if image.width > max_width:
+                height = max(1, round(image.height * max_width / image.width))
+                resized = image.resize((max_width, height), Image.LANCZOS)
+            else:
+                resized = image
+            for fmt in formats + [fallback]:
+                path = variant_path(Path(variants_dir), sha256, variant, fmt)
+                if not path.exists():
+                    temp_path = path.with_name(path.name + '.part')
+                    resized.save(temp_path, format=fmt.upper(), **FORMATS[fmt][2])
+                    temp_path.replace(path)
+                variants.append({
+                    'variant': variant,
+                    'format': fmt,
+                    'width': resized.width,
+                    'height': resized.height,
+                    'filename': path.name,
+                    'size': path.stat().st_size,
+                    'content_type': FORMATS[fmt][1]
+                })
+    return variants
+
+
+class VariantGenerator:
+    """在进程池中批量生成图片变体"""
+
+    def __init__(self, variants_dir: Path, max_workers: int = None):
+        self.variants_dir = Path(variants_dir)
+        self.max_workers = max_workers
+        self.generated = 0
+        self.failures = 0
+
+    def generate(self, images: List[Dict]) -> Dict[str, List[Dict]]:
+        """images为包含sha256、filepath、content_type的图片信息，返回 sha256 -> 变体列表"""
+        if not pillow_available():
+            print('未安装Pillow，跳过缩略图和WebP/AVIF变体生成')
+            return {}
+
+        unique = {}
+        for image in images:
+            if image.get('sha256') and image.get('content_type') not in SKIPPED_CONTENT_TYPES:
+                unique.setdefault(image['sha256'], image['filepath'])
+        if not unique:
+            return {}
+
+        self.variants_dir.mkdir(parents=True, exist_ok=True)
+        formats = supported_formats()
+        results = {}
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                sha256: executor.submit(generate_variants, filepath, sha256, str(self.variants_dir), formats)
+                for sha256, filepath in unique.items()
+            }
+            for sha256, future in futures.items():
+                try:
+                    results[sha256] = future.result()
+                    self.generated += len(results[sha256])
+                except Exception as e:
+                    self.failures += 1
+                    print(f'生成图片变体失败 {sha256}: {e}')
+        return results
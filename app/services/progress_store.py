@@ -0,0 +1,52 @@
+"""
+跨进程共享的爬取进度
+进度保存在独立的SQLite文件中（WAL模式），任何一个Web worker进程写入的进度，其他worker都能读到。
+与业务数据库分开，入库事务进行中也可以随时更新进度
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+
+class ProgressStore:
+    """键值形式的进度存储，值为JSON对象"""
+
+    def __init__(self, db_file: Path):
+        self.db_file = Path(db_file)
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_file), timeout=10, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS progress ('
+            ' key TEXT PRIMARY KEY,'
+            ' value TEXT NOT NULL,'
+            ' updated_at REAL NOT NULL)'
+        )
+        self._conn.commit()
+
+    def set(self, key: str, value: Dict) -> None:
+        data = json.dumps(value, ensure_ascii=False, default=str)
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO progress (key, value, updated_at) VALUES (?, ?, ?)',
+                (key, data, time.time())
+            )
+            self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute('SELECT value, updated_at FROM progress WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        value = json.loads(row[0])
+        value['updated_at'] = row[1]
+        return value
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
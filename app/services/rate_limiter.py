@@ -0,0 +1,227 @@
+"""
+GitHub API速率限制调度器
+所有爬虫HTTP请求都经过调度器：
+- 按资源（core、search、graphql）跟踪 X-RateLimit-Remaining / X-RateLimit-Reset 额度
+- 额度耗尽时精确休眠到重置时间，遇到 Retry-After 时按服务端要求暂停，而不是直接失败
+- 以AIMD方式调整每个资源的并发窗口：成功时加性增大，遇到403/429限流时减半
+- 统计本次运行消耗的额度
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+RESOURCES = ('core', 'search', 'graphql')
+
+# 没有Retry-After和重置时间的二级限流，GitHub建议至少等待一分钟
+SECONDARY_LIMIT_WAIT = 60
+
+
+def _int_header(headers, name: str) -> Optional[int]:
+    value = headers.get(name)
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class ResourceBudget:
+    """单个资源的额度与并发窗口"""
+
+    def __init__(self, name: str, max_concurrency: int):
+        self.name = name
+        self.window = float(max_concurrency)
+        self.in_flight = 0
+        self.limit = None
+        self.remaining = None
+        self.reset_at = None
+        self.paused_until = 0.0
+        self.consecutive_throttles = 0
+
+        # 统计信息
+        self.requests = 0
+        self.throttled = 0
+        self.waited = 0.0
+        # 之前各重置窗口的消耗之和；当前窗口内观测到的最小已用额度（不含该请求）和最大已用额度
+        self._closed_consumed = 0
+        self._window_min_used = None
+        self._window_max_used = None
+
+    @property
+    def consumed(self) -> int:
+        """本次运行消耗的额度：每个重置窗口内 已用额度的最大值 - 最小值（含最小值对应的请求），再求和"""
+        if self._window_max_used is None:
+            return self._closed_consumed
+        return self._closed_consumed + self._window_max_used - self._window_min_used
+
+    def blocked_until(self, now: float, reset_margin: float) -> float:
+        """返回需要等待到的时间点，不需要等待时返回0"""
+        blocked = self.paused_until if self.paused_until > now else 0.0
+        if self.remaining is not None and self.remaining <= 0 and self.reset_at:
+            if self.reset_at + reset_margin > now:
+                blocked = max(blocked, self.reset_at + reset_margin)
+            else:
+                # 已过重置时间，额度未知，等待下一个响应更新
+                self.remaining = None
+        return blocked
+
+    def update_from_headers(self, headers) -> None:
+        """根据响应头更新额度和消耗统计
+        
+        并发请求的响应到达顺序与服务端计数顺序不一致，只有 X-RateLimit-Reset 变化才表示窗口重置；
+        同一窗口内已用额度小于已观测最大值的响应头是过期的，忽略其中的已用和剩余额度
+        """
+        remaining = _int_header(headers, 'X-RateLimit-Remaining')
+        if remaining is None:
+            return
+        limit = _int_header(headers, 'X-RateLimit-Limit') or self.limit
+        reset_at = _int_header(headers, 'X-RateLimit-Reset')
+        if reset_at and self.reset_at and reset_at < self.reset_at:
+            # 上一个窗口中发出、在重置后才到达的响应
+            return
+
+        used = _int_header(headers, 'X-RateLimit-Used')
+        if used is None and limit is not None:
+            used = limit - remaining
+
+        new_window = bool(reset_at) and reset_at != self.reset_at
+        if new_window:
+            self.reset_at = float(reset_at)
+            if self._window_max_used is not None:
+                self._closed_consumed = self.consumed
+            self._window_min_used = self._window_max_used = None
+        if used is not None:
+            # 最先到达的响应不一定是最先计数的请求，取最小值；该请求本身也算作本次运行的消耗
+            if self._window_min_used is None or used - 1 < self._window_min_used:
+                self._window_min_used = used - 1
+            if self._window_max_used is not None and used < self._window_max_used:
+                return
+            self._window_max_used = used
+        self.limit = limit
+        self.remaining = remaining
+
+    def report(self) -> Dict:
+        return {
+            'requests': self.requests,
+            'consumed': self.consumed,
+            'remaining': self.remaining,
+            'limit': self.limit,
+            'reset_at': self.reset_at,
+            'throttled': self.throttled,
+            'waited_seconds': round(self.waited, 2),
+            'concurrency_window': round(self.window, 2)
+        }
+
+
+class RateLimitScheduler:
+    """速率限制感知的请求调度器（线程安全）"""
+
+    def __init__(self, max_concurrency: int = 10, min_concurrency: int = 1,
+                 reset_margin: float = 1.0, max_throttle_retries: int = 5):
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        # GitHub的重置时间精确到秒，多等一点避免在重置前一刻发出请求
+        self.reset_margin = reset_margin
+        self.max_throttle_retries = max_throttle_retries
+        self._cond = threading.Condition()
+        self.budgets = {name: ResourceBudget(name, max_concurrency) for name in RESOURCES}
+
+    @staticmethod
+    def resource_for(endpoint: str) -> str:
+        """根据接口路径判断所属的速率限制资源"""
+        if endpoint.startswith('/search/'):
+            return 'search'
+        if endpoint.startswith('/graphql'):
+            return 'graphql'
+        return 'core'
+
+    @staticmethod
+    def is_throttled(response) -> bool:
+        """判断响应是否为主/二级速率限制"""
+        if response.status_code == 429:
+            return True
+        if response.status_code != 403:
+            return False
+        headers = response.headers
+        if headers.get('Retry-After') is not None or headers.get('X-RateLimit-Remaining') == '0':
+            return True
+        try:
+            return 'rate limit' in response.text.lower()
+        except Exception:
+            return False
+
+    def acquire(self, resource: str) -> None:
+        """获取一个请求名额；额度耗尽或被暂停时休眠到可以发送为止"""
+        budget = self.budgets[resource]
+        with self._cond:
+            while True:
+                now = time.time()
+                blocked_until = budget.blocked_until(now, self.reset_margin)
+                if blocked_until > now:
+                    wait = blocked_until - now
+                    print(f'[{resource}] 速率限制额度不足，等待 {wait:.1f} 秒后继续...')
+                    self._cond.wait(timeout=wait)
+                    budget.waited += time.time() - now
+                    continue
+                if budget.in_flight < max(self.min_concurrency, int(budget.window)):
+                    break
+                self._cond.wait()
+
+            budget.in_flight += 1
+            budget.requests += 1
+            if budget.remaining is not None:
+                # 预先扣减额度，避免并发请求超出剩余额度
+                budget.remaining -= 1
+
+    def release(self, resource: str, response=None) -> None:
+        """归还请求名额，并根据响应更新额度和并发窗口"""
+        budget = self.budgets[resource]
+        with self._cond:
+            budget.in_flight -= 1
+            if response is not None:
+                budget.update_from_headers(response.headers)
+                if self.is_throttled(response):
+                    self._on_throttled(budget, response)
+                else:
+                    budget.consecutive_throttles = 0
+                    # 加性增大：每个完整窗口的成功请求使窗口加1
+                    budget.window = min(self.max_concurrency, budget.window + 1.0 / max(budget.window, 1.0))
+            self._cond.notify_all()
+
+    def _on_throttled(self, budget: ResourceBudget, response) -> None:
+        """限流时乘性减小并发窗口并暂停该资源（需持有锁）"""
+        budget.throttled += 1
+        budget.consecutive_throttles += 1
+        budget.window = max(float(self.min_concurrency), budget.window / 2)
+
+        now = time.time()
+        retry_after = _int_header(response.headers, 'Retry-After')
+        if retry_after is not None:
+            pause_until = now + retry_after
+        elif budget.remaining is not None and budget.remaining <= 0 and budget.reset_at:
+            pause_until = budget.reset_at + self.reset_margin
+        else:
+            pause_until = now + SECONDARY_LIMIT_WAIT * (2 ** (budget.consecutive_throttles - 1))
+        budget.paused_until = max(budget.paused_until, pause_until)
+        print(f'[{budget.name}] 触发速率限制 (HTTP {response.status_code})，并发窗口降为 {budget.window:.1f}，'
+              f'暂停 {budget.paused_until - now:.1f} 秒')
+
+    def execute(self, resource: str, send: Callable):
+        """通过调度器发送请求，被限流时等待后重发"""
+        attempt = 0
+        while True:
+            self.acquire(resource)
+            response = None
+            try:
+                response = send()
+            finally:
+                self.release(resource, response)
+            if not self.is_throttled(response) or attempt >= self.max_throttle_retries:
+                return response
+            response.close()
+            attempt += 1
+
+    def get_report(self) -> Dict:
+        """获取本次运行各资源的额度消耗报告"""
+        with self._cond:
+            return {name: budget.report() for name, budget in self.budgets.items() if budget.requests}
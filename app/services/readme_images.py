@@ -0,0 +1,98 @@
+"""
+README图片提取
+用一个组合正则按文档顺序单次扫描README，惰性地产出图片URL：
+Markdown行内图片 ![alt](url "title")、引用式图片 ![alt][ref] / ![ref][] / ![ref]，以及HTML的 <img src=...>。
+围栏代码块和HTML注释整体跳过；调用方取够候选后即停止扫描，不需要构建完整的HTML解析树
+"""
+
+import html
+import re
+from itertools import islice
+from typing import Callable, Dict, Iterator, List, Optional
+
+# 每个分支都以固定字符开头，正则引擎可以直接跳到候选位置，不必在每个字符上尝试所有分支
+_TOKEN = re.compile(
+    # 围栏代码块（``` 或 ~~~，到相同的围栏为止；是否位于行首在代码中判断）
+    r'`(?P<backticks>`{2,})[^\n`]*\n[\s\S]*?(?:^[ \t]{0,3}`(?P=backticks)[ \t]*$|\Z)'
+    r'|~(?P<tildes>~{2,})[^\n]*\n[\s\S]*?(?:^[ \t]{0,3}~(?P=tildes)[ \t]*$|\Z)'
+    # HTML注释
+    r'|<!--[\s\S]*?(?:-->|\Z)'
+    # 行内图片：URL可用尖括号包裹，后面可跟标题
+    r'|!\[(?P<alt>(?:[^\]\\\n]|\\.)*)\]\(\s*(?:<(?P<angle>[^>\n]*)>|(?P<url>[^\s)]+))(?:\s+(?:"[^"]*"|\'[^\']*\'|\([^)]*\)))?\s*\)'
+    # 引用式图片：![alt][ref]、![ref][]、![ref]
+    r'|!\[(?P<ref_alt>(?:[^\]\\\n]|\\.)*)\](?:\[(?P<ref>[^\]\n]*)\])?'
+    # HTML图片标签
+    r'|<img\b(?P<attrs>[^>]*)>',
+    re.MULTILINE | re.IGNORECASE
+)
+
+_IMG_SRC = re.compile(r'\ssrc\s*=\s*(?:"(?P<dq>[^"]*)"|\'(?P<sq>[^\']*)\'|(?P<bare>[^\s"\'>]+))', re.IGNORECASE)
+
+# 链接引用定义：[label]: url "title"
+_REFERENCE_DEFINITION = re.compile(r'^[ \t]{0,3}\[(?P<label>[^\]\n]+)\]:[ \t]*<?(?P<url>[^\s>]+)>?', re.MULTILINE)
+
+
+def _normalize_label(label: str) -> str:
+    return ' '.join(label.split()).lower()
+
+
+def _reference_definitions(text: str) -> Dict[str, str]:
+    """收集链接引用定义，同名定义以第一个为准"""
+    definitions = {}
+    for match in _REFERENCE_DEFINITION.finditer(text):
+        definitions.setdefault(_normalize_label(match.group('label')), match.group('url'))
+    return definitions
+
+
+def iter_image_urls(text: str) -> Iterator[str]:
+    """按文档顺序惰性产出README中的图片URL（未去重、未校验）
+
+    引用定义通常位于文档末尾，只在遇到第一个引用式图片时才扫描一次定义
+    """
+    if not text:
+        return
+    definitions: Optional[Dict[str, str]] = None
+
+    pos = 0
+    while True:
+        match = _TOKEN.search(text, pos)
+        if match is None:
+            return
+        pos = match.end()
+        if match.group('backticks') is not None or match.group('tildes') is not None:
+            # 不在行首（最多缩进3个空格）的 ``` 不是代码块，跳过围栏字符后继续扫描
+            indent = text[text.rfind('\n', 0, match.start()) + 1:match.start()]
+            if len(indent) > 3 or indent.strip(' \t'):
+                pos = match.start() + 3
+            continue
+        if match.group('angle') is not None:
+            url = match.group('angle').strip()
+        elif match.group('url') is not None:
+            url = match.group('url')
+        elif match.group('attrs') is not None:
+            src = _IMG_SRC.search(match.group('attrs'))
+            if src is None:
+                continue
+            url = html.unescape(src.group('dq') or src.group('sq') or src.group('bare') or '').strip()
+        elif match.group('ref_alt') is not None:
+            if definitions is None:
+                definitions = _reference_definitions(text)
+            label = match.group('ref') or match.group('ref_alt')
+            url = definitions.get(_normalize_label(label))
+        else:
+            continue
+        if url:
+            yield url
+
+
+def extract_image_urls(text: str, is_valid: Callable[[str], bool] = None, limit: int = None) -> List[str]:
+    """提取去重后的有效图片URL，找到limit个后立即停止扫描"""
+    def candidates() -> Iterator[str]:
+        seen = set()
+        for url in iter_image_urls(text):
+            if url in seen or (is_valid is not None and not is_valid(url)):
+                continue
+            seen.add(url)
+            yield url
+
+    return list(islice(candidates(), limit))
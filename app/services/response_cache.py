@@ -0,0 +1,135 @@
+"""
+GitHub API条件请求缓存
+按接口保存响应体以及ETag/Last-Modified，下一次请求时携带If-None-Match/If-Modified-Since，
+服务端返回304时直接复用缓存的响应体（304不消耗GitHub的速率限制额度）。
+缓存持久化在SQLite文件中，总大小超过上限时按最近访问时间淘汰（LRU）
+"""
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import urlencode
+
+DEFAULT_MAX_BYTES = 100 * 1024 * 1024  # 100MB
+
+
+class ResponseCache:
+    """基于SQLite的持久化响应缓存"""
+
+    def __init__(self, db_file: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.db_file = Path(db_file)
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_file), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            ' key TEXT PRIMARY KEY,'
+            ' etag TEXT,'
+            ' last_modified TEXT,'
+            ' body BLOB NOT NULL,'
+            ' size INTEGER NOT NULL,'
+            ' stored_at REAL NOT NULL,'
+            ' accessed_at REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)')
+        self._conn.commit()
+        self.total_bytes = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(endpoint: str, params: Dict = None, accept: str = '') -> str:
+        """根据接口、查询参数和Accept头生成缓存键"""
+        key = endpoint
+        if params:
+            key += '?' + urlencode(sorted(params.items()))
+        if accept:
+            key += f'|{accept}'
+        return key
+
+    def get(self, key: str) -> Optional[Dict]:
+        """获取缓存条目"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT etag, last_modified, body FROM responses WHERE key = ?', (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {'etag': row[0], 'last_modified': row[1], 'body': bytes(row[2])}
+
+    @staticmethod
+    def conditional_headers(entry: Dict) -> Dict:
+        """生成条件请求头"""
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def mark_hit(self, key: str) -> None:
+        """记录一次304命中并刷新访问时间"""
+        with self._lock:
+            self.hits += 1
+            self._conn.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (time.time(), key))
+            self._conn.commit()
+
+    def put(self, key: str, body: bytes, etag: str = None, last_modified: str = None) -> None:
+        """保存响应；没有ETag和Last-Modified的响应无法做条件请求，不缓存"""
+        with self._lock:
+            self.misses += 1
+            if not etag and not last_modified:
+                return
+            size = len(body)
+            if size > self.max_bytes:
+                return
+
+            old = self._conn.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+            now = time.time()
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses (key, etag, last_modified, body, size, stored_at, accessed_at)'
+                ' VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (key, etag, last_modified, sqlite3.Binary(body), size, now, now)
+            )
+            self.total_bytes += size - (old[0] if old else 0)
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """按最近访问时间淘汰条目，直到总大小不超过上限（需持有锁）"""
+        while self.total_bytes > self.max_bytes:
+            rows = self._conn.execute(
+                'SELECT key, size FROM responses ORDER BY accessed_at LIMIT 64'
+            ).fetchall()
+            if not rows:
+                self.total_bytes = 0
+                return
+            for key, size in rows:
+                self._conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+                self.total_bytes -= size
+                self.evictions += 1
+                if self.total_bytes <= self.max_bytes:
+                    return
+
+    def get_stats(self) -> Dict:
+        """获取缓存统计信息"""
+        with self._lock:
+            entries = self._conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': entries,
+                'total_bytes': self.total_bytes,
+                'max_bytes': self.max_bytes
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
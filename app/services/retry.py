@@ -0,0 +1,187 @@
+"""
+爬虫HTTP请求的重试与熔断
+- 仅对幂等请求、可重试的状态码（5xx网关错误）和连接/超时/响应体中断错误进行重试，
+  其他请求错误（重定向过多、内容解码失败等）记为失败后直接抛出
+- 重试间隔为带随机抖动的指数退避（full jitter）
+- 每类接口（repo、readme、languages、search、graphql）一个熔断器，
+  连续失败达到阈值后直接失败，避免故障接口持续消耗本次运行的时间
+"""
+
+import random
+import re
+import threading
+import time
+from typing import Callable, Dict
+
+import requests
+
+RETRYABLE_STATUSES = frozenset({500, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+RETRYABLE_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                    requests.exceptions.ChunkedEncodingError)
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """熔断器处于打开状态，请求未发送"""
+
+
+class CircuitBreaker:
+    """单个接口的熔断器
+
+    closed: 正常放行；连续失败failure_threshold次后进入open
+    open: 直接拒绝请求；经过recovery_timeout秒后进入half-open
+    half-open: 只放行一个探测请求，成功则关闭，失败则重新打开
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 60.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.time() - self.opened_at >= self.recovery_timeout:
+                self.state = 'half-open'
+                self._probing = False
+            if self.state == 'half-open' and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+            self._probing = False
+
+    def release(self) -> None:
+        """请求因与接口无关的原因中止（未记录成功或失败）时，释放探测名额"""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self) -> bool:
+        """记录一次失败，返回熔断器是否因此打开"""
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == 'half-open' or (self.state == 'closed' and self.failures >= self.failure_threshold):
+                self.state = 'open'
+                self.opened_at = time.time()
+                self.trips += 1
+                return True
+            return False
+
+
+class RetryPolicy:
+    """指数退避重试策略，附带按接口划分的熔断器"""
+
+    def __init__(self, retry_attempts: int = 3, retry_delay: float = 5.0, max_delay: float = 60.0,
+                 failure_threshold: int = 5, recovery_timeout: float = 60.0,
+                 retryable_statuses=RETRYABLE_STATUSES):
+        self.retry_attempts = retry_attempts
+        self.retry_delay = retry_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.retryable_statuses = frozenset(retryable_statuses)
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+        self.retries = 0
+        self.failures = 0
+        self.short_circuited = 0
+
+    @staticmethod
+    def endpoint_key(endpoint: str) -> str:
+        """把接口路径归类，同一类接口共用一个熔断器"""
+        path = endpoint.split('?')[0]
+        match = re.match(r'^/repos/[^/]+/[^/]+(/(?P<sub>[^/]+))?', path)
+        if match:
+            return match.group('sub') or 'repo'
+        if path.startswith('/search/'):
+            return 'search'
+        return path.strip('/').split('/')[0] or 'root'
+
+    def get_breaker(self, key: str) -> CircuitBreaker:
+        with self._lock:
+            if key not in self.breakers:
+                self.breakers[key] = CircuitBreaker(key, self.failure_threshold, self.recovery_timeout)
+            return self.breakers[key]
+
+    def backoff(self, attempt: int) -> float:
+        """第attempt次重试前的等待时间（full jitter）"""
+        return random.uniform(0, min(self.max_delay, self.retry_delay * (2 ** attempt)))
+
+    def call(self, method: str, endpoint: str, send: Callable, idempotent: bool = None):
+        """执行请求，按策略重试；返回最后一次响应，连接错误重试耗尽后抛出异常"""
+        breaker = self.get_breaker(self.endpoint_key(endpoint))
+        if not breaker.allow():
+            with self._lock:
+                self.short_circuited += 1
+            raise CircuitOpenError(f'接口 {breaker.name} 已熔断，跳过请求 {endpoint}')
+
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        max_attempts = 1 + (self.retry_attempts if idempotent else 0)
+
+        for attempt in range(max_attempts):
+            error, response = None, None
+            try:
+                response = send()
+            except RETRYABLE_ERRORS as e:
+                error = e
+            except requests.exceptions.RequestException:
+                self.record_failure(breaker)
+                raise
+            except BaseException:
+                # 不是接口本身的失败，但半开状态的探测名额必须归还，否则熔断器会一直拒绝请求
+                breaker.release()
+                raise
+
+            if error is None and response.status_code not in self.retryable_statuses:
+                breaker.record_success()
+                return response
+
+            if attempt + 1 < max_attempts:
+                delay = self.backoff(attempt)
+                retry_after = response.headers.get('Retry-After') if response is not None else None
+                if retry_after and retry_after.isdigit():
+                    delay = max(delay, float(retry_after))
+                reason = error or f'HTTP {response.status_code}'
+                print(f'请求 {endpoint} 失败 ({reason})，{delay:.1f} 秒后第 {attempt + 1} 次重试...')
+                if response is not None:
+                    # 流式响应不关闭会一直占用连接池中的连接
+                    response.close()
+                with self._lock:
+                    self.retries += 1
+                time.sleep(delay)
+
+        self.record_failure(breaker)
+        if error is not None:
+            raise error
+        return response
+
+    def record_failure(self, breaker: CircuitBreaker) -> None:
+        with self._lock:
+            self.failures += 1
+        if breaker.record_failure():
+            print(f'接口 {breaker.name} 连续失败 {breaker.failures} 次，熔断 {self.recovery_timeout:.0f} 秒')
+
+    def get_stats(self) -> Dict:
+        """获取重试与熔断统计"""
+        with self._lock:
+            return {
+                'retries': self.retries,
+                'failures': self.failures,
+                'short_circuited': self.short_circuited,
+                'breaker_trips': sum(b.trips for b in self.breakers.values()),
+                'breakers': {key: {'state': b.state, 'trips': b.trips} for key, b in self.breakers.items()}
+            }
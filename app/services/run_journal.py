@@ -0,0 +1,189 @@
+"""
+爬取运行日志（断点续爬）
+每次运行在 data/runs/<run-id>/ 下记录：
+  meta.json     运行参数、已完成的阶段和状态
+  repos.jsonl   每获取完一个仓库的完整信息就追加一行，进程被中断时最多丢失正在写入的一行
+  <stage>.json  已完成阶段的输出（仓库列表、图片结果、报告等）
+使用 --resume <run-id> 续爬时跳过已完成的阶段，已获取的仓库不再请求API
+创建新的运行时清理旧的运行记录：超过保留天数的运行，以及最近keep个之外已完成的运行
+"""
+
+import json
+import os
+import shutil
+import threading
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+class RunJournal:
+    """一次爬取运行的检查点（线程安全）"""
+
+    def __init__(self, run_dir: Path, meta: Dict):
+        self.run_dir = Path(run_dir)
+        self.meta = meta
+        self.run_id = meta['run_id']
+        self._lock = threading.Lock()
+        self._repos_file = self.run_dir / 'repos.jsonl'
+        self._repos: Optional[Dict[str, Dict]] = None
+        self.reused = 0
+
+    @classmethod
+    def create(cls, runs_dir: Path, params: Dict, keep: int = None, max_age_days: float = None) -> 'RunJournal':
+        """开始新的运行，并按保留策略清理旧的运行记录（keep、max_age_days为None时不限制）"""
+        prune_runs(runs_dir, keep, max_age_days)
+        now = datetime.now()
+        run_id = f"{now.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        run_dir = Path(runs_dir) / run_id
+        run_dir.mkdir(parents=True, exist_ok=True)
+        journal = cls(run_dir, {
+            'run_id': run_id,
+            'created_at': now.isoformat(),
+            'updated_at': now.isoformat(),
+            'status': 'running',
+            'params': params,
+            'stages': []
+        })
+        journal._write_meta()
+        journal._repos = {}
+        return journal
+
+    @classmethod
+    def open(cls, runs_dir: Path, run_id: str) -> 'RunJournal':
+        """打开已有的运行，不存在时抛出FileNotFoundError"""
+        run_dir = Path(runs_dir) / run_id
+        meta_file = run_dir / 'meta.json'
+        if not meta_file.exists():
+            raise FileNotFoundError(f'运行记录不存在: {run_id}')
+        with open(meta_file, 'r', encoding='utf-8') as f:
+            return cls(run_dir, json.load(f))
+
+    @property
+    def params(self) -> Dict:
+        return self.meta['params']
+
+    @property
+    def finished(self) -> bool:
+        return self.meta['status'] == 'completed'
+
+    def _write_json(self, path: Path, data: Any) -> None:
+        """先写临时文件再替换，避免中断时留下不完整的JSON"""
+        temp_path = path.with_name(path.name + '.part')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, default=str)
+        os.replace(temp_path, path)
+
+    def _write_meta(self) -> None:
+        self.meta['updated_at'] = datetime.now().isoformat()
+        self._write_json(self.run_dir / 'meta.json', self.meta)
+
+    def _load_repos(self) -> Dict[str, Dict]:
+        """读取已记录的仓库，忽略进程中断时写了一半的最后一行"""
+        repos = {}
+        if self._repos_file.exists():
+            with open(self._repos_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        repo = json.loads(line)
+                    except ValueError:
+                        continue
+                    repos[repo['full_name']] = repo
+        return repos
+
+    def get_repo(self, full_name: str) -> Optional[Dict]:
+        """返回本次运行中已获取的仓库完整信息"""
+        with self._lock:
+            if self._repos is None:
+                self._repos = self._load_repos()
+            repo = self._repos.get(full_name)
+            if repo is not None:
+                self.reused += 1
+            return repo
+
+    def record_repo(self, full_info: Dict) -> None:
+        """记录获取完成的仓库（追加一行并立即刷新到磁盘）"""
+        line = json.dumps(full_info, ensure_ascii=False, default=str)
+        with self._lock:
+            if self._repos is None:
+                self._repos = self._load_repos()
+            self._repos[full_info['full_name']] = full_info
+            with open(self._repos_file, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+                f.flush()
+
+    def has_stage(self, stage: str) -> bool:
+        return stage in self.meta['stages']
+
+    def complete_stage(self, stage: str, data: Any = None) -> None:
+        """标记阶段完成并保存其输出"""
+        with self._lock:
+            if data is not None:
+                self._write_json(self.run_dir / f'{stage}.json', data)
+            if stage not in self.meta['stages']:
+                self.meta['stages'].append(stage)
+            self._write_meta()
+
+    def load_stage(self, stage: str) -> Any:
+        """读取已完成阶段的输出"""
+        with open(self.run_dir / f'{stage}.json', 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def finish(self, status: str = 'completed', error: str = None) -> None:
+        """记录运行结束（completed或failed）"""
+        with self._lock:
+            self.meta['status'] = status
+            if error:
+                self.meta['error'] = error
+            else:
+                self.meta.pop('error', None)
+            self._write_meta()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                'run_id': self.run_id,
+                'stages': list(self.meta['stages']),
+                'recorded_repos': len(self._repos or {}),
+                'reused_repos': self.reused
+            }
+
+
+def list_runs(runs_dir: Path) -> List[Dict]:
+    """列出所有运行记录，最新的在前"""
+    runs = []
+    runs_dir = Path(runs_dir)
+    if not runs_dir.exists():
+        return runs
+    for meta_file in runs_dir.glob('*/meta.json'):
+        try:
+            with open(meta_file, 'r', encoding='utf-8') as f:
+                runs.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return sorted(runs, key=lambda meta: meta.get('created_at', ''), reverse=True)
+
+
+def prune_runs(runs_dir: Path, keep: int = None, max_age_days: float = None) -> List[str]:
+    """删除旧的运行记录，返回删除的运行ID
+    
+    超过max_age_days没有更新的运行（无论是否完成）全部删除；
+    已完成的运行只保留最近keep个，未完成的运行在保留期内仍可续爬
+    """
+    expired_before = datetime.now() - timedelta(days=max_age_days) if max_age_days is not None else None
+    removed = []
+    completed = 0
+    for meta in list_runs(runs_dir):
+        if meta.get('status') == 'completed':
+            completed += 1
+        try:
+            updated_at = datetime.fromisoformat(meta.get('updated_at') or meta['created_at'])
+        except (KeyError, TypeError, ValueError):
+            continue
+        expired = expired_before is not None and updated_at < expired_before
+        surplus = keep is not None and meta.get('status') == 'completed' and completed > keep
+        if expired or surplus:
+            shutil.rmtree(Path(runs_dir) / meta['run_id'], ignore_errors=True)
+            removed.append(meta['run_id'])
+    return removed
@@ -0,0 +1,121 @@
+"""
+GitHub搜索分片
+GitHub搜索接口单个查询最多返回1000条结果。分片模式把查询拆成互不重叠的stars区间
+（区间内仍超过上限时再按pushed日期区间拆分），自适应二分直到每个分片都不超过上限，
+再把各分片的结果按stars归并成全局top-k
+"""
+
+import heapq
+import math
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+RESULT_CAP = 1000
+
+
+class SearchShard:
+    """一个搜索分片：stars闭区间 × pushed日期闭区间"""
+
+    def __init__(self, stars_min: int, stars_max: Optional[int], pushed_from: date, pushed_to: date):
+        self.stars_min = stars_min
+        self.stars_max = stars_max  # None表示不设上限
+        self.pushed_from = pushed_from
+        self.pushed_to = pushed_to
+        self.total: Optional[int] = None
+        self.top_stars: Optional[int] = None
+
+    def query(self, language: str = '') -> str:
+        """生成分片对应的搜索条件"""
+        stars_max = '*' if self.stars_max is None else self.stars_max
+        query = (f'pushed:{self.pushed_from.isoformat()}..{self.pushed_to.isoformat()} '
+                 f'stars:{self.stars_min}..{stars_max}')
+        if language:
+            query += f' language:{language}'
+        return query
+
+    def split_by_stars(self) -> Optional[Tuple['SearchShard', 'SearchShard']]:
+        """按stars拆分为(高区间, 低区间)，无法再拆时返回None
+
+        stars分布是长尾的，使用几何中点拆分，避免高区间几乎为空
+        """
+        upper_bound = self.stars_max if self.stars_max is not None else self.top_stars
+        if upper_bound is None or upper_bound <= self.stars_min:
+            return None
+        mid = max(self.stars_min, int(math.sqrt(max(self.stars_min, 1) * upper_bound)))
+        if mid >= upper_bound:
+            mid = upper_bound - 1
+        return (SearchShard(mid + 1, self.stars_max, self.pushed_from, self.pushed_to),
+                SearchShard(self.stars_min, mid, self.pushed_from, self.pushed_to))
+
+    def split_by_date(self) -> Optional[Tuple['SearchShard', 'SearchShard']]:
+        """按pushed日期拆分为(较新, 较旧)，只剩一天时返回None"""
+        days = (self.pushed_to - self.pushed_from).days
+        if days < 1:
+            return None
+        mid = self.pushed_from + timedelta(days=days // 2)
+        return (SearchShard(self.stars_min, self.stars_max, mid + timedelta(days=1), self.pushed_to),
+                SearchShard(self.stars_min, self.stars_max, self.pushed_from, mid))
+
+    def __repr__(self) -> str:
+        return f'SearchShard({self.query()}, total={self.total})'
+
+
+class SearchSharder:
+    """自适应二分的分片规划器
+
+    probe(query) 返回 (total_count, 最高stars)，每次探测只需要一个per_page=1的请求
+    """
+
+    def __init__(self, probe: Callable[[str], Tuple[int, Optional[int]]], language: str = '',
+                 result_cap: int = RESULT_CAP, max_workers: int = 3):
+        self.probe = probe
+        self.language = language
+        self.result_cap = result_cap
+        self.max_workers = max_workers
+        self.probes = 0
+
+    def _probe_all(self, shards: Iterable[SearchShard], executor: ThreadPoolExecutor) -> None:
+        pending = [shard for shard in shards if shard.total is None]
+        for shard, (total, top_stars) in zip(pending, executor.map(lambda s: self.probe(s.query(self.language)), pending)):
+            shard.total, shard.top_stars = total, top_stars
+            self.probes += 1
+
+    def plan(self, root: SearchShard, needed: int) -> List[SearchShard]:
+        """规划分片，按stars从高到低返回，覆盖的结果数达到needed后不再继续拆分低区间"""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            self._probe_all([root], executor)
+            return self._plan(root, needed, executor)
+
+    def _plan(self, shard: SearchShard, needed: int, executor: ThreadPoolExecutor) -> List[SearchShard]:
+        if shard.total <= self.result_cap:
+            return [shard] if shard.total else []
+
+        parts = shard.split_by_stars() or shard.split_by_date()
+        if parts is None:
+            print(f'分片 {shard.query(self.language)} 无法继续拆分，只能获取前 {self.result_cap} 个结果')
+            return [shard]
+
+        # 兄弟分片并发探测
+        self._probe_all(parts, executor)
+        planned, covered = [], 0
+        for part in parts:
+            if covered >= needed:
+                break
+            sub_shards = self._plan(part, needed - covered, executor)
+            planned.extend(sub_shards)
+            covered += sum(min(s.total, self.result_cap) for s in sub_shards)
+        return planned
+
+
+def merge_top_k(shard_results: List[List[Dict]], k: int) -> List[Dict]:
+    """把各分片（已按stars降序）的结果堆归并为全局top-k，按full_name去重"""
+    merged, seen = [], set()
+    for repo in heapq.merge(*shard_results, key=lambda r: r.get('stargazers_count', 0), reverse=True):
+        if repo['full_name'] in seen:
+            continue
+        seen.add(repo['full_name'])
+        merged.append(repo)
+        if len(merged) >= k:
+            break
+    return merged
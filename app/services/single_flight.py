@@ -0,0 +1,86 @@
+"""
+跨进程的单飞锁
+用操作系统的文件锁（POSIX flock / Windows msvcrt.locking）保证同一时间只有一个进程执行爬取；
+持有锁的进程退出（包括崩溃）时锁自动释放，不会留下过期的锁。
+持有者把当前任务信息写入锁文件，没有拿到锁的进程读取后把请求合并到正在执行的任务上
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class SingleFlightLock:
+    """非阻塞的文件锁；每个实例对应一次加锁，可以在线程之间传递（由执行任务的线程释放）"""
+
+    def __init__(self, lock_file: Path):
+        self.lock_file = Path(lock_file)
+        self.lock_file.parent.mkdir(parents=True, exist_ok=True)
+        self._fd: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def try_acquire(self) -> bool:
+        """尝试加锁，其他进程（或本进程的其他实例）持有锁时立即返回False"""
+        with self._lock:
+            if self._fd is not None:
+                return True
+            fd = os.open(str(self.lock_file), os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            except OSError:
+                os.close(fd)
+                return False
+            self._fd = fd
+            return True
+
+    def write_holder(self, info: Dict) -> None:
+        """记录持有者信息（如任务ID），供没有拿到锁的进程读取"""
+        if self._fd is None:
+            raise RuntimeError('未持有锁')
+        data = json.dumps(info, ensure_ascii=False).encode('utf-8')
+        os.ftruncate(self._fd, 0)
+        os.lseek(self._fd, 0, os.SEEK_SET)
+        os.write(self._fd, data)
+        os.fsync(self._fd)
+
+    def read_holder(self) -> Optional[Dict]:
+        """读取当前持有者写入的信息，尚未写入时返回None"""
+        try:
+            with open(self.lock_file, 'r', encoding='utf-8') as f:
+                content = f.read()
+        except OSError:
+            return None
+        try:
+            return json.loads(content) if content else None
+        except ValueError:
+            return None
+
+    def release(self) -> None:
+        with self._lock:
+            if self._fd is None:
+                return
+            try:
+                os.ftruncate(self._fd, 0)
+                if fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+                else:
+                    os.lseek(self._fd, 0, os.SEEK_SET)
+                    msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+            finally:
+                os.close(self._fd)
+                self._fd = None
@@ -0,0 +1,111 @@
+"""
+有界队列的流式阶段流水线
+数据源产出的每一项依次流过各个阶段，阶段之间用容量有限的asyncio.Queue连接：
+下游处理不过来时上游的put会等待（背压），在途的数据量不超过各队列容量与各阶段并发数之和。
+每个阶段由若干个worker并发处理，处理函数返回None表示丢弃该项
+"""
+
+import asyncio
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+# 队列中表示上游已经结束的标记
+_DONE = object()
+
+
+class Stage:
+    """流水线中的一个阶段及其统计"""
+
+    def __init__(self, name: str, func: Callable[[Any], Awaitable[Any]], concurrency: int = 1):
+        self.name = name
+        self.func = func
+        self.concurrency = max(1, concurrency)
+        self.processed = 0
+        self.dropped = 0
+        self.busy_seconds = 0.0
+        self.max_queued = 0
+        # 阶段处理完所有数据的时刻（perf_counter）
+        self.finished_at: Optional[float] = None
+
+    def get_stats(self) -> Dict:
+        return {
+            'processed': self.processed,
+            'dropped': self.dropped,
+            'busy_seconds': round(self.busy_seconds, 3),
+            'max_queued': self.max_queued
+        }
+
+
+class StagePipeline:
+    """按顺序连接的阶段，所有阶段同时运行；任一阶段抛出异常时取消整个流水线并重新抛出"""
+
+    def __init__(self, stages: List[Stage], queue_size: int = 32):
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+        self.produced = 0
+        self.started_at: Optional[float] = None
+        # 数据源产出最后一项的时刻、最后一个阶段处理完第一项的时刻（perf_counter）
+        self.source_finished_at: Optional[float] = None
+        self.first_output_at: Optional[float] = None
+
+    async def run(self, source: AsyncIterator[Any]) -> None:
+        self.started_at = time.perf_counter()
+        queues = [asyncio.Queue(self.queue_size) for _ in self.stages]
+
+        async def put(index: int, item: Any) -> None:
+            await queues[index].put(item)
+            stage = self.stages[index]
+            stage.max_queued = max(stage.max_queued, queues[index].qsize())
+
+        async def finish(index: int) -> None:
+            """通知第index个阶段的每个worker上游已结束"""
+            for _ in range(self.stages[index].concurrency):
+                await queues[index].put(_DONE)
+
+        async def feed() -> None:
+            async for item in source:
+                self.produced += 1
+                await put(0, item)
+            self.source_finished_at = time.perf_counter()
+            await finish(0)
+
+        async def work(index: int) -> None:
+            stage = self.stages[index]
+            last = index == len(self.stages) - 1
+            while True:
+                item = await queues[index].get()
+                if item is _DONE:
+                    return
+                started = time.perf_counter()
+                result = await stage.func(item)
+                stage.busy_seconds += time.perf_counter() - started
+                if result is None:
+                    stage.dropped += 1
+                    continue
+                stage.processed += 1
+                if last:
+                    if self.first_output_at is None:
+                        self.first_output_at = time.perf_counter()
+                else:
+                    await put(index + 1, result)
+
+        async def run_stage(index: int) -> None:
+            await asyncio.gather(*(work(index) for _ in range(self.stages[index].concurrency)))
+            self.stages[index].finished_at = time.perf_counter()
+            if index + 1 < len(self.stages):
+                await finish(index + 1)
+
+        tasks = [asyncio.ensure_future(feed())] + [asyncio.ensure_future(run_stage(i)) for i in range(len(self.stages))]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get_stats(self) -> Dict:
+        return {
+            'produced': self.produced,
+            'queue_size': self.queue_size,
+            'stages': {stage.name: stage.get_stats() for stage in self.stages}
+        }
@@ -0,0 +1,203 @@
+"""
+技术栈识别
+从外部词典（config/tech_stack.json）加载技术名称及别名，编译为按前缀树组织的单个正则表达式，
+一次扫描README即可找出所有出现的技术，匹配带词边界（Express不会匹配expression，AWS不会匹配laws），
+结果按出现次数排序。
+
+大小写敏感的名称多是普通英文单词（Spring、Swift、Rust），只有出现在代码、标题中，
+或有第二个信号（正文中非句首出现至少两次、语言统计/topics中也有）时才计入，
+避免句首的“Spring is here.”被识别为技术栈
+"""
+
+import bisect
+import json
+import re
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Pattern
+
+# 词边界只把ASCII字母数字视为单词字符，中文紧邻英文技术名（如“使用React开发”）时仍能匹配。
+# 前面紧邻 . - @ 时不匹配（文件扩展名、create-react-app、@scope），连续的反引号用于排除代码块的语言标记（```bash），
+# 行内代码（`Spring`）仍可匹配；后面紧邻 + # 时不匹配（C不会匹配C++），允许 React-based 这类连字符后缀
+_BOUNDARY_BEFORE = r'(?<![A-Za-z0-9_.\-@])(?<!``)'
+_BOUNDARY_AFTER = r'(?![A-Za-z0-9_+#])(?!\.[A-Za-z0-9])'
+
+# 代码区域：围栏代码块和行内代码
+_CODE_PATTERN = re.compile(r'^[ \t]*(```|~~~).*?(?:^[ \t]*\1|\Z)|`[^`\n]+`', re.MULTILINE | re.DOTALL)
+# 标题行
+_HEADING_PATTERN = re.compile(r'^[ \t]{0,3}#{1,6}[ \t]')
+# 句首：行首（允许引用、列表标记）或句号等之后
+_SENTENCE_START_PATTERN = re.compile(r'(?:^[\s>*+\-]*(?:\d+[.)])?\s*|[.!?。！？]\s+)$')
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """把词表编译为共享前缀的正则，避免在每个位置逐个尝试上千个分支
+
+    每个节点先尝试更长的延续，保证优先匹配最长的别名（Vue.js优先于Vue）
+    """
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node: Dict) -> str:
+        terminal = '' in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        if len(branches) == 1 and not terminal:
+            return branches[0]
+        group = '(?:' + '|'.join(branches) + ')'
+        return group + '?' if terminal else group
+
+    return build(trie)
+
+
+class TechStackMatcher:
+    """预编译的多模式技术栈匹配器"""
+
+    def __init__(self, technologies: Dict[str, List[str]], case_sensitive: Dict[str, List[str]] = None):
+        case_sensitive = case_sensitive or {}
+        # 别名（小写） -> 规范名称；大小写敏感的别名按原样保存
+        self.aliases: Dict[str, str] = {}
+        self.exact_aliases: Dict[str, str] = {}
+        # 规范化语言统计和topics时使用，包含所有名称和别名
+        self.names: Dict[str, str] = {}
+
+        for name, aliases in technologies.items():
+            if name not in case_sensitive:
+                self.aliases[name.lower()] = name
+            for alias in aliases:
+                self.aliases[alias.lower()] = name
+        for name, aliases in case_sensitive.items():
+            for alias in aliases:
+                self.exact_aliases[alias] = name
+
+        for alias, name in list(self.aliases.items()) + list(self.exact_aliases.items()):
+            self.names[alias.lower()] = name
+        for name in list(technologies) + list(case_sensitive):
+            self.names[name.lower()] = name
+
+        self.pattern = self._compile(self.aliases, re.IGNORECASE)
+        self.exact_pattern = self._compile(self.exact_aliases, 0)
+
+    @staticmethod
+    def _compile(aliases: Dict[str, str], flags: int) -> Optional[Pattern]:
+        if not aliases:
+            return None
+        return re.compile(_BOUNDARY_BEFORE + '(' + _trie_pattern(aliases) + ')' + _BOUNDARY_AFTER, flags)
+
+    @classmethod
+    def from_file(cls, dictionary_file: Path) -> 'TechStackMatcher':
+        """从JSON词典文件加载"""
+        with open(dictionary_file, 'r', encoding='utf-8') as f:
+            dictionary = json.load(f)
+        return cls(dictionary.get('technologies', {}), dictionary.get('case_sensitive', {}))
+
+    def __len__(self) -> int:
+        return len(set(self.names.values()))
+
+    def canonical(self, name: str) -> Optional[str]:
+        """把语言名、topic等转换为词典中的规范名称，不在词典中时返回None"""
+        if not name:
+            return None
+        return self.names.get(name.lower()) or self.names.get(name.replace('-', ' ').lower())
+
+    def count(self, text: str, confirmed: Iterable[str] = ()) -> Counter:
+        """统计文本中各技术出现的次数
+
+        confirmed为已由其他来源（语言统计、topics）确认的规范名称，这些名称不需要上下文信号
+
+        >>> matcher = TechStackMatcher({}, {'Spring': ['Spring'], 'Swift': ['Swift']})
+        >>> matcher.count('Spring is here. Swift progress was made this week.')
+        Counter()
+        >>> matcher.count('# Swift client\\nA starter for `Spring` apps.')
+        Counter({'Swift': 1, 'Spring': 1})
+        >>> matcher.count('Written in Swift, tested with Swift 5.9.')
+        Counter({'Swift': 2})
+        >>> matcher.count('Swift progress was made.', confirmed=['Swift'])
+        Counter({'Swift': 1})
+        """
+        counts = Counter()
+        if not text:
+            return counts
+        spans = []
+        if self.pattern is not None:
+            for match in self.pattern.finditer(text):
+                counts[self.aliases[match.group(1).lower()]] += 1
+                spans.append(match.span())
+        if self.exact_pattern is not None:
+            confirmed = set(confirmed)
+            starts = [start for start, _ in spans]
+            code_spans = None
+            # 规范名称 -> [代码/标题中出现次数, 正文非句首出现次数, 句首出现次数]
+            signals: Dict[str, List] = {}
+            for match in self.exact_pattern.finditer(text):
+                # 与不区分大小写的匹配重叠时以前者为准（Spring Boot不再额外计一次Spring）
+                i = bisect.bisect_right(starts, match.start()) - 1
+                if i >= 0 and spans[i][1] > match.start():
+                    continue
+                if i + 1 < len(spans) and spans[i + 1][0] < match.end():
+                    continue
+                alias = match.group(1)
+                name = self.exact_aliases[alias]
+                # 与规范名称不同的别名（Golang、HashiCorp Vault）本身没有歧义，直接计入
+                if alias != name or name in confirmed:
+                    counts[name] += 1
+                    continue
+                if code_spans is None:
+                    code_spans = [m.span() for m in _CODE_PATTERN.finditer(text)]
+                signal = signals.setdefault(name, [0, 0, 0])
+                if self._in_code_or_heading(text, match.start(), code_spans):
+                    signal[0] += 1
+                elif self._at_sentence_start(text, match.start()):
+                    signal[2] += 1
+                else:
+                    signal[1] += 1
+            # 有代码/标题信号时所有出现都计入，否则需要正文中非句首出现至少两次
+            for name, (strong, mid_sentence, sentence_start) in signals.items():
+                if strong:
+                    counts[name] += strong + mid_sentence + sentence_start
+                elif mid_sentence >= 2:
+                    counts[name] += mid_sentence
+        return counts
+
+    @staticmethod
+    def _in_code_or_heading(text: str, position: int, code_spans: List) -> bool:
+        i = bisect.bisect_right(code_spans, (position, float('inf'))) - 1
+        if i >= 0 and code_spans[i][0] <= position < code_spans[i][1]:
+            return True
+        line_start = text.rfind('\n', 0, position) + 1
+        return bool(_HEADING_PATTERN.match(text, line_start))
+
+    @staticmethod
+    def _at_sentence_start(text: str, position: int) -> bool:
+        line_start = text.rfind('\n', 0, position) + 1
+        return bool(_SENTENCE_START_PATTERN.search(text[line_start:position]))
+
+    def rank(self, text: str, extra: Iterable[str] = (), limit: int = None) -> List[str]:
+        """按出现次数排序返回技术栈
+
+        extra为语言统计、topics等额外来源，每项计一次，能规范化的使用词典中的名称；
+        次数相同时按首次出现的先后顺序
+        """
+        counts = Counter()
+        order: Dict[str, int] = {}
+        for item in extra:
+            name = self.canonical(item) or item
+            counts[name] += 1
+            order.setdefault(name, len(order))
+        for name, hits in self.count(text, confirmed=counts).items():
+            counts[name] += hits
+            order.setdefault(name, len(order))
+        ranked = sorted(counts, key=lambda name: (-counts[name], order[name]))
+        return ranked[:limit] if limit else ranked
+
+
+@lru_cache(maxsize=None)
+def get_matcher(dictionary_file: str) -> TechStackMatcher:
+    """获取（并缓存）指定词典文件对应的匹配器，词典只在首次使用时编译一次"""
+    return TechStackMatcher.from_file(Path(dictionary_file))
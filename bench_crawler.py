@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+爬虫吞吐量基准测试
+在本地模拟GitHub API（fake_github_server.py）上端到端运行 GitHubTrendingCrawler.run，
+按不同的项目数量和注入延迟组合测量：总耗时、每秒请求数、请求延迟p50/p95/p99、峰值内存，
+以及搜索、补全信息、图片、数据处理、保存各阶段的耗时。
+每个场景在独立的子进程中运行（连接池统计和峰值内存互不影响，报告写入临时目录），
+结果写入基线JSON，并与上一次的基线对比，超过阈值的退化会被标出。
+
+用法：python bench_crawler.py [--limits 10,100,1000] [--latencies 0,50] [--threshold 0.1]
+      [--baseline data/bench/crawler_baseline.json] [--no-save] [--fail-on-regression]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from fake_github_server import FakeGitHubServer, synthetic_fixtures
+
+DEFAULT_BASELINE = Path(__file__).parent / 'data' / 'bench' / 'crawler_baseline.json'
+
+# 指标 -> 数值越大越好（True）还是越小越好（False）
+METRICS = {
+    'wall_seconds': False,
+    'requests_per_second': True,
+    'p50_ms': False,
+    'p95_ms': False,
+    'p99_ms': False,
+    'peak_rss_mb': False
+}
+
+
+def run_worker(api_url: str, limit: int, concurrency: int, enrichment: str, batch: bool) -> Dict:
+    """在当前进程中运行一次完整爬取（报告写入临时目录），返回测量结果"""
+    import python_crawler as crawler_module
+
+    with tempfile.TemporaryDirectory(prefix='bench-crawler-') as temp_dir:
+        temp_path = Path(temp_dir)
+        crawler_module.DATA_DIR = temp_path / 'data'
+        crawler_module.ARCHIVE_DIR = temp_path / 'archives'
+        crawler_module.BACKUP_DIR = temp_path / 'backups'
+        crawler_module.RUNS_DIR = temp_path / 'data' / 'runs'
+        crawler_module.DATA_DIR.mkdir()
+        crawler_module.ARCHIVE_DIR.mkdir()
+
+        crawler = crawler_module.GitHubTrendingCrawler(
+            limit=limit, max_concurrency=concurrency, use_cache=False,
+            enrichment=enrichment, api_url=api_url, batch=batch
+        )
+        started = time.perf_counter()
+        # 爬虫的进度输出与测量结果无关，丢弃以免与JSON结果混在一起
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            result = crawler.run()
+        wall = time.perf_counter() - started
+
+    if not result.get('success'):
+        return {'success': False, 'error': result.get('error', '未知错误')}
+    http_stats = result['http_stats']
+    # Linux上ru_maxrss的单位是KB，macOS上是字节
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_rss_mb = max_rss / (1024 * 1024) if sys.platform == 'darwin' else max_rss / 1024
+    return {
+        'success': True,
+        'repos': len(result['report']['data']),
+        'wall_seconds': round(wall, 3),
+        'requests': http_stats['requests'],
+        'requests_per_second': round(http_stats['requests'] / wall, 1) if wall else 0.0,
+        'p50_ms': http_stats['latency_ms']['p50'],
+        'p95_ms': http_stats['latency_ms']['p95'],
+        'p99_ms': http_stats['latency_ms']['p99'],
+        'peak_rss_mb': round(peak_rss_mb, 1),
+        'timings': result['timings']
+    }
+
+
+def run_scenario(api_url: str, limit: int, concurrency: int, enrichment: str, batch: bool) -> Dict:
+    """在子进程中运行一个场景"""
+    command = [sys.executable, __file__, '--worker', '--api-url', api_url, '--limit', str(limit),
+               '--concurrency', str(concurrency), '--enrichment', enrichment] + (['--batch'] if batch else [])
+    completed = subprocess.run(command, capture_output=True, text=True, cwd=Path(__file__).parent)
+    lines = completed.stdout.strip().splitlines()
+    if completed.returncode != 0 or not lines:
+        return {'success': False, 'error': completed.stderr.strip().splitlines()[-1:] or ['子进程异常退出']}
+    return json.loads(lines[-1])
+
+
+def load_baseline(path: Path) -> Optional[Dict]:
+    if not path.exists():
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(current: Dict, previous: Dict, threshold: float) -> List[str]:
+    """对比两次结果，返回超过阈值的退化描述"""
+    regressions = []
+    for name, result in current.items():
+        before = previous.get(name)
+        if not result.get('success') or not before or not before.get('success'):
+            continue
+        for metric, higher_is_better in METRICS.items():
+            old, new = before.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (-change if higher_is_better else change) > threshold:
+                regressions.append(f'{name} {metric}: {old} -> {new} ({change:+.1%})')
+    return regressions
+
+
+def print_table(results: Dict, previous: Dict) -> None:
+    print(f"\n{'场景':<22} {'耗时(s)':>9} {'请求数':>7} {'请求/s':>8} {'p50(ms)':>8} {'p95(ms)':>8} "
+          f"{'p99(ms)':>8} {'内存(MB)':>9}  阶段耗时(s)")
+    for name, result in results.items():
+        if not result.get('success'):
+            print(f'{name:<22} 失败: {result.get("error")}')
+            continue
+        timings = ' '.join(f'{phase}={seconds}' for phase, seconds in result['timings'].items())
+        print(f"{name:<22} {result['wall_seconds']:>9} {result['requests']:>7} {result['requests_per_second']:>8} "
+              f"{result['p50_ms']:>8} {result['p95_ms']:>8} {result['p99_ms']:>8} {result['peak_rss_mb']:>9}  {timings}")
+        before = previous.get(name)
+        if before and before.get('success'):
+            print(f"{'  (基线)':<22} {before['wall_seconds']:>9} {before['requests']:>7} "
+                  f"{before['requests_per_second']:>8} {before['p50_ms']:>8} {before['p95_ms']:>8} "
+                  f"{before['p99_ms']:>8} {before['peak_rss_mb']:>9}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='爬虫吞吐量基准测试')
+    parser.add_argument('--limits', default='10,100,1000', help='爬取的项目数量，逗号分隔')
+    parser.add_argument('--latencies', default='0,50', help='模拟API的注入延迟（毫秒），逗号分隔')
+    parser.add_argument('--jitter', type=float, default=0, help='延迟抖动（毫秒）')
+    parser.add_argument('--repos', type=int, default=3000, help='模拟API中的仓库数量')
+    parser.add_argument('--concurrency', type=int, default=10, help='爬虫的全局最大并发请求数')
+    parser.add_argument('--enrichment', choices=['rest', 'graphql'], default='rest', help='仓库信息获取方式')
+    parser.add_argument('--batch', action='store_true', help='爬虫按阶段批量执行（对比流式流水线）')
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE, help='基线JSON文件')
+    parser.add_argument('--threshold', type=float, default=0.1, help='判定为退化的相对变化（默认10%%）')
+    parser.add_argument('--no-save', action='store_true', help='只对比，不覆盖基线文件')
+    parser.add_argument('--fail-on-regression', action='store_true', help='出现退化时以状态码1退出')
+    # 以下参数由父进程传给子进程
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--api-url', help=argparse.SUPPRESS)
+    parser.add_argument('--limit', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.api_url, args.limit, args.concurrency, args.enrichment, args.batch)))
+        sys.exit(0)
+
+    limits = [int(value) for value in args.limits.split(',')]
+    latencies = [float(value) for value in args.latencies.split(',')]
+    fixtures = synthetic_fixtures(args.repos)
+    baseline = load_baseline(args.baseline)
+    previous = baseline['scenarios'] if baseline else {}
+
+    results = {}
+    for latency in latencies:
+        # 额度设得足够大，测量的是爬虫本身而不是限流等待
+        server = FakeGitHubServer(fixtures, latency_ms=latency, jitter_ms=args.jitter,
+                                  rate_limits={'core': (10 ** 7, 3600), 'search': (10 ** 7, 60)})
+        with server:
+            for limit in limits:
+                name = f'limit={limit},latency={latency:g}ms' + (',batch' if args.batch else '')
+                print(f'运行场景 {name} ...', flush=True)
+                results[name] = run_scenario(server.url, limit, args.concurrency, args.enrichment, args.batch)
+
+    print_table(results, previous)
+
+    regressions = compare(results, previous, args.threshold) if previous else []
+    if not baseline:
+        print(f'\n没有找到基线文件 {args.baseline}，本次结果将作为基线')
+    elif regressions:
+        print(f'\n发现 {len(regressions)} 项退化（阈值 {args.threshold:.0%}）：')
+        for line in regressions:
+            print(f'  {line}')
+    else:
+        print(f'\n与基线（{baseline["created_at"]}）相比没有超过 {args.threshold:.0%} 的退化')
+
+    if not args.no_save:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({
+                'created_at': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'repos': args.repos,
+                'concurrency': args.concurrency,
+                'enrichment': args.enrichment,
+                # 保留基线中本次没有运行的场景（例如只运行了 --batch）
+                'scenarios': {**previous, **results}
+            }, f, ensure_ascii=False, indent=2)
+        print(f'基线已写入 {args.baseline}')
+
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
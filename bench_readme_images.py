@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+README图片提取基准测试
+对比原实现（Markdown正则 + BeautifulSoup完整解析，再合并去重）与单次扫描的惰性提取器。
+用法：python bench_readme_images.py [--sizes 100,1000,5000] [--repeat 5] [--limit 5]
+--sizes 为生成的README大小（KB）
+"""
+
+import argparse
+import os
+import random
+import re
+import statistics
+import time
+
+from app.services.readme_images import extract_image_urls
+
+SUPPORTED_IMAGE_FORMATS = ['.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp']
+
+
+def is_valid_image_url(url):
+    """与 ImageCrawler.is_valid_image_url 相同的校验"""
+    if not url or not isinstance(url, str) or url.startswith('data:'):
+        return False
+    ext = os.path.splitext(url.split('?')[0])[1].lower()
+    return ext in SUPPORTED_IMAGE_FORMATS or 'githubusercontent.com' in url
+
+
+def legacy_extract(content):
+    """原实现：正则扫描Markdown图片，BeautifulSoup解析全部HTML图片，再用set去重"""
+    from bs4 import BeautifulSoup
+
+    markdown_images = []
+    for match in re.finditer(r'!\[([^\]]*)\]\(([^)]+)\)', content):
+        image_url = match.group(2).strip()
+        if is_valid_image_url(image_url):
+            markdown_images.append(image_url)
+
+    html_images = []
+    soup = BeautifulSoup(content, 'html.parser')
+    for img in soup.find_all('img'):
+        src = img.get('src')
+        if src and is_valid_image_url(src):
+            html_images.append(src.strip())
+
+    return list(set(markdown_images + html_images))
+
+
+def generate_readme(size_kb, seed=0):
+    """生成接近真实项目的README：顶部徽章、正文、代码块、HTML表格中的截图、末尾的引用定义"""
+    rng = random.Random(seed)
+    words = ['install', 'config', 'server', 'client', 'plugin', 'render', 'stream', 'cache', 'build', 'deploy']
+    parts = [
+        '<p align="center"><img src="https://raw.githubusercontent.com/o/r/main/docs/logo.png" width="200"></p>\n',
+        ''.join(f'[![badge{i}](https://img.shields.io/badge/b-{i}-green.svg)](https://x/{i}) ' for i in range(8)) + '\n\n'
+    ]
+    section = 0
+    while sum(len(part) for part in parts) < size_kb * 1024:
+        section += 1
+        parts.append(f'## Section {section}\n\n')
+        parts.append(' '.join(rng.choice(words) for _ in range(120)) + '\n\n')
+        parts.append('```bash\nnpm install foo\n![not-an-image](code.png)\n```\n\n')
+        if section % 3 == 0:
+            parts.append(f'![screenshot {section}](docs/screenshot-{section}.png "Screenshot")\n\n')
+        if section % 5 == 0:
+            parts.append(f'<table><tr><td><img alt="demo" src="docs/demo-{section}.gif"></td>'
+                         f'<td>{rng.choice(words)}</td></tr></table>\n\n')
+        if section % 7 == 0:
+            parts.append(f'![diagram][diagram-{section}]\n\n')
+    parts.append('\n'.join(f'[diagram-{i}]: docs/diagram-{i}.svg' for i in range(7, section + 1, 7)) + '\n')
+    return ''.join(parts)
+
+
+def measure(func, repeat):
+    """返回多次运行耗时（毫秒）的中位数"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='README图片提取基准测试')
+    parser.add_argument('--sizes', default='100,1000,5000', help='README大小（KB），逗号分隔')
+    parser.add_argument('--repeat', type=int, default=5, help='每项重复次数')
+    parser.add_argument('--limit', type=int, default=5, help='提取器取到多少个候选后停止')
+    args = parser.parse_args()
+
+    try:
+        import bs4  # noqa: F401
+        has_bs4 = True
+    except ImportError:
+        has_bs4 = False
+        print('未安装beautifulsoup4，只测试新的提取器')
+
+    print(f"{'大小':>8} {'原实现(ms)':>12} {'全文扫描(ms)':>14} {'前{}个(ms)'.format(args.limit):>12} {'加速比':>8}")
+    for size_kb in [int(size) for size in args.sizes.split(',')]:
+        readme = generate_readme(size_kb)
+
+        full = extract_image_urls(readme, is_valid=is_valid_image_url)
+        full_ms = measure(lambda: extract_image_urls(readme, is_valid=is_valid_image_url), args.repeat)
+        limited_ms = measure(lambda: extract_image_urls(readme, is_valid=is_valid_image_url, limit=args.limit),
+                             args.repeat)
+
+        if has_bs4:
+            legacy = legacy_extract(readme)
+            # 新提取器额外支持引用式图片，并跳过代码块中的图片
+            missing = set(legacy) - set(full) - {'code.png'}
+            if missing:
+                print(f'警告：新的提取器缺少 {len(missing)} 个图片，例如 {sorted(missing)[:3]}')
+            legacy_ms = measure(lambda: legacy_extract(readme), args.repeat)
+            print(f'{size_kb:>6}KB {legacy_ms:>12.1f} {full_ms:>14.1f} {limited_ms:>12.3f} {legacy_ms / limited_ms:>7.0f}x')
+        else:
+            print(f'{size_kb:>6}KB {"-":>12} {full_ms:>14.1f} {limited_ms:>12.3f} {"-":>8}')
@@ -14,7 +14,6 @@ import os
 import sys
 import json
 import time
-import requests
 import re
 import shutil
 import hashlib
@@ -32,6 +31,9 @@ from app.models.weekly_report import WeeklyReport
 from app.models.repository import Repository
 from app.models.ai_summary import AISummary
 from app.models.repository_image import RepositoryImage
+from app.services.http_pool import HTTPSessionPool, get_shared_pool, raise_for_status
+from app.services.rate_limiter import RateLimitScheduler
+from app.services.retry import RetryPolicy
 
 # 配置参数
 CONFIG = {
@@ -60,8 +62,18 @@ for dir_path in [DATA_DIR, ARCHIVE_DIR, IMAGES_DIR, BACKUP_DIR]:
 class GitHubAPI:
     """GitHub API客户端"""
     
-    def __init__(self):
+    def __init__(self, pool: HTTPSessionPool = None, scheduler: RateLimitScheduler = None,
+                 retry_policy: RetryPolicy = None):
         self.base_url = 'https://api.github.com'
+        # 使用共享连接池，复用TCP+TLS连接
+        self.pool = pool or get_shared_pool()
+        # 所有请求经过速率限制调度器
+        self.scheduler = scheduler or RateLimitScheduler()
+        # 5xx和网络错误的重试以及按接口熔断
+        self.retry_policy = retry_policy or RetryPolicy(
+            retry_attempts=CONFIG['retry_attempts'],
+            retry_delay=CONFIG['retry_delay'] / 1000
+        )
         self.token = os.environ.get('GITHUB_TOKEN')
         self.headers = {
             'Accept': 'application/vnd.github.v3+json',
@@ -74,8 +86,12 @@ class GitHubAPI:
     def get(self, endpoint: str, params: Dict = None) -> Dict:
         """发送GET请求"""
         url = f'{self.base_url}{endpoint}'
-        response = requests.get(url, headers=self.headers, params=params, timeout=CONFIG['timeout'])
-        response.raise_for_status()
+        resource = self.scheduler.resource_for(endpoint)
+        response = self.retry_policy.call('GET', endpoint, lambda: self.scheduler.execute(
+            resource,
+            lambda: self.pool.get(url, headers=self.headers, params=params, timeout=CONFIG['timeout'])
+        ))
+        raise_for_status(response)
         return response.json()
     
     def get_trending_repos(self, since: str = 'weekly', language: str = '', limit: int = 10) -> List[Dict]:
@@ -322,6 +338,8 @@ class GitHubTrendingCrawler:
     
     def run(self) -> Dict:
         """运行爬取流程"""
+        # 共享连接池的统计在进程内累计，只报告本次爬取的部分
+        pool_mark = self.github_api.pool.stats.mark()
         try:
             print('启动GitHub趋势项目爬取')
             print('爬取时间范围:', self.since)
@@ -392,10 +410,22 @@ class GitHubTrendingCrawler:
             print(f'报告文件: {save_result["weekly_report_path"]}')
             print(f'档案文件: {save_result["archives_path"]}')
             
+            http_stats = self.github_api.pool.get_stats(since=pool_mark)
+            print(f'HTTP连接池统计: 请求 {http_stats["requests"]} 次, 新建连接 {http_stats["connections"]} 个, '
+                  f'复用连接 {http_stats["reused"]} 次')
+            http_stats['retry'] = self.github_api.retry_policy.get_stats()
+            print(f'重试统计: 重试 {http_stats["retry"]["retries"]} 次, 失败 {http_stats["retry"]["failures"]} 次, '
+                  f'熔断 {http_stats["retry"]["breaker_trips"]} 次, 熔断跳过 {http_stats["retry"]["short_circuited"]} 次')
+            http_stats['rate_limit'] = self.github_api.scheduler.get_report()
+            for resource, usage in http_stats['rate_limit'].items():
+                print(f'API额度 [{resource}]: 请求 {usage["requests"]} 次, 消耗 {usage["consumed"]} 点, '
+                      f'剩余 {usage["remaining"]}, 限流 {usage["throttled"]} 次, 等待 {usage["waited_seconds"]} 秒')
+            
             return {
                 'success': True,
                 'report': report,
-                'save_result': save_result
+                'save_result': save_result,
+                'http_stats': http_stats
             }
             
         except Exception as e:
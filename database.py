@@ -27,6 +27,26 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # 创建基类
 Base = declarative_base()
 
+def ensure_columns():
+    """为已存在的表补充模型中新增的列和索引（create_all不会修改已有的表）"""
+    from sqlalchemy import inspect, text
+    
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                print(f"已为表 {table.name} 添加列 {column.name}")
+            # 新增列上的索引（如repository_images.sha256）同样不会由create_all补建
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
 # 数据库依赖
 def get_db():
     """获取数据库会话"""
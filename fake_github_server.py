@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+本地GitHub API模拟服务器
+用于离线压测和基准测试爬虫，不请求 api.github.com。提供以下接口：
+  GET  /search/repositories          支持 pushed:、stars:、language: 条件，按stars降序分页，最多返回前1000条
+  GET  /repos/{owner}/{repo}         仓库详情
+  GET  /repos/{owner}/{repo}/readme  README（JSON+base64，Accept为raw时返回原文）
+  GET  /repos/{owner}/{repo}/languages
+  POST /graphql                      不支持，返回errors，爬虫会回退到REST接口
+  GET  /__stats                      各接口的请求计数
+响应带ETag（支持If-None-Match返回304）和 X-RateLimit-* 头，可配置延迟、额度和错误注入。
+
+数据来源（三选一）：
+  默认生成确定性的合成仓库（--repos 数量，--seed 随机种子）
+  --fixtures <文件>     录制的数据，格式为 {"repos": [...], "readmes": {full_name: 文本}, "languages": {full_name: {...}}}
+  --from-report <文件>  从已保存的报告（如 data/current.json）生成
+
+用法：
+  python fake_github_server.py --port 8765 --latency 50 --error-rate 0.02
+  GITHUB_API_URL=http://127.0.0.1:8765 python python_crawler.py -l 200
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+LANGUAGES = ['Python', 'JavaScript', 'TypeScript', 'Go', 'Rust', 'Java', 'C++', 'C#', 'Ruby', 'PHP']
+TECH_WORDS = ['React', 'Vue.js', 'Docker', 'Kubernetes', 'PostgreSQL', 'Redis', 'FastAPI', 'Django',
+              'Express', 'TensorFlow', 'PyTorch', 'GraphQL', 'Kafka', 'Next.js', 'Tailwind CSS']
+SEARCH_RESULT_CAP = 1000
+
+# 资源 -> (每个窗口的额度, 窗口秒数)，与GitHub对已认证请求的限制一致
+DEFAULT_RATE_LIMITS = {
+    'core': (5000, 3600),
+    'search': (30, 60)
+}
+
+
+def _iso(value: datetime) -> str:
+    return value.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def synthetic_fixtures(count: int, seed: int = 0, readme_bytes: int = 4096) -> Dict:
+    """生成确定性的合成数据：stars按长尾分布，pushed_at分布在最近两周内"""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    repos, readmes, languages = [], {}, {}
+    for i in range(count):
+        owner, name = f'owner{i % 97}', f'repo-{i}'
+        full_name = f'{owner}/{name}'
+        language = LANGUAGES[i % len(LANGUAGES)]
+        stars = int(60 + 200000 / (1 + i * rng.uniform(0.5, 1.5)))
+        pushed_at = now - timedelta(minutes=rng.randint(0, 14 * 24 * 60))
+        repos.append({
+            'id': 100000 + i,
+            'node_id': f'R_{100000 + i}',
+            'name': name,
+            'full_name': full_name,
+            'owner': {'login': owner, 'avatar_url': f'https://avatars.example/{owner}',
+                      'html_url': f'https://github.com/{owner}'},
+            'html_url': f'https://github.com/{full_name}',
+            'description': f'Synthetic {language} project #{i}',
+            'created_at': _iso(now - timedelta(days=rng.randint(30, 2000))),
+            'updated_at': _iso(pushed_at),
+            'pushed_at': _iso(pushed_at),
+            'stargazers_count': stars,
+            'watchers_count': stars,
+            'forks_count': stars // 10,
+            'open_issues_count': rng.randint(0, 200),
+            'language': language,
+            'topics': rng.sample([word.lower().replace(' ', '-') for word in TECH_WORDS], 3),
+            'default_branch': 'main'
+        })
+        words = rng.sample(TECH_WORDS, 4)
+        body = f'# {name}\n\n![screenshot](docs/screenshot.png)\n\nBuilt with {", ".join(words)}.\n\n'
+        filler = 'Lorem ipsum dolor sit amet, consectetur adipiscing elit. '
+        readmes[full_name] = body + filler * max(0, (readme_bytes - len(body)) // len(filler))
+        languages[full_name] = {language: rng.randint(10000, 500000), 'Shell': rng.randint(100, 5000)}
+    return {'repos': repos, 'readmes': readmes, 'languages': languages}
+
+
+def fixtures_from_report(report_file: str) -> Dict:
+    """从已保存的报告生成数据，README按描述和技术栈生成"""
+    with open(report_file, 'r', encoding='utf-8') as f:
+        report = json.load(f)
+    repos, readmes, languages = [], {}, {}
+    for repo in report.get('data', []):
+        full_name = repo['full_name']
+        owner, name = full_name.split('/', 1)
+        repos.append({
+            **{key: value for key, value in repo.items()
+               if key not in ('languages', 'primary_language', 'tech_stack', 'image_info', 'enriched_at')},
+            'name': name,
+            'owner': {'login': owner, **(repo.get('owner') or {})},
+            'default_branch': repo.get('default_branch', 'main')
+        })
+        readmes[full_name] = f'# {name}\n\n{repo.get("description") or ""}\n\n' + \
+            '\n'.join(f'- {tech}' for tech in repo.get('tech_stack') or [])
+        languages[full_name] = repo.get('languages') or {}
+    return {'repos': repos, 'readmes': readmes, 'languages': languages}
+
+
+def parse_range(value: str) -> Tuple[Optional[str], Optional[str], bool]:
+    """解析搜索条件中的范围：>x、>=x、<x、a..b、a..*；返回 (下限, 上限, 下限是否不含等号)"""
+    if value.startswith('>='):
+        return value[2:], None, False
+    if value.startswith('>'):
+        return value[1:], None, True
+    if value.startswith('<='):
+        return None, value[2:], False
+    if value.startswith('<'):
+        return None, value[1:], False
+    if '..' in value:
+        low, high = value.split('..', 1)
+        return (None if low == '*' else low), (None if high == '*' else high), False
+    return value, value, False
+
+
+def match_query(repo: Dict, query: str) -> bool:
+    """按 pushed:、stars:、language: 条件过滤，其他条件忽略"""
+    for qualifier, value in re.findall(r'(\w+):(\S+)', query):
+        if qualifier == 'language':
+            if (repo.get('language') or '').lower() != value.strip('"').lower():
+                return False
+        elif qualifier == 'stars':
+            low, high, exclusive = parse_range(value)
+            stars = repo.get('stargazers_count', 0)
+            if low is not None and (stars <= int(low) if exclusive else stars < int(low)):
+                return False
+            if high is not None and stars > int(high):
+                return False
+        elif qualifier == 'pushed':
+            low, high, exclusive = parse_range(value)
+            pushed = (repo.get('pushed_at') or '')[:10]
+            if low is not None and (pushed <= low if exclusive else pushed < low):
+                return False
+            if high is not None and pushed > high:
+                return False
+    return True
+
+
+class RateLimitWindow:
+    """一个资源的固定窗口额度"""
+
+    def __init__(self, limit: int, period: int):
+        self.limit = limit
+        self.period = period
+        self.used = 0
+        self.reset_at = int(time.time()) + period
+
+    def consume(self) -> bool:
+        """消耗一个额度，额度耗尽时返回False"""
+        now = int(time.time())
+        if now >= self.reset_at:
+            self.used = 0
+            self.reset_at = now + self.period
+        if self.used >= self.limit:
+            return False
+        self.used += 1
+        return True
+
+    def headers(self, resource: str) -> Dict[str, str]:
+        return {
+            'X-RateLimit-Limit': str(self.limit),
+            'X-RateLimit-Remaining': str(max(0, self.limit - self.used)),
+            'X-RateLimit-Reset': str(self.reset_at),
+            'X-RateLimit-Used': str(self.used),
+            'X-RateLimit-Resource': resource
+        }
+
+
+class FakeGitHubServer:
+    """模拟GitHub REST API的本地服务器，可在后台线程中运行（start/stop）"""
+
+    def __init__(self, fixtures: Dict, host: str = '127.0.0.1', port: int = 0,
+                 latency_ms: float = 0, jitter_ms: float = 0, error_rate: float = 0,
+                 error_statuses: Tuple[int, ...] = (500, 502, 503), secondary_limit_rate: float = 0,
+                 rate_limits: Dict[str, Tuple[int, int]] = None, seed: int = 0):
+        self.repos: List[Dict] = sorted(fixtures['repos'], key=lambda r: r.get('stargazers_count', 0), reverse=True)
+        self.by_name: Dict[str, Dict] = {repo['full_name'].lower(): repo for repo in self.repos}
+        self.readmes: Dict[str, str] = {name.lower(): text for name, text in fixtures.get('readmes', {}).items()}
+        self.languages: Dict[str, Dict] = {name.lower(): value for name, value in fixtures.get('languages', {}).items()}
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.error_statuses = error_statuses
+        self.secondary_limit_rate = secondary_limit_rate
+        self.windows = {resource: RateLimitWindow(limit, period)
+                        for resource, (limit, period) in {**DEFAULT_RATE_LIMITS, **(rate_limits or {})}.items()}
+        self.random = random.Random(seed)
+        self.stats = Counter()
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'FakeGitHubServer':
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> 'FakeGitHubServer':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return dict(self.stats)
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def _roll(self, rate: float) -> bool:
+        with self._lock:
+            return rate > 0 and self.random.random() < rate
+
+    def _consume(self, window: RateLimitWindow, resource: str) -> Optional[Dict[str, str]]:
+        """消耗额度并返回额度响应头，额度耗尽时返回None"""
+        with self._lock:
+            return window.headers(resource) if window.consume() else None
+
+    def _error_status(self) -> int:
+        with self._lock:
+            return self.random.choice(self.error_statuses)
+
+    def _sleep(self) -> None:
+        if self.latency or self.jitter:
+            with self._lock:
+                delay = self.latency + self.random.uniform(0, self.jitter)
+            time.sleep(delay)
+
+    def search(self, params: Dict[str, List[str]]) -> Tuple[int, Dict]:
+        query = params.get('q', [''])[0]
+        per_page = min(int(params.get('per_page', ['30'])[0]), 100)
+        page = int(params.get('page', ['1'])[0])
+        if page * per_page > SEARCH_RESULT_CAP:
+            return 422, {'message': 'Only the first 1000 search results are available'}
+        matched = [repo for repo in self.repos if match_query(repo, query)]
+        items = matched[(page - 1) * per_page:page * per_page]
+        return 200, {'total_count': len(matched), 'incomplete_results': False, 'items': items}
+
+    def route(self, method: str, path: str, params: Dict[str, List[str]], accept: str):
+        """返回 (状态码, 资源, JSON或原始字节)"""
+        if method == 'POST' and path == '/graphql':
+            return 200, 'graphql', {'errors': [{'message': 'GraphQL is not supported by the fake server'}]}
+        if path == '/search/repositories':
+            status, body = self.search(params)
+            return status, 'search', body
+
+        match = re.fullmatch(r'/repos/([^/]+)/([^/]+)(/readme|/languages)?', path)
+        if not match:
+            return 404, 'core', {'message': 'Not Found'}
+        full_name = f'{match.group(1)}/{match.group(2)}'.lower()
+        repo = self.by_name.get(full_name)
+        if repo is None:
+            return 404, 'core', {'message': 'Not Found'}
+        if match.group(3) == '/languages':
+            return 200, 'core', self.languages.get(full_name, {repo['language']: 1000} if repo.get('language') else {})
+        if match.group(3) == '/readme':
+            readme = self.readmes.get(full_name)
+            if readme is None:
+                return 404, 'core', {'message': 'Not Found'}
+            data = readme.encode('utf-8')
+            if 'raw' in accept:
+                return 200, 'core', data
+            return 200, 'core', {
+                'name': 'README.md',
+                'path': 'README.md',
+                'size': len(data),
+                'encoding': 'base64',
+                'content': base64.encodebytes(data).decode('ascii'),
+                'download_url': f'https://raw.githubusercontent.com/{repo["full_name"]}/main/README.md'
+            }
+        return 200, 'core', repo
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                self.handle_request('GET')
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                self.rfile.read(length)
+                self.handle_request('POST')
+
+            def handle_request(self, method: str) -> None:
+                parsed = urlparse(self.path)
+                if parsed.path == '/__stats':
+                    return self.send_json(200, server.get_stats(), {})
+
+                server._sleep()
+                endpoint = re.sub(r'^/repos/[^/]+/[^/]+', '/repos/{repo}', parsed.path)
+                server._count(f'{method} {endpoint}')
+
+                if server._roll(server.error_rate):
+                    server._count('injected_errors')
+                    return self.send_json(server._error_status(), {'message': 'Injected error'}, {})
+                if server._roll(server.secondary_limit_rate):
+                    server._count('secondary_limits')
+                    return self.send_json(403, {'message': 'You have exceeded a secondary rate limit.'},
+                                          {'Retry-After': '1'})
+
+                status, resource, body = server.route(method, parsed.path, parse_qs(parsed.query),
+                                                      self.headers.get('Accept', ''))
+                window = server.windows.get(resource)
+                headers = {}
+                if window is not None:
+                    headers = server._consume(window, resource)
+                    if headers is None:
+                        server._count('rate_limited')
+                        return self.send_json(403, {'message': 'API rate limit exceeded.'}, window.headers(resource))
+                self.send_json(status, body, headers)
+
+            def send_json(self, status: int, body, headers: Dict[str, str]) -> None:
+                if isinstance(body, bytes):
+                    data, content_type = body, 'application/vnd.github.raw'
+                else:
+                    data, content_type = json.dumps(body).encode('utf-8'), 'application/json; charset=utf-8'
+                etag = f'"{hashlib.sha1(data).hexdigest()}"'
+                if status == 200 and self.headers.get('If-None-Match') == etag:
+                    server._count('not_modified')
+                    status, data = 304, b''
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                if status in (200, 304):
+                    self.send_header('ETag', etag)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='本地GitHub API模拟服务器')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--repos', type=int, default=2000, help='合成仓库数量')
+    parser.add_argument('--readme-bytes', type=int, default=4096, help='合成README的大小')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子（合成数据、延迟抖动和错误注入）')
+    parser.add_argument('--fixtures', help='录制的数据文件（JSON）')
+    parser.add_argument('--from-report', help='从已保存的报告生成数据')
+    parser.add_argument('--dump-fixtures', help='把使用的数据写入文件后退出')
+    parser.add_argument('--latency', type=float, default=0, help='每个请求的固定延迟（毫秒）')
+    parser.add_argument('--jitter', type=float, default=0, help='额外的随机延迟上限（毫秒）')
+    parser.add_argument('--error-rate', type=float, default=0, help='返回5xx错误的概率')
+    parser.add_argument('--secondary-limit-rate', type=float, default=0, help='返回二级限流（403+Retry-After）的概率')
+    parser.add_argument('--core-limit', type=int, default=DEFAULT_RATE_LIMITS['core'][0], help='core资源每小时额度')
+    parser.add_argument('--search-limit', type=int, default=DEFAULT_RATE_LIMITS['search'][0], help='search资源每分钟额度')
+    args = parser.parse_args()
+
+    if args.fixtures:
+        with open(args.fixtures, 'r', encoding='utf-8') as f:
+            fixtures = json.load(f)
+    elif args.from_report:
+        fixtures = fixtures_from_report(args.from_report)
+    else:
+        fixtures = synthetic_fixtures(args.repos, args.seed, args.readme_bytes)
+
+    if args.dump_fixtures:
+        with open(args.dump_fixtures, 'w', encoding='utf-8') as f:
+            json.dump(fixtures, f, ensure_ascii=False)
+        print(f"已写入 {len(fixtures['repos'])} 个仓库的数据到 {args.dump_fixtures}")
+        raise SystemExit(0)
+
+    server = FakeGitHubServer(
+        fixtures, args.host, args.port,
+        latency_ms=args.latency, jitter_ms=args.jitter,
+        error_rate=args.error_rate, secondary_limit_rate=args.secondary_limit_rate,
+        rate_limits={'core': (args.core_limit, 3600), 'search': (args.search_limit, 60)},
+        seed=args.seed
+    )
+    print(f"模拟GitHub API已启动: {server.url}（{len(server.repos)} 个仓库）")
+    print(f"使用方式: GITHUB_API_URL={server.url} python python_crawler.py")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        print('\n已停止')
+    finally:
+        server.httpd.server_close()
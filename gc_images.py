@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+回收内容寻址存储中不再被引用的图片，以及原图已被回收的缩略图/WebP/AVIF变体
+引用来源：数据库中 RepositoryImage.sha256，以及 data/ 下所有报告JSON中的 image_info.images[].sha256
+"""
+
+import json
+import sys
+from pathlib import Path
+
+from app.services.blob_store import BlobStore, DEFAULT_GC_GRACE_SECONDS
+
+BASE_DIR = Path(__file__).parent
+DATA_DIR = BASE_DIR / 'data'
+BACKUP_DIR = BASE_DIR / 'backups'
+ARCHIVE_DIR = BASE_DIR / 'archives'
+BLOB_DIR = BASE_DIR / 'images' / 'blobs'
+VARIANTS_DIR = BASE_DIR / 'images' / 'variants'
+
+
+def collect_report_hashes(*report_dirs: Path) -> set:
+    """收集报告JSON中引用的blob，报告目录、备份和档案中的报告都算作引用"""
+    hashes = set()
+    report_files = (path for report_dir in report_dirs if report_dir.exists() for path in report_dir.rglob('*.json'))
+    for report_file in report_files:
+        try:
+            with open(report_file, 'r', encoding='utf-8') as f:
+                report = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if not isinstance(report, dict):
+            continue
+        for repo in report.get('data', []):
+            for image in (repo.get('image_info') or {}).get('images', []):
+                if image.get('sha256'):
+                    hashes.add(image['sha256'])
+    return hashes
+
+
+def collect_db_hashes() -> set:
+    """收集数据库中RepositoryImage引用的blob"""
+    from database import SessionLocal
+    from app.models import RepositoryImage
+
+    db = SessionLocal()
+    try:
+        rows = db.query(RepositoryImage.sha256).filter(RepositoryImage.sha256.isnot(None)).distinct()
+        return {row[0] for row in rows}
+    finally:
+        db.close()
+
+
+def remove_orphan_variants(variants_dir: Path, store: BlobStore, dry_run: bool) -> int:
+    """删除原图已不在存储中的变体文件（文件名为 <sha256>-<variant>.<ext>）"""
+    if not variants_dir.exists():
+        return 0
+    stored = set(store.list_hashes())
+    removed = 0
+    for path in variants_dir.iterdir():
+        if path.is_file() and path.name.split('-', 1)[0] not in stored:
+            removed += 1
+            if not dry_run:
+                path.unlink()
+    return removed
+
+
+if __name__ == "__main__":
+    dry_run = '--dry-run' in sys.argv
+
+    if not BLOB_DIR.exists():
+        print(f"图片存储目录不存在：{BLOB_DIR}")
+        sys.exit(0)
+
+    referenced = collect_report_hashes(DATA_DIR, BACKUP_DIR, ARCHIVE_DIR) | collect_db_hashes()
+    print(f"共 {len(referenced)} 个图片仍被报告或数据库引用")
+
+    store = BlobStore(BLOB_DIR)
+    try:
+        result = store.gc(referenced, grace_seconds=DEFAULT_GC_GRACE_SECONDS, dry_run=dry_run)
+        variants_removed = remove_orphan_variants(VARIANTS_DIR, store, dry_run)
+    finally:
+        store.close()
+
+    action = "可回收" if dry_run else "已回收"
+    print(f"{action} {result['removed']} 个图片，释放 {result['freed_bytes']} 字节")
+    print(f"{action} {variants_removed} 个图片变体")
@@ -128,7 +128,11 @@ def import_data(json_file_path):
                             filepath=img_path,
                             original_url=img.get('url', ''),
                             absolute_url=img_path,
-                            is_representative=j == 0  # 假设第一张图片是代表性图片
+                            is_representative=j == 0,  # 假设第一张图片是代表性图片
+                            sha256=img.get('sha256'),
+                            width=img.get('width'),
+                            height=img.get('height'),
+                            variants=img.get('variants')
                         )
                         db.add(repository_image)
                         print(f"  - 创建图片记录：{img_filename}")
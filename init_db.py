@@ -5,7 +5,7 @@
 
 import os
 import logging
-from database import Base, engine, SessionLocal
+from database import Base, engine, SessionLocal, ensure_columns
 from app.models import WeeklyReport, Repository, RepositoryImage, AISummary, RepositoryStatistic
 
 logging.basicConfig(level=logging.INFO)
@@ -17,6 +17,7 @@ def init_db():
         logger.info("创建数据库表...")
         # 创建所有表
         Base.metadata.create_all(bind=engine)
+        ensure_columns()
         logger.info("数据库表创建成功")
         
         # 检查是否需要初始化数据
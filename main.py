@@ -22,13 +22,14 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # 导入数据库配置
-from database import Base, engine, get_db
+from database import Base, engine, get_db, ensure_columns
 
 # 导入所有模型，确保表结构被正确注册
 from app.models import WeeklyReport, Repository, RepositoryImage, AISummary, RepositoryStatistic
 
-# 初始化数据库 - 创建所有表
+# 初始化数据库 - 创建所有表，并为已有的表补充新增的列
 Base.metadata.create_all(bind=engine)
+ensure_columns()
 
 # 初始化数据函数
 def init_data():
@@ -167,7 +168,11 @@ def init_data():
                             filepath=img_path,
                             original_url=img.get('url', ''),
                             absolute_url=img_path,
-                            is_representative=j == 0
+                            is_representative=j == 0,
+                            sha256=img.get('sha256'),
+                            width=img.get('width'),
+                            height=img.get('height'),
+                            variants=img.get('variants')
                         )
                         db.add(repository_image)
         
@@ -201,13 +206,14 @@ app.add_middleware(
 )
 
 # 导入路由
-from app.routes import trending, statistics, update, auth
+from app.routes import trending, statistics, update, auth, images
 
 # 注册路由
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(trending.router, prefix="/api/trending", tags=["trending"])
 app.include_router(statistics.router, prefix="/api", tags=["statistics"])
 app.include_router(update.router, prefix="/api/update", tags=["update"])
+app.include_router(images.router, prefix="/api/images", tags=["images"])
 
 # 静态文件服务
 app.mount("/", StaticFiles(directory="public", html=True), name="public")
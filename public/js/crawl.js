@@ -93,11 +93,8 @@ export async function crawlTrendingData() {
             };
             console.log('发送的认证数据:', requestData);
             
-            // 开始轮询进度
-            let progressInterval;
-            
-            // 发送爬取请求
-            const responsePromise = fetch(`${API_BASE_URL}/api/update/trending/update`, {
+            // 创建爬取任务，服务器立即返回任务ID，爬取在后台执行
+            const response = await fetch(`${API_BASE_URL}/api/update/trending/update`, {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json'
@@ -105,68 +102,48 @@ export async function crawlTrendingData() {
                 body: JSON.stringify(requestData),
                 credentials: 'include' // 添加此选项，确保跨域请求能够正确发送认证凭据
             });
+            const data = await response.json();
 
-            // 开始轮询进度，直到收到响应
-            progressInterval = setInterval(async () => {
-                try {
-                    const progressResponse = await fetch(`${API_BASE_URL}/api/update/trending/update/progress`);
-                    
-                    if (progressResponse.ok) {
-                        const progressData = await progressResponse.json();
-                        
-                        if (progressBar) {
-                            const progress = Math.min(100, Math.round((progressData.completed / progressData.total) * 100));
-                            progressBar.style.width = `${progress}%`;
-                            progressBar.setAttribute('aria-valuenow', progress);
-                        }
-                        
-                        if (progressMessage) {
-                            progressMessage.textContent = progressData.message || '爬取中...';
-                        }
-                        
-                        // 不要在这里停止轮询，直到收到响应
-                    }
-                } catch (error) {
-                    console.error('获取进度失败:', error);
+            if (!response.ok) {
+                if (progressDiv) {
+                    progressDiv.style.display = 'none';
                 }
-            }, 1000);
+                // 如果返回401状态码，显示需要登录的提示
+                if (response.status === 401) {
+                    showToast('爬取失败：请先登录管理员账号', 'warning');
+                } else {
+                    showToast(`爬取失败: ${data.detail || data.message || data.error || '未知错误'}`, 'error');
+                }
+                return;
+            }
 
-            // 等待爬取请求完成
-            const response = await responsePromise;
-            const data = await response.json();
+            // 其他管理员已经触发的爬取正在执行时，合并到该任务
+            if (data.coalesced) {
+                showToast(data.message, 'info');
+            }
+
+            // 接收服务器推送的任务进度直到完成或失败（浏览器不支持或连接失败时改为轮询）
+            const job = await followCrawlJob(data.job_id, progressBar, progressMessage);
 
-            // 停止轮询
-            clearInterval(progressInterval);
-            
             // 隐藏进度条
             if (progressDiv) {
                 progressDiv.style.display = 'none';
             }
 
-            if (response.ok) {
-                if (data.success) {
-                    showToast('数据爬取成功！', 'success');
-                    // 重新加载页面数据
-                    if (document.querySelector('#latest-link').classList.contains('active')) {
-                        getLatestTrendingData();
-                    } else if (document.querySelector('#dashboard-link').classList.contains('active')) {
-                        if (window.getStatistics) {
-                            window.getStatistics();
-                        }
-                    } else if (document.querySelector('#history-link').classList.contains('active')) {
-                        getHistoryList();
+            if (job.status === 'completed') {
+                showToast('数据爬取成功！', 'success');
+                // 重新加载页面数据
+                if (document.querySelector('#latest-link').classList.contains('active')) {
+                    getLatestTrendingData();
+                } else if (document.querySelector('#dashboard-link').classList.contains('active')) {
+                    if (window.getStatistics) {
+                        window.getStatistics();
                     }
-                } else {
-                    // 后端返回了成功的HTTP状态码，但数据中包含错误信息
-                    showToast(`爬取失败: ${data.message || data.error || '未知错误'}`, 'error');
+                } else if (document.querySelector('#history-link').classList.contains('active')) {
+                    getHistoryList();
                 }
             } else {
-                // 如果返回401状态码，显示需要登录的提示
-                if (response.status === 401) {
-                    showToast('爬取失败：请先登录管理员账号', 'warning');
-                } else {
-                    showToast(`爬取失败: ${data.detail || data.message || data.error || '未知错误'}`, 'error');
-                }
+                showToast(`爬取失败: ${job.error || job.message || '未知错误'}`, 'error');
             }
         } catch (error) {
             console.error('爬取数据错误:', error);
@@ -180,6 +157,75 @@ export async function crawlTrendingData() {
     });
 }
 
+// 更新进度条和进度信息
+function renderCrawlProgress(progressData, progressBar, progressMessage) {
+    if (progressBar && progressData.total) {
+        const progress = Math.min(100, Math.round((progressData.completed / progressData.total) * 100));
+        progressBar.style.width = `${progress}%`;
+        progressBar.setAttribute('aria-valuenow', progress);
+    }
+    if (progressMessage) {
+        let text = progressData.message || '爬取中...';
+        if (progressData.eta_seconds) {
+            text += `，预计还需 ${Math.ceil(progressData.eta_seconds)} 秒`;
+        }
+        if (progressData.error_count) {
+            text += `（${progressData.error_count} 个仓库获取出错）`;
+        }
+        progressMessage.textContent = text;
+    }
+}
+
+// 跟踪爬取任务直到完成或失败：优先使用服务器推送的进度事件，事件流不可用时改为轮询
+async function followCrawlJob(jobId, progressBar, progressMessage) {
+    if (window.EventSource) {
+        const job = await streamCrawlJob(jobId, progressBar, progressMessage);
+        if (job) {
+            return job;
+        }
+    }
+    return waitForCrawlJob(jobId, progressBar, progressMessage);
+}
+
+// 通过Server-Sent Events接收任务进度，任务结束时返回任务信息；连接出错时返回null
+function streamCrawlJob(jobId, progressBar, progressMessage) {
+    return new Promise(resolve => {
+        const source = new EventSource(`${API_BASE_URL}/api/update/jobs/${jobId}/events`, { withCredentials: true });
+        source.addEventListener('progress', event => {
+            const job = JSON.parse(event.data);
+            renderCrawlProgress(job, progressBar, progressMessage);
+            if (job.status === 'completed' || job.status === 'failed') {
+                source.close();
+                resolve(job);
+            }
+        });
+        // 服务器在任务结束后关闭连接，此前出现的错误（连接失败、被代理断开）都交给轮询处理
+        source.onerror = () => {
+            source.close();
+            resolve(null);
+        };
+    });
+}
+
+// 每秒查询一次爬取任务，任务完成或失败时返回任务信息
+async function waitForCrawlJob(jobId, progressBar, progressMessage) {
+    while (true) {
+        try {
+            const jobResponse = await fetch(`${API_BASE_URL}/api/update/jobs/${jobId}?_=${Date.now()}`, { cache: 'no-cache' });
+            if (jobResponse.ok) {
+                const job = await jobResponse.json();
+                renderCrawlProgress(job, progressBar, progressMessage);
+                if (job.status === 'completed' || job.status === 'failed') {
+                    return job;
+                }
+            }
+        } catch (error) {
+            console.error('获取任务状态失败:', error);
+        }
+        await new Promise(resolve => setTimeout(resolve, 1000));
+    }
+}
+
 // 获取最新趋势数据
 export async function getLatestTrendingData() {
     showLoading();
@@ -367,6 +413,15 @@ export async function calculateTrendStatus(currentRepos, historicalData) {
     });
 }
 
+// 获取代表图片的地址，内容寻址存储的图片通过图片接口按浏览器支持的格式返回缩略图
+function getImageUrl(repo, variant) {
+    const image = repo.images.representative_image;
+    if (image.sha256) {
+        return `/api/images/${image.sha256}?variant=${variant}`;
+    }
+    return `/images/${repo.full_name.replace('/', '-')}-${image.filename}`;
+}
+
 // 生成项目卡片
 export function generateRepoCard(repo, index) {
     const trendBadge = getTrendBadge(repo.trend);
@@ -377,7 +432,7 @@ export function generateRepoCard(repo, index) {
     return `
         <div class="col-md-6 col-lg-4 mb-4">
             <div class="repo-card p-0">
-                ${shouldShowImage ? `<img src="/images/${repo.full_name.replace('/', '-')}-${repo.images.representative_image.filename}" alt="${repo.name}" class="repo-image w-100">` : ''}
+                ${shouldShowImage ? `<img src="${getImageUrl(repo, 'card')}" alt="${repo.name}" class="repo-image w-100" loading="lazy">` : ''}
                 <div class="p-4">
                     <div class="d-flex justify-content-between align-items-center mb-2">
                         <h5 class="card-title mb-0">${index + 1}. <a href="${repo.html_url}" target="_blank" class="text-decoration-none repo-name">${repo.name}</a></h5>
@@ -407,7 +462,7 @@ export function generateRepoDetail(repo) {
             ${trendBadge}
             <a href="${repo.html_url}" target="_blank" class="btn btn-sm btn-outline-primary ms-2"><i class="fa fa-external-link"></i> 访问 GitHub</a>
         </div>
-        ${hasImage ? `<img src="/images/${repo.full_name.replace('/', '-')}-${repo.images.representative_image.filename}" alt="${repo.name}" class="img-fluid rounded mb-4">` : ''}
+        ${hasImage ? `<img src="${getImageUrl(repo, 'full')}" alt="${repo.name}" class="img-fluid rounded mb-4">` : ''}
         <h5>项目简介</h5>
         <p>${repo.description || '暂无描述'}</p>
         
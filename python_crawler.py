@@ -12,22 +12,63 @@ import requests
 import re
 import shutil
 import hashlib
-import concurrent.futures
+import codecs
+import math
+import asyncio
+import contextlib
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, Callable, Tuple, Union
 from concurrent.futures import ThreadPoolExecutor
 
+from app.services.http_pool import HTTPSessionPool, get_shared_pool, raise_for_status, read_capped
+from app.services.response_cache import ResponseCache
+from app.services.rate_limiter import RateLimitScheduler
+from app.services.retry import RetryPolicy
+from app.services import github_graphql
+from app.services.search_sharding import SearchShard, SearchSharder, merge_top_k
+from app.services.enrichment_snapshot import EnrichmentSnapshot, recent_report_files
+from app.services.run_journal import RunJournal, list_runs
+from app.services.stage_pipeline import Stage, StagePipeline
+from app.services.tech_stack import get_matcher
+from app.services.image_pipeline import ImagePipeline
+from app.services.blob_store import BlobStore
+from app.services.image_variants import VariantGenerator
+from app.services.image_probe import representative_score
+from app.services.readme_images import extract_image_urls
+
 # 配置参数
 CONFIG = {
+    'github_api_url': os.getenv('GITHUB_API_URL', 'https://api.github.com'),  # 可指向本地模拟服务器
     'repo_limit': 10,
     'since': 'weekly',
     'language': '',
     'retry_attempts': 3,
     'retry_delay': 5000,  # 毫秒
+    'breaker_failure_threshold': 5,  # 同一接口连续失败多少次后熔断
+    'breaker_recovery_timeout': 60,  # 熔断后多少秒再放行探测请求
     'timeout': 30,
+    'max_concurrency': 10,  # 全局最大并发请求数
+    'per_repo_concurrency': 3,  # 单个仓库内的最大并发子请求数
+    'http_cache_max_bytes': 100 * 1024 * 1024,  # 条件请求缓存上限 100MB
+    'graphql_max_nodes': 500,  # 单次GraphQL查询的估算节点数上限
+    'graphql_concurrency': 2,  # 同时执行的GraphQL查询数
+    'search_concurrency': 3,  # 同时获取的搜索结果页数
+    'search_page_size': 100,  # 搜索接口每页最大数量
+    'search_result_cap': 1000,  # 搜索接口单个查询最多返回的结果数
+    'readme_mode': 'raw',  # README获取方式: raw（原始内容流式读取）或 json（base64信封）
+    'readme_max_bytes': 256 * 1024,  # README最多读取的字节数，技术栈和图片提取只需要开头部分
+    'enrichment_ttl_hours': 72,  # 增量模式下已保存的仓库信息最长复用时间
+    'tech_stack_limit': 8,  # 每个仓库保留的技术栈数量
+    'pipeline_queue_size': 32,  # 流式流水线各阶段之间的队列容量，队列满时上游等待（背压）
+    'run_keep': 20,  # 保留最近多少个已完成的运行记录
+    'run_max_age_days': 14,  # 超过多少天没有更新的运行记录（包括未完成的）会被删除
     'max_file_size': 5 * 1024 * 1024,  # 5MB
-    'supported_image_formats': ['.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp']
+    'supported_image_formats': ['.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp'],
+    'image_concurrency': 8,  # 同时下载的图片数
+    'image_variant_workers': None,  # 生成图片变体的进程数，None表示CPU核数
+    'image_probe_candidates': 5,  # 每个项目探测尺寸的候选图片数
+    'min_image_dimension': 48  # 宽或高小于该值的图片视为追踪像素或图标
 }
 
 # 目录配置
@@ -35,7 +76,17 @@ BASE_DIR = Path(__file__).parent
 DATA_DIR = BASE_DIR / 'data'
 ARCHIVE_DIR = BASE_DIR / 'archives'
 IMAGES_DIR = BASE_DIR / 'images'
+BLOB_DIR = IMAGES_DIR / 'blobs'  # 按SHA-256命名的图片存储
+VARIANTS_DIR = IMAGES_DIR / 'variants'  # 缩略图和WebP/AVIF变体
 BACKUP_DIR = BASE_DIR / 'backups'
+CACHE_FILE = DATA_DIR / 'cache' / 'http_cache.sqlite3'
+RUNS_DIR = DATA_DIR / 'runs'  # 断点续爬的运行记录
+
+# 技术栈词典，可通过环境变量TECH_STACK_DICTIONARY指定其他词典文件
+TECH_STACK_FILE = Path(os.getenv('TECH_STACK_DICTIONARY', BASE_DIR / 'config' / 'tech_stack.json'))
+
+# README原始内容的媒体类型，直接返回文件字节，不经过JSON+base64编码
+RAW_MEDIA_TYPE = 'application/vnd.github.raw+json'
 
 # 确保目录存在
 for dir_path in [DATA_DIR, ARCHIVE_DIR, IMAGES_DIR, BACKUP_DIR]:
@@ -45,8 +96,34 @@ for dir_path in [DATA_DIR, ARCHIVE_DIR, IMAGES_DIR, BACKUP_DIR]:
 class GitHubAPI:
     """GitHub API客户端"""
     
-    def __init__(self):
-        self.base_url = 'https://api.github.com'
+    def __init__(self, pool: HTTPSessionPool = None, cache: ResponseCache = None,
+                 scheduler: RateLimitScheduler = None, retry_policy: RetryPolicy = None,
+                 base_url: str = None):
+        # 可指向本地模拟服务器（fake_github_server.py）进行离线测试
+        self.base_url = (base_url or CONFIG['github_api_url']).rstrip('/')
+        # 使用共享连接池，复用TCP+TLS连接
+        self.pool = pool or get_shared_pool()
+        # 所有请求经过速率限制调度器
+        self.scheduler = scheduler or RateLimitScheduler(max_concurrency=CONFIG['max_concurrency'])
+        # 5xx和网络错误的重试以及按接口熔断
+        self.retry_policy = retry_policy or RetryPolicy(
+            retry_attempts=CONFIG['retry_attempts'],
+            retry_delay=CONFIG['retry_delay'] / 1000,
+            failure_threshold=CONFIG['breaker_failure_threshold'],
+            recovery_timeout=CONFIG['breaker_recovery_timeout']
+        )
+        # 条件请求缓存（可选），用于仓库详情、README和语言统计
+        self.cache = cache
+        # 强制使用分片搜索（limit超过搜索结果上限时自动启用）
+        self.sharded_search = False
+        # 增量模式的快照，命中时复用上一次保存的仓库信息
+        self.snapshot: Optional[EnrichmentSnapshot] = None
+        # 运行日志，记录每个获取完成的仓库，续爬时直接复用
+        self.journal: Optional[RunJournal] = None
+        # 最后一页搜索结果返回的时刻（perf_counter），用于统计搜索阶段耗时
+        self.last_search_at: Optional[float] = None
+        # 进度回调 (阶段, 说明, **字段)，每获取完一个仓库或出错时调用
+        self.progress: Optional[Callable[..., None]] = None
         # 从环境变量读取token
         self.token = os.environ.get('GITHUB_TOKEN')
         self.headers = {
@@ -58,26 +135,103 @@ class GitHubAPI:
             self.headers['Authorization'] = f'token {self.token}'
             print(f'使用token: {self.token[:10]}...')  # 打印token前10个字符以确认使用
     
-    def get(self, endpoint: str, params: Dict = None) -> Dict:
-        """发送GET请求"""
+    def get(self, endpoint: str, params: Dict = None, use_cache: bool = False) -> Dict:
+        """发送GET请求
+        
+        use_cache为True且配置了缓存时发送条件请求，服务端返回304则复用缓存的响应体
+        """
         url = f'{self.base_url}{endpoint}'
-        response = requests.get(url, headers=self.headers, params=params, timeout=CONFIG['timeout'])
-        response.raise_for_status()
+        headers = self.headers
+        cache_key, cached = None, None
+        if use_cache and self.cache is not None:
+            cache_key = self.cache.make_key(endpoint, params, headers.get('Accept', ''))
+            cached = self.cache.get(cache_key)
+            if cached:
+                headers = {**headers, **self.cache.conditional_headers(cached)}
+        
+        resource = self.scheduler.resource_for(endpoint)
+        response = self.retry_policy.call('GET', endpoint, lambda: self.scheduler.execute(
+            resource,
+            lambda: self.pool.get(url, headers=headers, params=params, timeout=CONFIG['timeout'])
+        ))
+        
+        if cached and response.status_code == 304:
+            self.cache.mark_hit(cache_key)
+            return json.loads(cached['body'])
+        
+        raise_for_status(response)
+        if cache_key is not None:
+            self.cache.put(cache_key, response.content,
+                           etag=response.headers.get('ETag'),
+                           last_modified=response.headers.get('Last-Modified'))
         return response.json()
     
-    def get_trending_repos(self, since: str = 'weekly', language: str = '', limit: int = 10) -> List[Dict]:
-        """获取GitHub趋势项目"""
+    def get_raw(self, endpoint: str, max_bytes: int, use_cache: bool = False) -> bytes:
+        """以原始媒体类型流式获取内容，最多读取max_bytes字节
+        
+        缓存中保存的是截断后的开头部分，缓存键包含字节上限，修改上限后会重新获取
+        """
+        url = f'{self.base_url}{endpoint}'
+        headers = {**self.headers, 'Accept': RAW_MEDIA_TYPE}
+        cache_key, cached = None, None
+        if use_cache and self.cache is not None:
+            cache_key = self.cache.make_key(endpoint, {'max_bytes': max_bytes}, RAW_MEDIA_TYPE)
+            cached = self.cache.get(cache_key)
+            if cached:
+                headers.update(self.cache.conditional_headers(cached))
+        
+        resource = self.scheduler.resource_for(endpoint)
+        response = self.retry_policy.call('GET', endpoint, lambda: self.scheduler.execute(
+            resource,
+            lambda: self.pool.get(url, headers=headers, timeout=CONFIG['timeout'], stream=True)
+        ))
+        
+        if cached and response.status_code == 304:
+            response.close()
+            self.cache.mark_hit(cache_key)
+            return cached['body']
+        
+        try:
+            raise_for_status(response)
+        except requests.exceptions.HTTPError:
+            response.close()
+            raise
+        body, truncated = read_capped(response, max_bytes)
+        if truncated:
+            print(f'{endpoint} 超过 {max_bytes} 字节，只读取开头部分')
+        if cache_key is not None:
+            self.cache.put(cache_key, body,
+                           etag=response.headers.get('ETag'),
+                           last_modified=response.headers.get('Last-Modified'))
+        return body
+    
+    def post_graphql(self, query: str, variables: Dict = None) -> Dict:
+        """发送GraphQL查询"""
+        url = f'{self.base_url}/graphql'
+        # 只读查询，可以安全重试
+        response = self.retry_policy.call('POST', '/graphql', lambda: self.scheduler.execute(
+            'graphql',
+            lambda: self.pool.post(url, headers=self.headers, json={'query': query, 'variables': variables or {}},
+                                   timeout=CONFIG['timeout'])
+        ), idempotent=True)
+        raise_for_status(response)
+        return response.json()
+    
+    def get_trending_since_date(self, since: str = 'weekly') -> datetime:
+        """获取时间范围的起始日期"""
         today = datetime.now()
         
         if since == 'weekly':
-            date = today - timedelta(days=7)
+            return today - timedelta(days=7)
         elif since == 'monthly':
-            date = today - timedelta(days=30)
+            return today - timedelta(days=30)
         else:  # daily
             # 使用过去3天的时间范围，提高获取到项目的概率
-            date = today - timedelta(days=3)
-        
-        date_str = date.strftime('%Y-%m-%d')
+            return today - timedelta(days=3)
+    
+    def build_trending_query(self, since: str = 'weekly', language: str = '') -> str:
+        """构造趋势项目的搜索条件"""
+        date_str = self.get_trending_since_date(since).strftime('%Y-%m-%d')
         # 使用pushed:>而不是created:>，这样可以获取到最近更新的仓库，更符合趋势的定义
         # 降低stars阈值到50，增加获取到项目的概率
         query = f'pushed:>{date_str} stars:>50'
@@ -85,117 +239,516 @@ class GitHubAPI:
         if language:
             query += f' language:{language}'
         
+        return query
+    
+    def search_repositories_page(self, query: str, page: int = 1, per_page: int = 100) -> Dict:
+        """获取一页按stars降序排列的搜索结果"""
         params = {
             'q': query,
             'sort': 'stars',
             'order': 'desc',
-            'per_page': limit
+            'per_page': per_page,
+            'page': page
         }
+        result = self.get('/search/repositories', params)
+        self.last_search_at = time.perf_counter()
+        return result
+    
+    def probe_search(self, query: str) -> Tuple[int, Optional[int]]:
+        """探测搜索条件的结果总数和最高stars（只请求1条结果）"""
+        result = self.search_repositories_page(query, 1, 1)
+        items = result.get('items', [])
+        return result.get('total_count', 0), (items[0]['stargazers_count'] if items else None)
+    
+    def get_trending_repos_sharded(self, since: str = 'weekly', language: str = '', limit: int = 10) -> List[Dict]:
+        """分片搜索趋势项目，突破单个查询1000条结果的限制
+        
+        与 build_trending_query 的条件等价：pushed晚于起始日期且stars大于50
+        """
+        page_size = CONFIG['search_page_size']
+        result_cap = CONFIG['search_result_cap']
+        root = SearchShard(
+            stars_min=51,
+            stars_max=None,
+            pushed_from=(self.get_trending_since_date(since) + timedelta(days=1)).date(),
+            pushed_to=(datetime.now() + timedelta(days=1)).date()
+        )
+        sharder = SearchSharder(self.probe_search, language, result_cap, CONFIG['search_concurrency'])
+        shards = sharder.plan(root, limit)
+        print(f'分片搜索: 共 {len(shards)} 个分片，探测请求 {sharder.probes} 次')
+        
+        # 分片按stars从高到低排列，前面的分片需要全部获取，最后一个分片只取剩余数量
+        page_jobs, remaining = [], limit
+        for index, shard in enumerate(shards):
+            if remaining <= 0:
+                break
+            count = min(shard.total, result_cap, remaining)
+            remaining -= count
+            page_jobs.extend((index, shard, page) for page in range(1, math.ceil(count / page_size) + 1))
+        
+        def fetch(job):
+            index, shard, page = job
+            try:
+                return index, page, self.search_repositories_page(shard.query(language), page, page_size).get('items', [])
+            except Exception as e:
+                print(f'获取分片 {shard.query(language)} 第 {page} 页失败: {e}')
+                return index, page, []
+        
+        shard_results = [[] for _ in shards]
+        with ThreadPoolExecutor(max_workers=CONFIG['search_concurrency']) as executor:
+            for index, page, items in sorted(executor.map(fetch, page_jobs), key=lambda x: (x[0], x[1])):
+                shard_results[index].extend(items)
+        
+        return merge_top_k(shard_results, limit)
+    
+    async def stream_trending_repos(self, since: str, language: str, limit: int,
+                                    executor: ThreadPoolExecutor) -> AsyncIterator[Tuple[int, Dict]]:
+        """分页搜索趋势项目
+        
+        先获取第一页得到结果总数，其余页面并发获取，按到达顺序产出 (排名, 仓库)，
+        按full_name去重
+        """
+        loop = asyncio.get_running_loop()
+        
+        if self.sharded_search or limit > CONFIG['search_result_cap']:
+            try:
+                repos = await loop.run_in_executor(executor, self.get_trending_repos_sharded, since, language, limit)
+            except Exception as e:
+                print(f'分片搜索趋势项目时出错: {e}')
+                return
+            for ranked_item in enumerate(repos):
+                yield ranked_item
+            return
+        
+        per_page = min(limit, CONFIG['search_page_size'])
+        query = self.build_trending_query(since, language)
         
         try:
-            response = self.get('/search/repositories', params)
-            return response['items']
+            first_page = await loop.run_in_executor(executor, self.search_repositories_page, query, 1, per_page)
         except Exception as e:
             print(f'获取趋势项目时出错: {e}')
+            # 如果weekly也失败，不产出任何结果
+            if since == 'weekly':
+                return
             print('尝试使用weekly时间范围')
-            # 尝试使用weekly时间范围
-            if since != 'weekly':
-                return self.get_trending_repos(since='weekly', language=language, limit=limit)
-            else:
-                # 如果weekly也失败，返回空列表
-                return []
+            query = self.build_trending_query('weekly', language)
+            try:
+                first_page = await loop.run_in_executor(executor, self.search_repositories_page, query, 1, per_page)
+            except Exception as e:
+                print(f'获取趋势项目时出错: {e}')
+                return
+        
+        total = min(limit, first_page.get('total_count', 0), CONFIG['search_result_cap'])
+        pages = math.ceil(total / per_page) if per_page else 0
+        if pages > 1:
+            print(f'搜索结果共 {first_page.get("total_count", 0)} 个，并发获取 {pages} 页...')
+        
+        seen = set()
+        
+        def accept(page: int, items: List[Dict]) -> List[Tuple[int, Dict]]:
+            accepted = []
+            for i, item in enumerate(items):
+                rank = (page - 1) * per_page + i
+                if rank < limit and item['full_name'] not in seen:
+                    seen.add(item['full_name'])
+                    accepted.append((rank, item))
+            return accepted
+        
+        for ranked_item in accept(1, first_page.get('items', [])):
+            yield ranked_item
+        
+        if pages <= 1:
+            return
+        
+        page_semaphore = asyncio.Semaphore(CONFIG['search_concurrency'])
+        
+        async def fetch(page: int):
+            async with page_semaphore:
+                try:
+                    result = await loop.run_in_executor(executor, self.search_repositories_page, query, page, per_page)
+                    return page, result.get('items', [])
+                except Exception as e:
+                    print(f'获取搜索结果第 {page} 页失败: {e}')
+                    return page, []
+        
+        for next_page in asyncio.as_completed([fetch(page) for page in range(2, pages + 1)]):
+            page, items = await next_page
+            for ranked_item in accept(page, items):
+                yield ranked_item
+    
+    def get_trending_repos(self, since: str = 'weekly', language: str = '', limit: int = 10) -> List[Dict]:
+        """获取GitHub趋势项目（超过100个时分页并发获取）"""
+        async def collect():
+            with ThreadPoolExecutor(max_workers=CONFIG['search_concurrency']) as executor:
+                return [ranked async for ranked in self.stream_trending_repos(since, language, limit, executor)]
+        
+        ranked_repos = asyncio.run(collect())
+        return [repo for _, repo in sorted(ranked_repos, key=lambda x: x[0])]
     
     def get_repo_details(self, owner: str, repo: str) -> Dict:
         """获取仓库详细信息"""
-        return self.get(f'/repos/{owner}/{repo}')
+        return self.get(f'/repos/{owner}/{repo}', use_cache=True)
+    
+    @staticmethod
+    def is_not_found(error: requests.exceptions.HTTPError) -> bool:
+        return error.response is not None and error.response.status_code == 404
     
     def get_repo_readme(self, owner: str, repo: str) -> str:
-        """获取仓库README内容"""
+        """获取仓库README内容（最多readme_max_bytes字节）
+        
+        只有404表示仓库没有README；其他错误（5xx、限流、熔断）向上抛出，
+        调用方改用基本信息，该仓库不会被当作已补全写入运行日志或增量快照
+        """
+        endpoint = f'/repos/{owner}/{repo}/readme'
+        max_bytes = CONFIG['readme_max_bytes']
         try:
-            response = self.get(f'/repos/{owner}/{repo}/readme')
+            if CONFIG['readme_mode'] == 'raw':
+                return self.decode_readme(self.get_raw(endpoint, max_bytes, use_cache=True))
+            response = self.get(endpoint, use_cache=True)
             import base64
-            return base64.b64decode(response['content']).decode('utf-8')
-        except requests.exceptions.HTTPError:
-            return ''
+            return self.decode_readme(base64.b64decode(response['content'])[:max_bytes])
+        except requests.exceptions.HTTPError as e:
+            if self.is_not_found(e):
+                return ''
+            raise
+    
+    @staticmethod
+    def decode_readme(data: bytes) -> str:
+        """容错解码README
+        
+        按UTF-8解码，非法字节替换为U+FFFD；截断处不完整的多字节字符直接丢弃
+        """
+        if data.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+            return data.decode('utf-16', errors='replace')
+        text = codecs.getincrementaldecoder('utf-8')(errors='replace').decode(data, final=False)
+        return text.lstrip('\ufeff')
+    
+    @classmethod
+    def cap_readme(cls, text: str) -> str:
+        """把已解码的README（如GraphQL返回的Blob文本）截断到readme_max_bytes字节，与REST获取的README一致"""
+        max_bytes = CONFIG['readme_max_bytes']
+        if len(text) * 4 <= max_bytes:  # UTF-8每个字符最多4字节，不可能超出
+            return text
+        data = text.encode('utf-8')
+        return text if len(data) <= max_bytes else cls.decode_readme(data[:max_bytes])
     
     def get_repo_languages(self, owner: str, repo: str) -> Dict:
-        """获取仓库语言统计"""
+        """获取仓库语言统计；与README相同，只有404视为没有语言统计"""
         try:
-            return self.get(f'/repos/{owner}/{repo}/languages')
-        except requests.exceptions.HTTPError:
-            return {}
+            return self.get(f'/repos/{owner}/{repo}/languages', use_cache=True)
+        except requests.exceptions.HTTPError as e:
+            if self.is_not_found(e):
+                return {}
+            raise
+    
+    def build_full_info(self, details: Dict, readme: str, languages: Dict) -> Dict:
+        """合并详细信息、README和语言统计"""
+        return {
+            **details,
+            'readme_content': readme,
+            'languages': languages,
+            'primary_language': self.get_primary_language(languages),
+            'tech_stack': self.extract_tech_stack(details, languages, readme),
+            'enriched_at': datetime.now().isoformat()
+        }
+    
+    def build_basic_info(self, repo: Dict) -> Dict:
+        """出错时根据搜索结果中的基本信息构造仓库信息"""
+        # 使用基本信息中的language作为primary_language
+        primary_language = repo.get('language', 'Unknown')
+        # 尝试从基本信息中提取技术栈
+        tech_stack = set()
+        # 添加主要语言
+        if primary_language and primary_language != 'Unknown' and primary_language != 'None':
+            tech_stack.add(primary_language)
+        # 添加topics
+        if repo.get('topics'):
+            tech_stack.update(repo['topics'])
+        
+        return {
+            **repo,
+            'readme_content': '',
+            'languages': {},
+            'primary_language': primary_language,
+            'tech_stack': list(tech_stack)
+        }
+    
+    def reuse_enrichment(self, repo: Dict) -> Optional[Dict]:
+        """续爬时返回本次运行已获取的完整信息，增量模式下返回快照中可复用的完整信息"""
+        if self.journal is not None:
+            recorded = self.journal.get_repo(repo['full_name'])
+            if recorded is not None:
+                return recorded
+        if self.snapshot is None:
+            return None
+        return self.snapshot.lookup(repo)
+    
+    def record_enrichment(self, full_info: Dict) -> Dict:
+        """把获取完成的仓库写入运行日志（不含README全文）"""
+        if self.journal is not None:
+            self.journal.record_repo(compact_repo(full_info))
+        return full_info
+    
+    def report_progress(self, stage: str, message: str, **fields) -> None:
+        if self.progress is not None:
+            self.progress(stage, message, **fields)
     
     def get_repo_info(self, repo):
         """获取单个仓库的完整信息"""
+        reused = self.reuse_enrichment(repo)
+        if reused is not None:
+            return reused
         try:
             # 获取详细信息、README和语言统计
             details = self.get_repo_details(repo['owner']['login'], repo['name'])
             readme = self.get_repo_readme(repo['owner']['login'], repo['name'])
             languages = self.get_repo_languages(repo['owner']['login'], repo['name'])
             
-            full_info = {
-                **details,
-                'readme_content': readme,
-                'languages': languages,
-                'primary_language': self.get_primary_language(languages),
-                'tech_stack': self.extract_tech_stack(details, languages, readme)
-            }
-            
-            return full_info
+            return self.record_enrichment(self.build_full_info(details, readme, languages))
         except Exception as e:
             print(f'处理仓库 {repo["full_name"]} 时出错: {e}')
+            self.report_progress('enrich', f'处理仓库 {repo["full_name"]} 时出错', error=str(e))
             # 即使出错也要返回基本信息，并尝试从基本信息中提取技术栈
-            # 使用基本信息中的language作为primary_language
-            primary_language = repo.get('language', 'Unknown')
-            # 尝试从基本信息中提取技术栈
-            tech_stack = set()
-            # 添加主要语言
-            if primary_language and primary_language != 'Unknown' and primary_language != 'None':
-                tech_stack.add(primary_language)
-            # 添加topics
-            if repo.get('topics'):
-                tech_stack.update(repo['topics'])
-            
-            return {
-                **repo,
-                'readme_content': '',
-                'languages': {},
-                'primary_language': primary_language,
-                'tech_stack': list(tech_stack)
-            }
+            return self.build_basic_info(repo)
     
-    def get_repos_full_info(self, repos: List[Dict]) -> List[Dict]:
-        """批量获取仓库完整信息（并发执行）"""
-        full_info_repos = []
-        total_repos = len(repos)
+    async def get_repo_info_async(self, repo: Dict, executor: ThreadPoolExecutor,
+                                  global_semaphore: asyncio.Semaphore,
+                                  per_repo_concurrency: int) -> Dict:
+        """异步获取单个仓库的完整信息，详情、README和语言统计三个子请求并发执行"""
+        reused = self.reuse_enrichment(repo)
+        if reused is not None:
+            return reused
+        
+        owner, name = repo['owner']['login'], repo['name']
+        loop = asyncio.get_running_loop()
+        repo_semaphore = asyncio.Semaphore(per_repo_concurrency)
+        
+        async def call(func, *args):
+            # 先占用仓库内名额再占用全局名额，保证加锁顺序一致
+            async with repo_semaphore:
+                async with global_semaphore:
+                    return await loop.run_in_executor(executor, func, *args)
+        
+        details, readme, languages = await asyncio.gather(
+            call(self.get_repo_details, owner, name),
+            call(self.get_repo_readme, owner, name),
+            call(self.get_repo_languages, owner, name),
+            return_exceptions=True
+        )
         
-        print(f'正在并发获取 {total_repos} 个仓库的详细信息...')
+        error = next((r for r in (details, readme, languages) if isinstance(r, BaseException)), None)
+        if error is not None:
+            print(f'处理仓库 {repo["full_name"]} 时出错: {error}')
+            self.report_progress('enrich', f'处理仓库 {repo["full_name"]} 时出错', error=str(error))
+            return self.build_basic_info(repo)
         
-        # 使用线程池并发获取仓库信息，最大并发数为5
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            # 提交所有任务
-            future_to_repo = {executor.submit(self.get_repo_info, repo): repo for repo in repos}
+        return self.record_enrichment(self.build_full_info(details, readme, languages))
+    
+    async def enrich_stream_async(self, source: AsyncIterator[Tuple[int, Dict]], executor: ThreadPoolExecutor,
+                                  max_concurrency: int, per_repo_concurrency: int,
+                                  total: int = None, global_semaphore: asyncio.Semaphore = None,
+                                  shared_tasks: Dict[str, asyncio.Task] = None) -> List[Dict]:
+        """边接收仓库边获取完整信息
+        
+        每收到一个仓库就立即进入流水线，由全局信号量限制同时在途的请求数，
+        结果按排名排序返回。多个流共用shared_tasks时，同一仓库在本次运行中只获取一次
+        """
+        if global_semaphore is None:
+            global_semaphore = asyncio.Semaphore(max_concurrency)
+        if shared_tasks is None:
+            shared_tasks = {}
+        completed = 0
+        
+        async def enrich(repo):
+            nonlocal completed
+            full_info = await self.get_repo_info_async(repo, executor, global_semaphore, per_repo_concurrency)
+            completed += 1
+            print(f'已完成 ({completed}/{total or "?"}) {repo["full_name"]} 的详细信息获取...')
+            self.report_progress('enrich', f'已获取 {repo["full_name"]} 的详细信息', completed=completed, total=total)
+            return full_info
+        
+        ranks, tasks = [], []
+        async for rank, repo in source:
+            ranks.append(rank)
+            task = shared_tasks.get(repo['full_name'])
+            if task is None:
+                task = shared_tasks[repo['full_name']] = asyncio.create_task(enrich(repo))
+            tasks.append(task)
+        
+        results = await asyncio.gather(*tasks)
+        return [full_info for _, full_info in sorted(zip(ranks, results), key=lambda x: x[0])]
+    
+    async def get_repos_full_info_async(self, repos: List[Dict], max_concurrency: int = None,
+                                        per_repo_concurrency: int = None) -> List[Dict]:
+        """异步批量获取仓库完整信息，结果顺序与输入顺序一致"""
+        max_concurrency = max_concurrency or CONFIG['max_concurrency']
+        per_repo_concurrency = per_repo_concurrency or CONFIG['per_repo_concurrency']
+        
+        async def source():
+            for ranked in enumerate(repos):
+                yield ranked
+        
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            return await self.enrich_stream_async(source(), executor, max_concurrency, per_repo_concurrency,
+                                                  total=len(repos))
+    
+    async def search_and_enrich_async(self, since: str, language: str, limit: int,
+                                      max_concurrency: int = None, per_repo_concurrency: int = None) -> List[Dict]:
+        """分页搜索趋势项目，搜索结果一到达就开始获取完整信息"""
+        max_concurrency = max_concurrency or CONFIG['max_concurrency']
+        per_repo_concurrency = per_repo_concurrency or CONFIG['per_repo_concurrency']
+        
+        # 搜索页请求与详情请求共用线程池，额外预留搜索并发所需的线程
+        with ThreadPoolExecutor(max_workers=max_concurrency + CONFIG['search_concurrency']) as executor:
+            source = self.stream_trending_repos(since, language, limit, executor)
+            return await self.enrich_stream_async(source, executor, max_concurrency, per_repo_concurrency,
+                                                  total=limit)
+    
+    async def search_and_enrich_languages_async(self, since: str, languages: List[str], limit: int,
+                                                max_concurrency: int = None,
+                                                per_repo_concurrency: int = None) -> Dict[str, List[Dict]]:
+        """多个语言的搜索并发执行，共用全局并发名额和本次运行的仓库信息缓存
+        
+        返回 语言 -> 按排名排序的完整信息列表；没有结果的语言改用weekly时间范围再搜索一次
+        """
+        max_concurrency = max_concurrency or CONFIG['max_concurrency']
+        per_repo_concurrency = per_repo_concurrency or CONFIG['per_repo_concurrency']
+        global_semaphore = asyncio.Semaphore(max_concurrency)
+        shared_tasks: Dict[str, asyncio.Task] = {}
+        
+        max_workers = max_concurrency + CONFIG['search_concurrency'] * len(languages)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            async def crawl(language: str, crawl_since: str) -> List[Dict]:
+                source = self.stream_trending_repos(crawl_since, language, limit, executor)
+                return await self.enrich_stream_async(source, executor, max_concurrency, per_repo_concurrency,
+                                                      total=limit, global_semaphore=global_semaphore,
+                                                      shared_tasks=shared_tasks)
             
-            # 处理完成的任务
-            for i, future in enumerate(concurrent.futures.as_completed(future_to_repo)):
-                repo = future_to_repo[future]
-                print(f'已完成 ({i + 1}/{total_repos}) {repo["full_name"]} 的详细信息获取...')
-                
+            results = dict(zip(languages, await asyncio.gather(*(crawl(lang, since) for lang in languages))))
+            
+            empty = [lang for lang, repos in results.items() if not repos]
+            if empty and since != 'weekly':
+                print(f'语言 {", ".join(empty)} 没有获取到趋势项目，尝试使用weekly时间范围')
+                results.update(zip(empty, await asyncio.gather(*(crawl(lang, 'weekly') for lang in empty))))
+        
+        total_repos = sum(len(repos) for repos in results.values())
+        print(f'{len(languages)} 个语言共 {total_repos} 个项目，去重后获取 {len(shared_tasks)} 个仓库的详细信息')
+        return results
+    
+    def search_and_enrich_languages(self, since: str = 'weekly', languages: List[str] = None, limit: int = 10,
+                                    max_concurrency: int = None,
+                                    per_repo_concurrency: int = None) -> Dict[str, List[Dict]]:
+        """并发搜索多个语言的趋势项目并获取完整信息"""
+        return asyncio.run(self.search_and_enrich_languages_async(
+            since, languages or [''], limit, max_concurrency, per_repo_concurrency))
+    
+    def search_and_enrich(self, since: str = 'weekly', language: str = '', limit: int = 10,
+                          max_concurrency: int = None, per_repo_concurrency: int = None) -> List[Dict]:
+        """搜索趋势项目并流式获取完整信息"""
+        return asyncio.run(self.search_and_enrich_async(since, language, limit, max_concurrency, per_repo_concurrency))
+    
+    def get_repos_full_info(self, repos: List[Dict], max_concurrency: int = None,
+                            per_repo_concurrency: int = None) -> List[Dict]:
+        """批量获取仓库完整信息（异步并发执行）"""
+        max_concurrency = max_concurrency or CONFIG['max_concurrency']
+        per_repo_concurrency = per_repo_concurrency or CONFIG['per_repo_concurrency']
+        
+        print(f'正在并发获取 {len(repos)} 个仓库的详细信息 '
+              f'(全局并发 {max_concurrency}, 单仓库并发 {per_repo_concurrency})...')
+        
+        return asyncio.run(self.get_repos_full_info_async(repos, max_concurrency, per_repo_concurrency))
+    
+    def get_repos_graphql_batch(self, repos: List[Dict]) -> Dict[str, Dict]:
+        """用一次GraphQL查询获取一批仓库的完整信息
+        
+        返回 full_name -> 完整信息 的映射；查询失败或在结果中缺失的仓库不会出现在映射中
+        """
+        query, variables = github_graphql.build_batch_query(repos)
+        try:
+            response = self.post_graphql(query, variables)
+        except Exception as e:
+            print(f'GraphQL批量查询失败 ({len(repos)} 个仓库): {e}')
+            return {}
+        
+        data = response.get('data') or {}
+        if response.get('errors'):
+            print(f'GraphQL查询返回 {len(response["errors"])} 个错误，相关仓库将使用REST接口补充')
+        rate_limit = data.get('rateLimit') or {}
+        if rate_limit:
+            print(f'GraphQL查询消耗 {rate_limit.get("cost")} 点，剩余 {rate_limit.get("remaining")} 点')
+        
+        results = {}
+        for i, repo in enumerate(repos):
+            node = data.get(f'r{i}')
+            if not node:
+                continue
+            details, languages, readme = github_graphql.map_repository(node)
+            if readme is None:
+                # 候选路径中没有README时使用REST /readme 接口识别文件名；失败的仓库不放入结果，之后回退到REST接口
                 try:
-                    full_info = future.result()
-                    full_info_repos.append(full_info)
-                except Exception as e:
-                    print(f'获取仓库 {repo["full_name"]} 信息时发生异常: {e}')
-                    # 即使出错也要继续处理
-                    full_info_repos.append({
-                        **repo,
-                        'readme_content': '',
-                        'languages': {},
-                        'primary_language': repo.get('language', 'Unknown'),
-                        'tech_stack': []
-                    })
+                    readme = self.get_repo_readme(repo['owner']['login'], repo['name'])
+                except requests.exceptions.RequestException as e:
+                    print(f'获取 {repo["full_name"]} 的README失败: {e}')
+                    continue
+            else:
+                readme = self.cap_readme(readme)
+            results[repo['full_name']] = self.record_enrichment(self.build_full_info(details, readme, languages))
+        return results
+    
+    def get_repos_full_info_graphql(self, repos: List[Dict], max_nodes: int = None) -> List[Dict]:
+        """使用GraphQL批量获取仓库完整信息，失败的仓库回退到REST接口"""
+        if not self.token:
+            print('GraphQL接口需要GITHUB_TOKEN，改用REST接口获取仓库信息')
+            return self.get_repos_full_info(repos)
         
-        return full_info_repos
+        results = {}
+        for repo in repos:
+            reused = self.reuse_enrichment(repo)
+            if reused is not None:
+                results[repo['full_name']] = reused
+        repos_to_fetch = [repo for repo in repos if repo['full_name'] not in results]
+        
+        chunks = github_graphql.chunk_by_cost(repos_to_fetch, max_nodes or CONFIG['graphql_max_nodes'])
+        print(f'正在通过GraphQL获取 {len(repos_to_fetch)} 个仓库的详细信息，共 {len(chunks)} 批...')
+        
+        with ThreadPoolExecutor(max_workers=CONFIG['graphql_concurrency']) as executor:
+            for batch_results in executor.map(self.get_repos_graphql_batch, chunks):
+                results.update(batch_results)
+        
+        missing = [repo for repo in repos if repo['full_name'] not in results]
+        if missing:
+            print(f'{len(missing)} 个仓库未能通过GraphQL获取，回退到REST接口')
+            for full_info in self.get_repos_full_info(missing):
+                results[full_info['full_name']] = full_info
+        
+        return [results.get(repo['full_name'], self.build_basic_info(repo)) for repo in repos]
+    
+    def get_languages_full_info_graphql(self, since: str, languages: List[str], limit: int) -> Dict[str, List[Dict]]:
+        """并发搜索多个语言的趋势项目，合并去重后用GraphQL一次性获取完整信息"""
+        def search(language: str) -> List[Dict]:
+            repos = self.get_trending_repos(since=since, language=language, limit=limit)
+            if not repos and since != 'weekly':
+                print(f'语言 {language} 没有获取到趋势项目，尝试使用weekly时间范围')
+                repos = self.get_trending_repos(since='weekly', language=language, limit=limit)
+            return repos
+        
+        with ThreadPoolExecutor(max_workers=len(languages)) as executor:
+            language_repos = dict(zip(languages, executor.map(search, languages)))
+        
+        unique_repos = {}
+        for repos in language_repos.values():
+            for repo in repos:
+                unique_repos.setdefault(repo['full_name'], repo)
+        total_repos = sum(len(repos) for repos in language_repos.values())
+        print(f'{len(languages)} 个语言共 {total_repos} 个项目，去重后获取 {len(unique_repos)} 个仓库的详细信息')
+        
+        full_infos = {}
+        if unique_repos:
+            full_infos = dict(zip(unique_repos, self.get_repos_full_info_graphql(list(unique_repos.values()))))
+        return {
+            language: [full_infos[repo['full_name']] for repo in repos]
+            for language, repos in language_repos.items()
+        }
     
     def get_primary_language(self, languages: Dict) -> str:
         """获取主要编程语言"""
@@ -204,60 +757,65 @@ class GitHubAPI:
         return max(languages.items(), key=lambda x: x[1])[0]
     
     def extract_tech_stack(self, repo: Dict, languages: Dict, readme: str) -> List[str]:
-        """提取技术栈信息"""
-        tech_stack = set()
+        """提取技术栈信息
         
-        # 从语言统计中添加
-        tech_stack.update(languages.keys())
-        
-        # 从topics中添加
-        if repo.get('topics'):
-            tech_stack.update(repo['topics'])
-        
-        # 从README中提取常见技术栈关键词
-        tech_keywords = [
-            'React', 'Vue', 'Angular', 'Node.js', 'Express', 'Django', 'Flask',
-            'Spring', 'Docker', 'Kubernetes', 'Redis', 'MongoDB', 'PostgreSQL',
-            'MySQL', 'TypeScript', 'GraphQL', 'REST API', 'Microservices',
-            'AWS', 'Azure', 'GCP', 'Terraform', 'Ansible'
-        ]
-        
-        readme_upper = readme.upper()
-        for keyword in tech_keywords:
-            if keyword.upper() in readme_upper:
-                tech_stack.add(keyword)
-        
-        return list(tech_stack)[:8]  # 限制数量
+        语言统计和topics各计一次，README中的技术按词典一次扫描计数，按出现次数排序
+        """
+        matcher = get_matcher(str(TECH_STACK_FILE))
+        extra = list(languages.keys()) + list(repo.get('topics') or [])
+        return matcher.rank(readme, extra=extra, limit=CONFIG['tech_stack_limit'])
     
     def delay(self, ms: int) -> None:
         """延迟函数"""
         time.sleep(ms / 1000)
 
 
+def readme_image_urls(readme: str) -> List[str]:
+    """单次扫描README，按文档顺序取前几个有效的图片链接"""
+    return extract_image_urls(readme, is_valid=ImageCrawler.is_valid_image_url, limit=CONFIG['image_probe_candidates'])
+
+
+def compact_repo(repo: Dict) -> Dict:
+    """写入运行日志的仓库信息：README全文（最多readme_max_bytes）只在本次运行中使用，
+    续爬只需要补全后的字段，图片爬取需要的候选图片链接提前提取出来"""
+    if 'readme_content' not in repo:
+        return repo
+    compacted = {key: value for key, value in repo.items() if key != 'readme_content'}
+    compacted['readme_image_urls'] = readme_image_urls(repo['readme_content']) if repo['readme_content'] else []
+    return compacted
+
+
 class ImageCrawler:
     """图片爬取器"""
     
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+    def __init__(self, max_concurrency: int = None):
+        self.max_concurrency = max_concurrency or CONFIG['image_concurrency']
+        self.stats = {}
     
-    def crawl_project_images(self, repo: Dict, year: str, week: str) -> Dict:
-        """为项目爬取图片"""
+    def create_pipeline(self, store: BlobStore) -> ImagePipeline:
+        """创建共享会话的图片下载流水线，图片按内容寻址保存到store"""
+        return ImagePipeline(
+            max_concurrency=self.max_concurrency,
+            max_file_size=CONFIG['max_file_size'],
+            timeout=CONFIG['timeout'],
+            store=store,
+            min_dimension=CONFIG['min_image_dimension']
+        )
+    
+    async def crawl_project_images(self, pipeline: ImagePipeline, repo: Dict, year: str, week: str) -> Dict:
+        """为项目爬取图片；增量快照复用的仓库没有README，直接沿用上一次的图片信息"""
+        if 'image_info' in repo:
+            return {**repo['image_info'], 'repo_name': repo['full_name']}
         try:
             print(f'正在爬取 {repo["full_name"]} 的图片...')
             
-            project_dir = self.get_project_image_dir(repo['name'], year, week)
-            project_dir.mkdir(parents=True, exist_ok=True)
-            
-            images = self.extract_images_from_readme(repo, project_dir)
+            images = await self.extract_images_from_readme(pipeline, repo)
             
             return {
                 'repo_name': repo['full_name'],
                 'total_images': len(images),
                 'images': images,
-                'image_dir': str(project_dir)
+                'image_dir': str(BLOB_DIR)
             }
             
         except Exception as e:
@@ -270,37 +828,29 @@ class ImageCrawler:
                 'error': str(e)
             }
     
-    def get_project_image_dir(self, repo_name: str, year: str, week: str) -> Path:
-        """获取项目图片存储目录"""
-        safe_name = self.sanitize_file_name(repo_name)
-        return IMAGES_DIR / year / f'week-{week}' / safe_name
-    
-    def extract_images_from_readme(self, repo: Dict, target_dir: Path) -> List[Dict]:
+    async def extract_images_from_readme(self, pipeline: ImagePipeline, repo: Dict) -> List[Dict]:
         """从README中提取并下载图片"""
         images = []
-        readme = repo.get('readme_content', '')
-        
-        if not readme:
-            print(f'{repo["full_name"]} 没有README内容')
+        # 从运行日志恢复的仓库没有README全文，只有写入日志时提取的候选图片链接
+        image_urls = repo.get('readme_image_urls')
+        if image_urls is None:
+            readme = repo.get('readme_content', '')
+            if not readme:
+                print(f'{repo["full_name"]} 没有README内容')
+                return images
+            image_urls = readme_image_urls(readme)
+        
+        if not image_urls:
+            print(f'{repo["full_name"]} 的README中没有找到图片')
             return images
         
-        # 解析Markdown中的图片
-        markdown_images = self.parse_markdown_images(readme)
-        
-        # 解析HTML中的图片（如果README包含HTML）
-        html_images = self.parse_html_images(readme)
-        
-        # 合并并去重
-        all_image_urls = list(set(markdown_images + html_images))
-        
-        print(f'发现 {len(all_image_urls)} 个图片链接在 {repo["full_name"]}')
+        print(f'发现 {len(image_urls)} 个候选图片在 {repo["full_name"]}')
         
-        # 只处理第一张图片
-        if all_image_urls:
-            image_url = all_image_urls[0]
+        # 只读取前几个候选的头部，排除徽章和追踪像素后按实际尺寸选出代表图片，只下载这一张
+        candidates = await self.probe_candidates(pipeline, repo, image_urls)
+        for image_url, absolute_url, probe_info in candidates:
             try:
-                absolute_url = self.resolve_image_url(image_url, repo)
-                image_info = self.download_image(absolute_url, target_dir, 0)
+                image_info = await self.download_image(pipeline, absolute_url)
                 
                 if image_info:
                     images.append({
@@ -308,45 +858,29 @@ class ImageCrawler:
                         'original_url': image_url,
                         'absolute_url': absolute_url
                     })
-                    print(f'✅ 成功下载项目代表图片: {image_info["filename"]}')
+                    action = '复用已保存的' if image_info['cached'] else '成功下载'
+                    size = f' ({image_info["width"]}x{image_info["height"]})' if image_info.get('width') else ''
+                    print(f'✅ {action}项目代表图片: {image_info["filename"]}{size}')
+                    break
                     
             except Exception as e:
                 print(f'下载图片失败 {image_url}: {e}')
-        else:
-            print(f'{repo["full_name"]} 的README中没有找到图片')
-        
-        return images
-    
-    def parse_markdown_images(self, content: str) -> List[str]:
-        """解析Markdown中的图片"""
-        images = []
-        # 匹配 ![alt](url) 格式
-        pattern = r'!\[([^\]]*)\]\(([^)]+)\)'
-        matches = re.finditer(pattern, content)
-        
-        for match in matches:
-            image_url = match.group(2).strip()
-            if self.is_valid_image_url(image_url):
-                images.append(image_url)
         
         return images
     
-    def parse_html_images(self, content: str) -> List[str]:
-        """解析HTML中的图片"""
-        images = []
-        try:
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(content, 'html.parser')
-            
-            for img in soup.find_all('img'):
-                src = img.get('src')
-                if src and self.is_valid_image_url(src):
-                    images.append(src.strip())
-                    
-        except Exception as e:
-            print(f'解析HTML图片失败: {e}')
+    async def probe_candidates(self, pipeline: ImagePipeline, repo: Dict, image_urls: List[str]) -> List[Tuple]:
+        """并发探测候选图片的格式和尺寸，返回按代表性从高到低排序的 (原始URL, 绝对URL, 探测结果)"""
+        async def probe(image_url: str) -> Optional[Tuple]:
+            absolute_url = self.resolve_image_url(image_url, repo)
+            try:
+                return image_url, absolute_url, await pipeline.probe(absolute_url)
+            except Exception as e:
+                print(f'跳过图片 {image_url}: {e}')
+                return None
         
-        return images
+        results = [result for result in await asyncio.gather(*(probe(url) for url in image_urls)) if result]
+        # 分数相同（例如都无法确定尺寸的SVG）时保持README中的顺序
+        return sorted(results, key=lambda result: -representative_score(result[2]['width'], result[2]['height']))
     
     def resolve_image_url(self, image_url: str, repo: Dict) -> str:
         """解析图片URL为绝对URL"""
@@ -364,7 +898,8 @@ class ImageCrawler:
         else:
             return f'{base_url}/{image_url}'
     
-    def is_valid_image_url(self, url: str) -> bool:
+    @staticmethod
+    def is_valid_image_url(url: str) -> bool:
         """验证是否为有效的图片URL"""
         if not url or not isinstance(url, str):
             return False
@@ -377,92 +912,62 @@ class ImageCrawler:
         ext = os.path.splitext(url.split('?')[0])[1].lower()
         return ext in CONFIG['supported_image_formats'] or 'githubusercontent.com' in url
     
-    def download_image(self, image_url: str, target_dir: Path, index: int) -> Optional[Dict]:
-        """下载图片"""
+    async def download_image(self, pipeline: ImagePipeline, image_url: str) -> Optional[Dict]:
+        """下载图片到内容寻址存储（流式写入磁盘，超过max_file_size时中止；已知URL不再下载）"""
         try:
             print(f'正在下载图片: {image_url}')
-            
-            response = self.session.get(image_url, stream=True, timeout=CONFIG['timeout'])
-            response.raise_for_status()
-            
-            # 检查内容类型
-            content_type = response.headers.get('content-type', '')
-            if not content_type.startswith('image/'):
-                raise ValueError(f'无效的内容类型: {content_type}')
-            
-            # 检查文件大小
-            content_length = int(response.headers.get('content-length', '0'))
-            if content_length > CONFIG['max_file_size']:
-                raise ValueError(f'文件过大: {content_length} bytes')
-            
-            # 生成文件名
-            file_name = self.generate_file_name(image_url, index, content_type)
-            file_path = target_dir / file_name
-            
-            # 保存文件
-            with open(file_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-            
-            # 验证文件大小
-            stats = os.stat(file_path)
-            
+            image_info = await pipeline.download_blob(image_url)
             return {
-                'filename': file_name,
-                'filepath': str(file_path),
-                'size': stats.st_size,
-                'content_type': content_type,
+                **image_info,
                 'downloaded_at': datetime.now().isoformat()
             }
             
         except Exception as e:
             raise Exception(f'下载失败: {e}')
     
-    def generate_file_name(self, image_url: str, index: int, content_type: str) -> str:
-        """生成文件名"""
-        # 尝试从URL获取原始文件名
-        url_path = image_url.split('?')[0]
-        original_name = os.path.basename(url_path)
-        
-        # 如果有有效的原始文件名且包含扩展名
-        if original_name and os.path.splitext(original_name)[1]:
-            safe_name = self.sanitize_file_name(original_name)
-            return f'{index + 1}_{safe_name}'
-        
-        # 根据内容类型生成扩展名
-        ext_map = {
-            'image/png': '.png',
-            'image/jpeg': '.jpg',
-            'image/gif': '.gif',
-            'image/svg+xml': '.svg',
-            'image/webp': '.webp'
-        }
+    async def batch_crawl_images_async(self, repos: List[Dict], year: str, week: str) -> List[Dict]:
+        """并发处理所有项目的图片，共用一个下载流水线，结果顺序与输入顺序一致"""
+        total_repos = len(repos)
+        completed = 0
+        
+        async def crawl(pipeline: ImagePipeline, repo: Dict) -> Dict:
+            nonlocal completed
+            image_info = await self.crawl_project_images(pipeline, repo, year, week)
+            completed += 1
+            print(f'完成图片爬取 ({completed}/{total_repos}): {repo["full_name"]}')
+            return image_info
+        
+        async with self.session() as pipeline:
+            results = await asyncio.gather(*(crawl(pipeline, repo) for repo in repos))
         
-        ext = ext_map.get(content_type, '.png')
-        return f'image_{index + 1}{ext}'
+        await self.generate_variants(results)
+        return list(results)
     
-    def sanitize_file_name(self, file_name: str) -> str:
-        """清理文件名"""
-        return re.sub(r'[<>:/\\|?*]', '_', file_name).replace(' ', '_').replace('__', '_').lower()
+    @contextlib.asynccontextmanager
+    async def session(self) -> AsyncIterator[ImagePipeline]:
+        """打开图片存储和下载流水线，退出时记录下载和存储统计"""
+        store = BlobStore(BLOB_DIR)
+        try:
+            async with self.create_pipeline(store) as pipeline:
+                yield pipeline
+                self.stats = pipeline.get_stats()
+            self.stats['store'] = store.get_stats()
+        finally:
+            store.close()
+    
+    async def generate_variants(self, results: List[Dict]) -> None:
+        """下载完成后在进程池中生成缩略图和WebP/AVIF变体，写入各图片信息的variants字段"""
+        images = [image for result in results for image in result['images']]
+        generator = VariantGenerator(VARIANTS_DIR, max_workers=CONFIG['image_variant_workers'])
+        variants = await asyncio.get_running_loop().run_in_executor(None, generator.generate, images)
+        for image in images:
+            image['variants'] = variants.get(image.get('sha256'), [])
+        self.stats['variants'] = {'generated': generator.generated, 'failures': generator.failures}
     
     def batch_crawl_images(self, repos: List[Dict], year: str, week: str) -> List[Dict]:
-        """批量处理项目图片"""
-        results = []
-        total_repos = len(repos)
-        
-        for i, repo in enumerate(repos):
-            print(f'正在爬取图片 ({i + 1}/{total_repos}): {repo["full_name"]}')
-            image_info = self.crawl_project_images(repo, year, week)
-            results.append(image_info)
-            
-            print(f'完成图片爬取 ({i + 1}/{total_repos}): {repo["full_name"]}')
-            
-            # 添加延迟
-            if i < total_repos - 1:
-                time.sleep(1)
-        
-        return results
+        """批量处理项目图片（并发下载，按主机限速）"""
+        print(f'正在并发爬取 {len(repos)} 个项目的图片 (并发 {self.max_concurrency})...')
+        return asyncio.run(self.batch_crawl_images_async(repos, year, week))
 
 
 class DataProcessor:
@@ -480,20 +985,23 @@ class DataProcessor:
         # 合并仓库数据和图片数据
         merged_data = self.merge_repo_and_image_data(repos, image_results)
         
+        report = self.create_report(merged_data)
+        print(f'数据处理完成，共处理 {len(merged_data)} 个项目')
+        return report
+    
+    def create_report(self, cleaned_repos: List[Dict]) -> Dict:
+        """用已合并图片信息并清理过的仓库数据生成报告"""
         # 生成报告元数据
-        report_metadata = self.generate_report_metadata(len(merged_data))
+        report_metadata = self.generate_report_metadata(len(cleaned_repos))
         
         # 生成最终报告
         today = datetime.now().strftime('%Y%m%d')
-        report = {
+        return {
             **report_metadata,
-            'data': merged_data,
+            'data': cleaned_repos,
             'report_title': f'GitHub趋势报告{today}',
             'generated_at': datetime.now().isoformat()
         }
-        
-        print(f'数据处理完成，共处理 {len(merged_data)} 个项目')
-        return report
     
     def merge_repo_and_image_data(self, repos: List[Dict], image_results: List[Dict]) -> List[Dict]:
         """合并仓库数据和图片数据"""
@@ -526,7 +1034,7 @@ class DataProcessor:
             'created_at', 'updated_at', 'pushed_at', 'stargazers_count',
             'watchers_count', 'forks_count', 'open_issues_count',
             'language', 'primary_language', 'topics', 'tech_stack',
-            'languages', 'image_info', 'owner'
+            'languages', 'image_info', 'owner', 'enriched_at'
         ]
         
         cleaned = {k: v for k, v in repo.items() if k in keep_fields}
@@ -593,7 +1101,7 @@ class DataProcessor:
 class FileManager:
     """文件管理器"""
     
-    def __init__(self, year: str, period: str, period_type: str = 'week'):
+    def __init__(self, year: str, period: str, period_type: str = 'week', language: str = ''):
         """
         初始化文件管理器
         
@@ -601,17 +1109,20 @@ class FileManager:
             year: 年份
             period: 周期标识（周数或日期）
             period_type: 周期类型 ('week' 或 'day')
+            language: 编程语言，指定时报告文件名带语言后缀
         """
         self.year = year
         self.period = period
         self.period_type = period_type
+        self.language = language
         self.current_report_file = DATA_DIR / 'current.json'
         
         # 根据周期类型设置报告文件路径
+        suffix = f'-{self.language_slug(language)}' if language else ''
         if period_type == 'day':
-            self.report_file = DATA_DIR / year / f'{period}.json'
+            self.report_file = DATA_DIR / year / f'{period}{suffix}.json'
         else:  # week
-            self.report_file = DATA_DIR / year / f'week-{period}.json'
+            self.report_file = DATA_DIR / year / f'week-{period}{suffix}.json'
             
         self.archives_file = ARCHIVE_DIR / 'archives.json'
     
@@ -653,6 +1164,19 @@ class FileManager:
             'archives_path': str(self.archives_file)
         }
     
+    @staticmethod
+    def language_slug(language: str) -> str:
+        """把语言名转换为文件名后缀，如 C++ -> cpp、C# -> csharp"""
+        slug = language.lower().replace('+', 'p').replace('#', 'sharp')
+        return re.sub(r'[^a-z0-9]+', '-', slug).strip('-') or 'unknown'
+    
+    def save_language_report(self, report: Dict) -> Dict:
+        """保存单个语言的报告，不更新当前报告和档案"""
+        self.report_file.parent.mkdir(parents=True, exist_ok=True)
+        self.save_json(self.report_file, report)
+        print(f'已保存 {self.language} 语言报告到 {self.report_file}')
+        return {'report_path': str(self.report_file)}
+    
     def update_archives(self, new_report: Dict) -> None:
         """更新档案列表"""
         # 加载现有档案
@@ -737,12 +1261,66 @@ class FileManager:
 class GitHubTrendingCrawler:
     """GitHub趋势爬取器主类"""
     
-    def __init__(self, limit: int = 10, language: str = '', since: str = 'weekly'):
+    # 写入运行日志的参数，续爬时按日志恢复，保证与中断前的运行一致
+    RESUME_PARAMS = ('limit', 'languages', 'since', 'enrichment', 'sharded', 'incremental', 'images',
+                     'current_year', 'current_week', 'batch')
+    
+    def __init__(self, limit: int = 10, language: Union[str, List[str]] = '', since: str = 'weekly',
+                 max_concurrency: int = None, per_repo_concurrency: int = None,
+                 use_cache: bool = True, enrichment: str = 'rest', sharded: bool = False,
+                 incremental: bool = False, images: bool = False, resume: str = None, api_url: str = None,
+                 batch: bool = False, progress: Callable[..., None] = None):
         self.limit = limit
-        self.language = language
+        # 支持单个语言、逗号分隔的多个语言或语言列表
+        self.languages = self.parse_languages(language)
+        self.language = self.languages[0] if len(self.languages) == 1 else ''
         self.since = since
+        self.max_concurrency = max_concurrency or CONFIG['max_concurrency']
+        self.per_repo_concurrency = per_repo_concurrency or CONFIG['per_repo_concurrency']
+        self.use_cache = use_cache
+        self.enrichment = enrichment
+        self.sharded = sharded
+        self.incremental = incremental
+        self.images = images
         self.current_year, self.current_week = self.get_current_year_week()
-        
+        # GitHub API地址，默认使用CONFIG['github_api_url']
+        self.api_url = api_url
+        # 续爬的运行ID
+        self.resume = resume
+        self.journal: Optional[RunJournal] = None
+        # 按阶段批量执行（不使用流式流水线）
+        self.batch = batch
+        self.image_crawler: Optional[ImageCrawler] = None
+        # 各阶段耗时（秒）和流式流水线的统计
+        self.timings: Dict[str, float] = {}
+        self.pipeline_stats: Optional[Dict] = None
+        # 进度回调 (阶段, 说明, **字段)，供Web应用的后台任务推送进度；不写入运行日志
+        self.progress = progress
+    
+    @staticmethod
+    def parse_languages(language: Union[str, List[str], None]) -> List[str]:
+        """把语言参数整理为去重后的语言列表"""
+        if not language:
+            return []
+        values = language.split(',') if isinstance(language, str) else language
+        languages = []
+        for value in values:
+            for item in value.split(','):
+                item = item.strip()
+                if item and item.lower() not in (lang.lower() for lang in languages):
+                    languages.append(item)
+        return languages
+        
+    def report_progress(self, stage: str, message: str, **fields) -> None:
+        """把进度事件交给回调：stage为 search/enrich/images/report/save，
+        fields可包含 completed、total（已完成/总仓库数）和 error；回调出错不影响爬取"""
+        if self.progress is None:
+            return
+        try:
+            self.progress(stage, message, **fields)
+        except Exception as e:
+            print(f'进度回调出错: {e}')
+    
     def get_current_year_week(self) -> tuple:
         """获取当前年份和周数"""
         today = datetime.now()
@@ -750,20 +1328,9 @@ class GitHubTrendingCrawler:
         week = today.isocalendar()[1]
         return year, str(week)
     
-    def run(self) -> Dict:
-        """执行爬取任务"""
-        print('启动GitHub趋势项目爬取')
-        print(f'爬取时间范围: {self.since}')
-        if self.language:
-            print(f'编程语言: {self.language}')
-        print(f'项目数量限制: {self.limit}')
-        
-        try:
-            # 1. 初始化GitHub API客户端
-            github_api = GitHubAPI()
-            
-            # 2. 获取GitHub趋势项目
-            print(f'\n1. 正在获取GitHub趋势项目 (top {self.limit})...')
+    def fetch_full_repos(self, github_api: 'GitHubAPI') -> List[Dict]:
+        """获取单个语言（或不限语言）的趋势项目完整信息"""
+        if self.enrichment == 'graphql':
             repos = github_api.get_trending_repos(
                 since=self.since,
                 language=self.language,
@@ -779,60 +1346,441 @@ class GitHubTrendingCrawler:
                     limit=self.limit
                 )
                 if not repos:
-                    print('仍然没有获取到趋势项目')
-                    return {'success': False, 'error': '没有获取到趋势项目'}
+                    return []
             
             print(f'获取到 {len(repos)} 个趋势项目')
             
             # 3. 获取仓库完整信息
             print('\n2. 正在获取仓库完整信息...')
-            full_repos = github_api.get_repos_full_info(repos)
-            
-            # 4. 跳过图片爬取
-            print('\n3. 跳过图片爬取步骤...')
-            # 创建空的图片结果列表
+            return github_api.get_repos_full_info_graphql(repos)
+        
+        # 3. 搜索结果分页并发获取，每个仓库到达后立即获取完整信息
+        print('\n2. 正在流式获取仓库完整信息...')
+        full_repos = github_api.search_and_enrich(
+            since=self.since,
+            language=self.language,
+            limit=self.limit,
+            max_concurrency=self.max_concurrency,
+            per_repo_concurrency=self.per_repo_concurrency
+        )
+        
+        if not full_repos:
+            print('没有获取到趋势项目，尝试使用weekly时间范围')
+            self.report_progress('search', '没有获取到趋势项目，尝试使用weekly时间范围', completed=0, total=self.limit)
+            full_repos = github_api.search_and_enrich(
+                since='weekly',
+                language=self.language,
+                limit=self.limit,
+                max_concurrency=self.max_concurrency,
+                per_repo_concurrency=self.per_repo_concurrency
+            )
+        return full_repos
+    
+    def fetch_language_repos(self, github_api: 'GitHubAPI') -> Dict[str, List[Dict]]:
+        """并发获取多个语言的趋势项目完整信息，重复出现的仓库只获取一次"""
+        print(f'\n2. 正在并发获取 {len(self.languages)} 个语言的仓库完整信息...')
+        if self.enrichment == 'graphql':
+            return github_api.get_languages_full_info_graphql(self.since, self.languages, self.limit)
+        return github_api.search_and_enrich_languages(
+            since=self.since,
+            languages=self.languages,
+            limit=self.limit,
+            max_concurrency=self.max_concurrency,
+            per_repo_concurrency=self.per_repo_concurrency
+        )
+    
+    @staticmethod
+    def merge_language_repos(language_repos: Dict[str, List[Dict]]) -> List[Dict]:
+        """合并各语言的结果，按full_name去重后按stars降序排列"""
+        merged = {}
+        for repos in language_repos.values():
+            for repo in repos:
+                merged.setdefault(repo['full_name'], repo)
+        return sorted(merged.values(), key=lambda r: r.get('stargazers_count', 0), reverse=True)
+    
+    def build_report(self, full_repos: List[Dict], image_results: List[Dict] = None) -> Dict:
+        """处理数据并生成带AI摘要的报告"""
+        if image_results is None:
+            # 跳过图片爬取，创建空的图片结果列表
             image_results = [{"repo_name": repo["full_name"], "total_images": 0, "images": [], "image_dir": None} for repo in full_repos]
+        
+        data_processor = DataProcessor(self.current_year, self.current_week)
+        report = data_processor.process_data(full_repos, image_results)
+        report['ai_summary'] = data_processor.generate_ai_summary(report)
+        return report
+    
+    def create_file_manager(self, language: str = '') -> 'FileManager':
+        """根据since参数决定使用哪种周期类型"""
+        if self.since == 'daily':
+            # 使用当前日期作为周期标识
+            current_date = datetime.now().strftime('%Y%m%d')
+            return FileManager(self.current_year, current_date, 'day', language=language)
+        # 使用周数作为周期标识
+        return FileManager(self.current_year, self.current_week, 'week', language=language)
+    
+    def open_journal(self) -> RunJournal:
+        """续爬时打开已有的运行日志并恢复参数，否则开始新的运行"""
+        if self.resume:
+            journal = RunJournal.open(RUNS_DIR, self.resume)
+            for name in self.RESUME_PARAMS:
+                # 旧版本的运行日志可能缺少后来新增的参数，保留当前值
+                setattr(self, name, journal.params.get(name, getattr(self, name)))
+            self.language = self.languages[0] if len(self.languages) == 1 else ''
+            completed = ', '.join(journal.meta['stages']) or '无'
+            print(f'继续运行 {journal.run_id}（已完成阶段: {completed}）')
+        else:
+            journal = RunJournal.create(RUNS_DIR, {name: getattr(self, name) for name in self.RESUME_PARAMS},
+                                        keep=CONFIG['run_keep'], max_age_days=CONFIG['run_max_age_days'])
+            print(f'运行ID: {journal.run_id}（中断后可使用 --resume {journal.run_id} 继续）')
+        return journal
+    
+    def fetch_repos_stage(self, github_api: 'GitHubAPI', journal: RunJournal) -> Tuple[List[Dict], Dict[str, List[Dict]]]:
+        """获取仓库完整信息，结果写入检查点；续爬时已完成的阶段直接读取检查点"""
+        if journal.has_stage('repos'):
+            stage = journal.load_stage('repos')
+            full_repos = stage['full_repos']
+            by_name = {repo['full_name']: repo for repo in full_repos}
+            language_repos = {
+                language: [by_name[full_name] for full_name in full_names]
+                for language, full_names in stage['language_repos'].items()
+            }
+            print(f'已从检查点恢复 {len(full_repos)} 个仓库的完整信息')
+            return full_repos, language_repos
+        
+        # 每个获取完成的仓库都写入运行日志，续爬时不再请求
+        github_api.journal = journal
+        language_repos = {}
+        if len(self.languages) > 1:
+            language_repos = self.fetch_language_repos(github_api)
+            full_repos = self.merge_language_repos(language_repos)
+        else:
+            full_repos = self.fetch_full_repos(github_api)
+        
+        if full_repos:
+            journal.complete_stage('repos', {
+                'full_repos': [compact_repo(repo) for repo in full_repos],
+                'language_repos': {
+                    language: [repo['full_name'] for repo in repos] for language, repos in language_repos.items()
+                }
+            })
+        return full_repos, language_repos
+    
+    @property
+    def streaming(self) -> bool:
+        """REST方式获取单个语言（或不限语言）时使用流式流水线；GraphQL需要按批查询，多语言需要跨语言去重，仍按阶段执行"""
+        return not self.batch and self.enrichment == 'rest' and len(self.languages) <= 1
+    
+    async def stream_repos_async(self, github_api: 'GitHubAPI', journal: RunJournal,
+                                 since: str) -> Tuple[List[Dict], List[Dict], StagePipeline]:
+        """搜索 → 补全信息 → 图片 → 清理 → 写入运行日志，各阶段同时运行，之间用有界队列连接
+        
+        每个仓库清理后即释放README内容，内存中只保留清理后的数据。
+        返回 按排名排序的清理后仓库、本次爬取的图片结果、流水线（用于统计）
+        """
+        global_semaphore = asyncio.Semaphore(self.max_concurrency)
+        processor = DataProcessor(self.current_year, self.current_week)
+        image_crawler = self.image_crawler
+        persisted: List[Tuple[int, Dict]] = []
+        image_results: List[Dict] = []
+        completed = 0
+        
+        async with contextlib.AsyncExitStack() as stack:
+            executor = stack.enter_context(
+                ThreadPoolExecutor(max_workers=self.max_concurrency + CONFIG['search_concurrency']))
+            image_pipeline = await stack.enter_async_context(image_crawler.session()) if image_crawler else None
+            
+            async def enrich(item: Tuple[int, Dict]) -> Tuple[int, Dict]:
+                nonlocal completed
+                rank, repo = item
+                # 续爬时运行日志中已有清理后的仓库，直接进入后续阶段
+                full_info = journal.get_repo(repo['full_name'])
+                if full_info is None:
+                    full_info = await github_api.get_repo_info_async(repo, executor, global_semaphore,
+                                                                     self.per_repo_concurrency)
+                completed += 1
+                print(f'已完成 ({completed}/{self.limit}) {repo["full_name"]} 的详细信息获取...')
+                self.report_progress('enrich', f'已获取 {repo["full_name"]} 的详细信息',
+                                     completed=completed, total=self.limit)
+                return rank, full_info
+            
+            async def crawl_images(item: Tuple[int, Dict]) -> Tuple[int, Dict]:
+                rank, repo = item
+                if 'image_info' in repo:  # 运行日志中的仓库已清理过，增量快照复用的仓库带有上一次的图片信息
+                    return item
+                image_result = await image_crawler.crawl_project_images(
+                    image_pipeline, repo, self.current_year, self.current_week)
+                image_results.append(image_result)
+                return rank, {**repo, 'image_info': image_result}
             
-            # 5. 处理数据
-            print('\n4. 正在处理数据...')
-            data_processor = DataProcessor(self.current_year, self.current_week)
-            report = data_processor.process_data(full_repos, image_results)
+            async def clean(item: Tuple[int, Dict]) -> Tuple[int, Dict]:
+                rank, repo = item
+                if 'image_info' not in repo:
+                    repo = {**repo, 'image_info': {'repo_name': repo['full_name'], 'total_images': 0,
+                                                   'images': [], 'image_dir': None}}
+                # 清理后不再引用readme_content，README可以立即被回收
+                return rank, processor.clean_repo_data(repo)
             
-            # 6. 生成AI摘要
-            print('\n5. 正在生成AI摘要...')
-            ai_summary = data_processor.generate_ai_summary(report)
-            report['ai_summary'] = ai_summary
+            async def persist(item: Tuple[int, Dict]) -> Tuple[int, Dict]:
+                # 获取失败、只有基本信息的仓库不写入运行日志，续爬时重新获取
+                if 'enriched_at' in item[1]:
+                    journal.record_repo(item[1])
+                persisted.append(item)
+                return item
             
-            # 7. 保存报告
-            print('\n6. 正在保存报告...')
-            # 根据since参数决定使用哪种周期类型
-            if self.since == 'daily':
-                # 使用当前日期作为周期标识
-                current_date = datetime.now().strftime('%Y%m%d')
-                file_manager = FileManager(self.current_year, current_date, 'day')
+            stages = [Stage('enrich', enrich, self.max_concurrency)]
+            if image_crawler is not None:
+                stages.append(Stage('images', crawl_images, image_crawler.max_concurrency))
+            stages += [Stage('clean', clean), Stage('persist', persist)]
+            pipeline = StagePipeline(stages, CONFIG['pipeline_queue_size'])
+            await pipeline.run(github_api.stream_trending_repos(since, self.language, self.limit, executor))
+        
+        cleaned_repos = [repo for _, repo in sorted(persisted, key=lambda x: x[0])]
+        return cleaned_repos, image_results, pipeline
+    
+    def stream_report_stage(self, github_api: 'GitHubAPI', journal: RunJournal) -> Optional[Dict]:
+        """流式获取并处理仓库，生成报告写入检查点；没有获取到仓库时返回None"""
+        if journal.has_stage('report'):
+            print('\n已从检查点恢复报告')
+            return journal.load_stage('report')
+        
+        print('\n2. 正在流式获取、处理仓库（搜索 → 补全信息 → 图片 → 清理 → 写入）...')
+        self.image_crawler = ImageCrawler(max_concurrency=self.max_concurrency) if self.images else None
+        started = time.perf_counter()
+        cleaned_repos, image_results, pipeline = asyncio.run(self.stream_repos_async(github_api, journal, self.since))
+        if not cleaned_repos and self.since != 'weekly':
+            print('没有获取到趋势项目，尝试使用weekly时间范围')
+            self.report_progress('search', '没有获取到趋势项目，尝试使用weekly时间范围', completed=0, total=self.limit)
+            cleaned_repos, image_results, pipeline = asyncio.run(
+                self.stream_repos_async(github_api, journal, 'weekly'))
+        if not cleaned_repos:
+            return None
+        print(f'获取到 {len(cleaned_repos)} 个趋势项目')
+        
+        if self.image_crawler is not None:
+            asyncio.run(self.image_crawler.generate_variants(image_results))
+        
+        # 各阶段同时运行，按每个阶段处理完最后一项的时刻划分耗时
+        stage_finished = {stage.name: stage.finished_at for stage in pipeline.stages}
+        searched = github_api.last_search_at if github_api.last_search_at is not None else started
+        self.timings['search'] = searched - started
+        self.timings['enrichment'] = stage_finished['enrich'] - searched
+        self.timings['images'] = stage_finished.get('images', stage_finished['enrich']) - stage_finished['enrich']
+        self.timings['first_persisted'] = (pipeline.first_output_at or time.perf_counter()) - started
+        self.pipeline_stats = pipeline.get_stats()
+        
+        processed = time.perf_counter()
+        print('\n4. 正在生成报告和AI摘要...')
+        self.report_progress('report', '正在生成报告和AI摘要...')
+        processor = DataProcessor(self.current_year, self.current_week)
+        report = processor.create_report(cleaned_repos)
+        report['ai_summary'] = processor.generate_ai_summary(report)
+        journal.complete_stage('report', report)
+        self.timings['processing'] = time.perf_counter() - processed + (
+            stage_finished['persist'] - stage_finished.get('images', stage_finished['enrich']))
+        return report
+    
+    def run(self) -> Dict:
+        """执行爬取任务"""
+        try:
+            self.journal = journal = self.open_journal()
+        except (OSError, ValueError, KeyError) as e:
+            print(f'无法打开运行记录: {e}')
+            recent = [meta['run_id'] for meta in list_runs(RUNS_DIR)[:5]]
+            if recent:
+                print(f'最近的运行: {", ".join(recent)}')
+            return {'success': False, 'error': str(e)}
+        if journal.finished:
+            print(f'运行 {journal.run_id} 已经完成，无需继续')
+            saved = journal.load_stage('saved')
+            return {'success': True, 'run_id': journal.run_id, 'report': journal.load_stage('report'), **saved}
+        
+        print('启动GitHub趋势项目爬取')
+        print(f'爬取时间范围: {self.since}')
+        if self.languages:
+            print(f'编程语言: {", ".join(self.languages)}')
+        print(f'项目数量限制: {self.limit}')
+        
+        cache = None
+        try:
+            # 1. 初始化GitHub API客户端（连接池大小与并发数一致）
+            cache = ResponseCache(CACHE_FILE, CONFIG['http_cache_max_bytes']) if self.use_cache else None
+            github_api = GitHubAPI(
+                pool=get_shared_pool(self.max_concurrency),
+                cache=cache,
+                scheduler=RateLimitScheduler(max_concurrency=self.max_concurrency),
+                base_url=self.api_url
+            )
+            github_api.sharded_search = self.sharded
+            # 共享连接池的统计在进程内累计，只报告本次爬取的部分
+            pool_mark = github_api.pool.stats.mark()
+            if self.incremental:
+                # 增量模式：与最近保存的报告对比，未变化的仓库复用已保存的信息
+                ttl = timedelta(hours=CONFIG['enrichment_ttl_hours'])
+                github_api.snapshot = EnrichmentSnapshot.load(
+                    recent_report_files(DATA_DIR, ttl), ttl, images=self.images
+                )
+            
+            # 2. 获取GitHub趋势项目
+            github_api.progress = self.report_progress
+            image_stats, language_repos = None, {}
+            print(f'\n1. 正在获取GitHub趋势项目 (top {self.limit})...')
+            self.report_progress('search', f'正在获取GitHub趋势项目 (top {self.limit})...', completed=0, total=self.limit)
+            if self.streaming:
+                report = self.stream_report_stage(github_api, journal)
+                if report is None:
+                    print('仍然没有获取到趋势项目')
+                    journal.finish('failed', '没有获取到趋势项目')
+                    return {'success': False, 'error': '没有获取到趋势项目', 'run_id': journal.run_id}
+                if self.image_crawler is not None:
+                    image_stats = self.image_crawler.stats
+                    print(f'图片下载统计: 下载 {image_stats["downloads"]} 张, 复用 {image_stats["reused"]} 张, '
+                          f'失败 {image_stats["failures"]} 张, 共 {image_stats["bytes"]} 字节')
             else:
-                # 使用周数作为周期标识
-                file_manager = FileManager(self.current_year, self.current_week, 'week')
+                started = time.perf_counter()
+                full_repos, language_repos = self.fetch_repos_stage(github_api, journal)
+                finished = time.perf_counter()
+                # 搜索与补全信息是流水线并行的：搜索阶段记到最后一页搜索结果返回为止，其余时间计入补全阶段
+                searched = github_api.last_search_at if github_api.last_search_at is not None else started
+                self.timings['search'] = searched - started
+                self.timings['enrichment'] = finished - searched
+                
+                if not full_repos:
+                    print('仍然没有获取到趋势项目')
+                    journal.finish('failed', '没有获取到趋势项目')
+                    return {'success': False, 'error': '没有获取到趋势项目', 'run_id': journal.run_id}
+                print(f'获取到 {len(full_repos)} 个趋势项目')
+                
+                # 4. 爬取图片（默认跳过）
+                image_results, image_stats = None, None
+                started = time.perf_counter()
+                if journal.has_stage('images'):
+                    stage = journal.load_stage('images')
+                    image_results, image_stats = stage['results'], stage['stats']
+                    print('\n3. 已从检查点恢复项目图片')
+                elif self.images:
+                    print('\n3. 正在爬取项目图片...')
+                    self.report_progress('images', '正在爬取项目图片...')
+                    image_crawler = ImageCrawler(max_concurrency=self.max_concurrency)
+                    image_results = image_crawler.batch_crawl_images(full_repos, self.current_year, self.current_week)
+                    image_stats = image_crawler.stats
+                    print(f'图片下载统计: 下载 {image_stats["downloads"]} 张, 复用 {image_stats["reused"]} 张, '
+                          f'失败 {image_stats["failures"]} 张, 共 {image_stats["bytes"]} 字节')
+                    journal.complete_stage('images', {'results': image_results, 'stats': image_stats})
+                else:
+                    print('\n3. 跳过图片爬取步骤...')
+                self.timings['images'] = time.perf_counter() - started
                 
+                # 5. 处理数据并生成AI摘要
+                started = time.perf_counter()
+                if journal.has_stage('report'):
+                    print('\n4. 已从检查点恢复报告')
+                    report = journal.load_stage('report')
+                else:
+                    print('\n4. 正在处理数据并生成AI摘要...')
+                    self.report_progress('report', '正在处理数据并生成AI摘要...')
+                    report = self.build_report(full_repos, image_results)
+                    journal.complete_stage('report', report)
+                self.timings['processing'] = time.perf_counter() - started
+            
+            # 6. 保存报告
+            print('\n5. 正在保存报告...')
+            self.report_progress('save', '正在保存报告...')
+            started = time.perf_counter()
+            file_manager = self.create_file_manager()
             file_manager.backup_current_data()  # 备份当前数据
             save_result = file_manager.save_report(report)
             
+            # 7. 保存各语言的报告
+            language_reports = {}
+            for language, repos in language_repos.items():
+                if not repos:
+                    print(f'语言 {language} 没有获取到趋势项目，跳过报告')
+                    continue
+                language_report = self.build_report(repos, image_results)
+                language_report['language'] = language
+                language_reports[language] = self.create_file_manager(language).save_language_report(language_report)
+            
+            journal.complete_stage('saved', {'save_result': save_result, 'language_reports': language_reports})
+            journal.finish()
+            self.timings['save'] = time.perf_counter() - started
+            self.timings = {phase: round(seconds, 3) for phase, seconds in self.timings.items()}
+            
             print('\nGitHub趋势项目爬取完成！')
             print(f'生成报告: {report["report_title"]}')
             print(f'报告文件: {save_result["report_path"]}')
             print(f'档案文件: {save_result["archives_path"]}')
+            for language, language_result in language_reports.items():
+                print(f'{language} 语言报告: {language_result["report_path"]}')
+            
+            http_stats = github_api.pool.get_stats(since=pool_mark)
+            print(f'HTTP连接池统计: 请求 {http_stats["requests"]} 次, 新建连接 {http_stats["connections"]} 个, '
+                  f'复用连接 {http_stats["reused"]} 次')
+            latency = http_stats['latency_ms']
+            print(f'请求延迟: p50 {latency["p50"]} ms, p95 {latency["p95"]} ms, p99 {latency["p99"]} ms')
+            print('阶段耗时: ' + ', '.join(f'{phase} {seconds} 秒' for phase, seconds in self.timings.items()))
+            if self.pipeline_stats is not None:
+                print('流水线统计: ' + ', '.join(
+                    f'{name} 处理 {stage["processed"]} 个/队列峰值 {stage["max_queued"]}'
+                    for name, stage in self.pipeline_stats['stages'].items()))
+            if cache is not None:
+                http_stats['cache'] = cache.get_stats()
+                print(f'条件请求缓存统计: 304命中 {http_stats["cache"]["hits"]} 次, '
+                      f'未命中 {http_stats["cache"]["misses"]} 次, 淘汰 {http_stats["cache"]["evictions"]} 条')
+            http_stats['retry'] = github_api.retry_policy.get_stats()
+            print(f'重试统计: 重试 {http_stats["retry"]["retries"]} 次, 失败 {http_stats["retry"]["failures"]} 次, '
+                  f'熔断 {http_stats["retry"]["breaker_trips"]} 次, 熔断跳过 {http_stats["retry"]["short_circuited"]} 次')
+            http_stats['rate_limit'] = github_api.scheduler.get_report()
+            for resource, usage in http_stats['rate_limit'].items():
+                print(f'API额度 [{resource}]: 请求 {usage["requests"]} 次, 消耗 {usage["consumed"]} 点, '
+                      f'剩余 {usage["remaining"]}, 限流 {usage["throttled"]} 次, 等待 {usage["waited_seconds"]} 秒')
+            
+            incremental_stats = None
+            if github_api.snapshot is not None:
+                incremental_stats = github_api.snapshot.get_stats()
+                print(f'增量爬取统计: 复用 {incremental_stats["hits"]} 个, 重新获取 {incremental_stats["misses"]} 个 '
+                      f'(新仓库 {incremental_stats["new"]}, 有新提交 {incremental_stats["pushed"]}, '
+                      f'超过有效期 {incremental_stats["expired"]}, 缺少图片 {incremental_stats["no_images"]})')
             
             return {
                 'success': True,
+                'run_id': journal.run_id,
+                'journal': journal.get_stats(),
                 'report': report,
-                'save_result': save_result
+                'save_result': save_result,
+                'language_reports': language_reports,
+                'http_stats': http_stats,
+                'incremental': incremental_stats,
+                'image_stats': image_stats,
+                'timings': self.timings,
+                'pipeline': self.pipeline_stats
             }
             
         except Exception as e:
             print(f'\n爬取失败: {e}')
             import traceback
             traceback.print_exc()
-            return {'success': False, 'error': str(e)}
+            journal.finish('failed', str(e))
+            print(f'已完成的阶段和仓库已保存，可使用 --resume {journal.run_id} 继续')
+            return {'success': False, 'error': str(e), 'run_id': journal.run_id}
+        finally:
+            # 在Web进程中多次运行，失败时也要关闭缓存的数据库连接
+            if cache is not None:
+                cache.close()
+
+
+def crawl(limit: int = None, language: Union[str, List[str]] = '', since: str = None, **options) -> Dict:
+    """在当前进程中执行一次爬取，直接返回结果（供Web应用调用，不需要启动子进程再读取JSON文件）
+    
+    options为 GitHubTrendingCrawler 的其他参数。返回值与 GitHubTrendingCrawler.run 相同，
+    成功时 report 为报告对象；HTTP连接池在进程内共享，多次调用会复用已建立的连接
+    """
+    crawler = GitHubTrendingCrawler(
+        limit=limit or CONFIG['repo_limit'],
+        language=language,
+        since=since or CONFIG['since'],
+        **options
+    )
+    return crawler.run()
 
 
 def show_help():
@@ -844,13 +1792,23 @@ def show_help():
     print('')
     print('选项:')
     print('  -h, --help            显示帮助信息')
-    print('  -l, --limit <数量>     限制爬取的项目数量 (默认: 10)')
-    print('  -lang, --language <语言>  过滤特定编程语言 (默认: 无)')
+    print('  -l, --limit <数量>     限制爬取的项目数量，超过100时分页获取，超过1000时分片搜索 (默认: 10)')
+    print('  -lang, --language <语言>  过滤特定编程语言，多个语言用逗号分隔时并发爬取并分别生成报告 (默认: 无)')
     print('  -s, --since <时间范围>   时间范围: daily, weekly, monthly (默认: weekly)')
+    print('  -c, --concurrency <数量>  全局最大并发请求数 (默认: 10)')
+    print('  --per-repo-concurrency <数量>  单个仓库内的最大并发子请求数 (默认: 3)')
+    print('  --no-cache            不使用ETag条件请求缓存')
+    print('  -e, --enrichment <方式>  仓库信息获取方式: rest, graphql (默认: rest)')
+    print('  --sharded             强制按stars/日期区间分片搜索')
+    print('  --incremental         增量爬取，pushed_at未变化且未过期的仓库复用上次保存的信息')
+    print('  --images              下载项目代表图片（默认跳过）')
+    print('  --resume <运行ID>      从中断的运行的最后一个检查点继续，沿用该运行的参数')
+    print('  --api-url <地址>       GitHub API地址，可指向 fake_github_server.py 离线测试 (默认: 环境变量GITHUB_API_URL或api.github.com)')
     print('')
     print('示例:')
     print('  python python_crawler.py --limit 20 --language python --since weekly')
     print('  python python_crawler.py -l 15 -s monthly')
+    print('  python python_crawler.py -l 20 -lang python,go,rust')
 
 
 def parse_arguments():
@@ -859,13 +1817,24 @@ def parse_arguments():
     
     parser = argparse.ArgumentParser(description='GitHub Trending Python Crawler')
     parser.add_argument('-l', '--limit', type=int, default=10, help='限制爬取的项目数量')
-    parser.add_argument('-lang', '--language', type=str, default='', help='过滤特定编程语言')
+    parser.add_argument('-lang', '--language', type=str, default='', help='过滤特定编程语言，多个语言用逗号分隔')
     parser.add_argument('-s', '--since', type=str, choices=['daily', 'weekly', 'monthly'], default='weekly', help='时间范围')
+    parser.add_argument('-c', '--concurrency', type=int, default=CONFIG['max_concurrency'], help='全局最大并发请求数')
+    parser.add_argument('--per-repo-concurrency', type=int, default=CONFIG['per_repo_concurrency'], help='单个仓库内的最大并发子请求数')
+    parser.add_argument('--no-cache', action='store_true', help='不使用ETag条件请求缓存')
+    parser.add_argument('-e', '--enrichment', type=str, choices=['rest', 'graphql'], default='rest', help='仓库信息获取方式')
+    parser.add_argument('--sharded', action='store_true', help='强制按stars/日期区间分片搜索')
+    parser.add_argument('--incremental', action='store_true', help='增量爬取，未变化的仓库复用上次保存的信息')
+    parser.add_argument('--images', action='store_true', help='下载项目代表图片')
+    parser.add_argument('--resume', type=str, metavar='RUN_ID', help='从中断的运行的最后一个检查点继续')
+    parser.add_argument('--batch', action='store_true', help='按阶段批量执行，不使用流式流水线')
+    parser.add_argument('--api-url', type=str, default=None, help='GitHub API地址（如本地模拟服务器）')
     
     return parser.parse_args()
 
 
 if __name__ == '__main__':
+    crawler = None
     try:
         # 解析命令行参数
         args = parse_arguments()
@@ -874,7 +1843,17 @@ if __name__ == '__main__':
         crawler = GitHubTrendingCrawler(
             limit=args.limit,
             language=args.language,
-            since=args.since
+            since=args.since,
+            max_concurrency=args.concurrency,
+            per_repo_concurrency=args.per_repo_concurrency,
+            use_cache=not args.no_cache,
+            enrichment=args.enrichment,
+            sharded=args.sharded,
+            incremental=args.incremental,
+            images=args.images,
+            resume=args.resume,
+            api_url=args.api_url,
+            batch=args.batch
         )
         
         result = crawler.run()
@@ -888,6 +1867,8 @@ if __name__ == '__main__':
             
     except KeyboardInterrupt:
         print('\n\n爬取任务被用户中断')
+        if crawler is not None and crawler.journal is not None:
+            print(f'已完成的阶段和仓库已保存，可使用 --resume {crawler.journal.run_id} 继续')
         sys.exit(0)
     except Exception as e:
         print(f'\n\n程序发生意外错误: {e}')